@@ -2,6 +2,7 @@ import random
 import functools
 from collections.abc import Iterable
 import enum
+import pytz
 
 
 class _PokerEnumMeta(enum.EnumMeta):
@@ -81,3 +82,10 @@ def _make_float(string):
 
 def _make_int(string):
     return int(string.strip().replace(",", ""))
+
+
+def _utc_iso(date):
+    """Dates are stored as ISO 8601 strings in UTC, so they can be compared as strings."""
+    if date.tzinfo is None:
+        date = pytz.UTC.localize(date)
+    return date.astimezone(pytz.UTC).isoformat()
@@ -0,0 +1,88 @@
+"""
+    Precomputed integer tables for cards, combos and suit permutations.
+
+    Cards are numbered from 0 to 51 as ``rank_index * 4 + suit_index``, which is the order of
+    ``Card._all_cards``, so sorting ids sorts the same way as sorting :class:`Card` instances.
+    Combos are numbered from 0 to 1325 in the order of ``itertools.combinations(range(52), 2)``.
+"""
+
+import itertools
+from .card import Card
+
+
+CARDS = tuple(Card)
+"""Card instances indexed by card id."""
+
+_CARD_IDS = {card: ind for ind, card in enumerate(CARDS)}
+
+
+def card_str(card):
+    """Same as ``str(card)``, e.g. ``"A♥"``, without hashing and formatting the enums."""
+    return card.rank.val + card.suit.val
+
+
+CARD_STR_IDS = {card_str(card): ind for ind, card in enumerate(CARDS)}
+"""Card id of every ``str(card)``, e.g. ``CARD_STR_IDS["A♥"]``."""
+
+COMBO_CARDS = tuple(itertools.combinations(range(52), 2))
+"""(lower card id, higher card id) pairs indexed by combo id."""
+
+_COMBO_IDS = {pair: ind for ind, pair in enumerate(COMBO_CARDS)}
+
+SUIT_PERMUTATIONS = tuple(itertools.permutations(range(4)))
+"""All the 24 possible suit relabelings, ``perm[old_suit_index] == new_suit_index``."""
+
+# card id -> card id for every suit permutation
+CARD_MAPS = tuple(
+    tuple(card - card % 4 + perm[card % 4] for card in range(52)) for perm in SUIT_PERMUTATIONS
+)
+
+
+def _make_combo_map(card_map):
+    combo_map = []
+    for first, second in COMBO_CARDS:
+        first, second = card_map[first], card_map[second]
+        pair = (first, second) if first < second else (second, first)
+        combo_map.append(_COMBO_IDS[pair])
+    return tuple(combo_map)
+
+
+# combo id -> combo id for every suit permutation
+COMBO_MAPS = tuple(_make_combo_map(card_map) for card_map in CARD_MAPS)
+
+
+def card_id(card):
+    """Id of a :class:`Card` or a card str like ``"Ah"``."""
+    return _CARD_IDS[Card(card)]
+
+
+def card_ids(cards):
+    """Tuple of card ids from an iterable of cards or from a str like ``"2c7d9s"``."""
+    if isinstance(cards, str):
+        cards = cards.replace(" ", "")
+        cards = [cards[ind:ind + 2] for ind in range(0, len(cards), 2)]
+    return tuple(_CARD_IDS[Card(card)] for card in cards)
+
+
+def combo_id(combo):
+    """Id of a :class:`Combo`."""
+    first, second = _CARD_IDS[combo.first], _CARD_IDS[combo.second]
+    return _COMBO_IDS[(second, first) if second < first else (first, second)]
+
+
+def minimal_permutations(ids):
+    """Find the suit permutations which map the given card ids to the smallest possible
+    sorted tuple of ids.
+
+    Returns the smallest tuple and the indexes of every permutation (into
+    :data:`SUIT_PERMUTATIONS`) producing it, because on boards with unused or equivalent suits
+    more than one permutation gives the same result.
+    """
+    best, best_indexes = None, []
+    for ind, card_map in enumerate(CARD_MAPS):
+        mapped = tuple(sorted(card_map[card] for card in ids))
+        if best is None or mapped < best:
+            best, best_indexes = mapped, [ind]
+        elif mapped == best:
+            best_indexes.append(ind)
+    return best, best_indexes
@@ -0,0 +1,173 @@
+"""
+    Board related helpers, which collapse suit symmetry.
+"""
+
+import enum
+import itertools
+import functools
+from collections import namedtuple
+from . import _lookup
+from .card import Suit
+from .hand import Combo
+
+
+__all__ = ["CanonicalBoard", "canonical", "flops", "Texture", "texture"]
+
+
+CanonicalBoard = namedtuple("CanonicalBoard", "cards hero permutation")
+CanonicalBoard.__doc__ = """Result of :func:`canonical`.
+
+:ivar tuple cards:          canonical board cards in ascending order
+:ivar Combo hero:           canonical hero combo, ``None`` if not given
+:ivar dict permutation:     ``{original Suit: canonical Suit}`` mapping which was applied
+"""
+
+_SUITS = tuple(Suit)
+
+
+def _board_ids(cards):
+    # streets have a cards attribute
+    cards = getattr(cards, "cards", cards)
+    return _lookup.card_ids(cards)
+
+
+def canonical(cards, hero=None):
+    """Map a flop, turn or river (and optionally a hero :class:`Combo`) to the canonical
+    representative of all the suit permuted versions of it.
+
+    The board is treated as a set of cards, so the order of the cards does not matter. It can be
+    an iterable of Cards, a str like ``"2c7d9s"`` or a street with a ``cards`` attribute.
+    Returns a :class:`CanonicalBoard`, e.g. ``canonical("AhKh2c").cards == (2c, Kd, Ad)``.
+    """
+    ids = _board_ids(cards)
+    if not 3 <= len(ids) <= 5:
+        raise ValueError(f"A board should have 3, 4 or 5 cards, not {len(ids)}")
+    board_ids, permutations = _lookup.minimal_permutations(ids)
+
+    if hero is None:
+        best_ind, hero_ids = permutations[0], None
+    else:
+        hero = Combo(hero)
+        ids = _lookup.card_id(hero.first), _lookup.card_id(hero.second)
+        best_ind, hero_ids = None, None
+        for ind in permutations:
+            card_map = _lookup.CARD_MAPS[ind]
+            mapped = tuple(sorted(card_map[card] for card in ids))
+            if hero_ids is None or mapped < hero_ids:
+                best_ind, hero_ids = ind, mapped
+
+    cards = tuple(_lookup.CARDS[card] for card in board_ids)
+    if hero_ids is not None:
+        hero = Combo.from_cards(_lookup.CARDS[hero_ids[0]], _lookup.CARDS[hero_ids[1]])
+    perm = _lookup.SUIT_PERMUTATIONS[best_ind]
+    permutation = {suit: _SUITS[perm[ind]] for ind, suit in enumerate(_SUITS)}
+    return CanonicalBoard(cards, hero, permutation)
+
+
+@functools.lru_cache(maxsize=None)
+def _canonical_flops():
+    weights = dict()
+    for flop in itertools.combinations(range(52), 3):
+        best = min(
+            tuple(sorted(card_map[card] for card in flop)) for card_map in _lookup.CARD_MAPS
+        )
+        weights[best] = weights.get(best, 0) + 1
+    return tuple(
+        (tuple(_lookup.CARDS[card] for card in flop), weight)
+        for flop, weight in sorted(weights.items())
+    )
+
+
+def flops():
+    """Iterate over the 1,755 strategically distinct flops as ``(cards, weight)`` tuples,
+    where weight is the number of the 22,100 possible flops which are suit isomorphic to
+    ``cards``. The cards are the same as :func:`canonical` would give.
+    """
+    return iter(_canonical_flops())
+
+
+class Texture(enum.IntFlag):
+    """Board texture flags, see :func:`texture`."""
+
+    RAINBOW = 1
+    MONOTONE = 2
+    TRIPLET = 4
+    PAIR = 8
+    STRAIGHTDRAW = 16
+    GUTSHOT = 32
+    FLUSHDRAW = 64
+
+
+# these hold only if they are true for every 3 card subset of a bigger board,
+# the others if they are true for any of them
+_ALL_TEXTURES = Texture.RAINBOW | Texture.MONOTONE | Texture.TRIPLET
+
+
+def _rank_distance(first, second):
+    """Distance of two rank indexes, where Ace (12) is also next to Deuce (0)."""
+    distance = abs(first - second)
+    if first == 12 or second == 12:
+        distance = min(distance, min(first, second) + 1)
+    return distance
+
+
+def _flop_texture(flop):
+    ranks = [card // 4 for card in flop]
+    suits = [card % 4 for card in flop]
+    pairs = list(itertools.combinations(range(3), 2))
+    same_suits = [suits[first] == suits[second] for first, second in pairs]
+    same_ranks = [ranks[first] == ranks[second] for first, second in pairs]
+    distances = [_rank_distance(ranks[first], ranks[second]) for first, second in pairs]
+
+    flags = Texture(0)
+    if not any(same_suits):
+        flags |= Texture.RAINBOW
+    if all(same_suits):
+        flags |= Texture.MONOTONE
+    if all(same_ranks):
+        flags |= Texture.TRIPLET
+    if any(same_ranks):
+        flags |= Texture.PAIR
+    if any(1 <= distance <= 3 for distance in distances):
+        flags |= Texture.STRAIGHTDRAW
+    if any(1 <= distance <= 4 for distance in distances):
+        flags |= Texture.GUTSHOT
+    if any(same_suits):
+        flags |= Texture.FLUSHDRAW
+    return flags
+
+
+def _flop_index(first, second, third):
+    """Index of sorted card ids in the combinatorial number system, between 0 and 22099."""
+    return first + second * (second - 1) // 2 + third * (third - 1) * (third - 2) // 6
+
+
+@functools.lru_cache(maxsize=None)
+def _texture_table():
+    table = [None] * 22100
+    for flop in itertools.combinations(range(52), 3):
+        table[_flop_index(*flop)] = _flop_texture(flop)
+    return tuple(table)
+
+
+def texture(cards):
+    """Texture flags of a flop, turn or river from a precomputed table of all the 22,100 flops.
+
+    Flags of bigger boards are made from all the 3 card subsets: ``RAINBOW``, ``MONOTONE`` and
+    ``TRIPLET`` are set if they hold for every pair of cards, the others if they hold for any
+    pair of cards. Straight draws count Ace as both high and low card.
+    """
+    ids = sorted(_board_ids(cards))
+    if not 3 <= len(ids) <= 5:
+        raise ValueError(f"A board should have 3, 4 or 5 cards, not {len(ids)}")
+
+    table = _texture_table()
+    if len(ids) == 3:
+        return table[_flop_index(*ids)]
+
+    all_flags, any_flags = _ALL_TEXTURES, Texture(0)
+    for flop in itertools.combinations(ids, 3):
+        flags = table[_flop_index(*flop)]
+        all_flags &= flags
+        any_flags |= flags
+    return (all_flags & _ALL_TEXTURES) | (any_flags & ~_ALL_TEXTURES)
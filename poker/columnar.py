@@ -0,0 +1,301 @@
+"""
+    Column oriented tables of parsed hand histories for vectorized analytics. Needs numpy.
+"""
+
+from decimal import Decimal
+from pathlib import Path
+import numpy as np
+from . import handhistory
+from .constants import PokerRoom, GameType, Game, Limit, Currency, Action
+
+
+__all__ = ["MISSING", "STREETS", "TABLES", "StringPool", "ColumnarWriter", "export", "load"]
+
+
+MISSING = np.iinfo(np.int64).min
+"""Value of missing amounts and idents in the int64 columns."""
+
+STREETS = ("preflop", "flop", "turn", "river", "show_down")
+"""Street codes of the actions table are indexes in this tuple."""
+
+# enum codes are indexes in these tuples, -1 is missing
+_ENUM_CODES = {
+    enum_class: {member: code for code, member in enumerate(enum_class)}
+    for enum_class in (PokerRoom, GameType, Game, Limit, Currency, Action)
+}
+
+TABLES = {
+    "hands": (
+        ("ident", np.int64),
+        ("room", np.int8),
+        ("date", "datetime64[s]"),
+        ("game_type", np.int8),
+        ("game", np.int8),
+        ("limit", np.int8),
+        ("currency", np.int8),
+        ("tournament_ident", np.int64),
+        ("table", np.int32),
+        ("sb", np.int64),
+        ("bb", np.int64),
+        ("buyin", np.int64),
+        ("buyin_rake", np.int64),
+        ("total_pot", np.int64),
+        ("pot_rake", np.int64),
+        ("hero", np.int32),
+        ("earnings", np.int64),
+    ),
+    "players": (
+        ("hand", np.int64),
+        ("seat", np.int8),
+        ("player", np.int32),
+        ("stack", np.int64),
+    ),
+    "actions": (
+        ("hand", np.int64),
+        ("street", np.int8),
+        ("player", np.int32),
+        ("action", np.int8),
+        ("amount", np.int64),
+    ),
+}
+"""Columns and dtypes of every table. The ``hand`` column is the row number in the hands table,
+the ``table``, ``hero`` and ``player`` columns are ids in the string pool and enum columns are
+indexes in the tuple of the enum, e.g. ``tuple(Action)``.
+"""
+
+_FORMATS = ("npz", "parquet")
+
+
+class StringPool:
+    """Dictionary encoding of strings, every distinct string gets the next int id."""
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self._ids = {string: ind for ind, string in enumerate(self.strings)}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def encode(self, string):
+        """Id of the string, -1 for None."""
+        if string is None:
+            return -1
+        try:
+            return self._ids[string]
+        except KeyError:
+            string_id = self._ids[string] = len(self.strings)
+            self.strings.append(string)
+            return string_id
+
+
+def _amount(value):
+    if value is None:
+        return MISSING
+    elif isinstance(value, int):
+        return value
+    elif isinstance(value, Decimal) and value == value.to_integral_value():
+        return int(value)
+    raise ValueError(
+        f"Amount {value} is not an integer, parse the hands with integer_amounts=True"
+    )
+
+
+def _number(value):
+    return int(value) if value is not None else MISSING
+
+
+def _code(enum_class, member):
+    return _ENUM_CODES[enum_class][member] if member is not None else -1
+
+
+def _timestamp(date):
+    return int(date.timestamp()) if date is not None else MISSING
+
+
+def _room_codes():
+    return {
+        parser: _code(PokerRoom, room) for parser, room in handhistory._parser_rooms().items()
+    }
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ColumnarWriter:
+    """Write parsed hand histories to hands, players and actions tables.
+
+    Hands are buffered in Python lists of fixed type and written in shards of ``shard_size``
+    hands as fixed dtype arrays, see :data:`TABLES`. Every shard is one file per table:
+    ``hands-00000.npz``, ``players-00000.npz``, ``actions-00000.npz``, etc. Strings (table and
+    player names) are written to ``strings.npz`` when the writer is closed.
+
+    Amounts are int64, so hands have to be parsed with ``integer_amounts=True``, Decimal amounts
+    are only accepted when they are whole numbers.
+
+    :param directory:       output folder, created if it doesn't exist
+    :param int shard_size:  number of hands in one shard
+    :param str format:      ``"npz"`` or ``"parquet"``, the default is Parquet when pyarrow is
+                            installed, npz otherwise
+    """
+
+    def __init__(self, directory, shard_size=100000, format=None):
+        if format is None:
+            format = "parquet" if _has_pyarrow() else "npz"
+        if format not in _FORMATS:
+            raise ValueError(f"Unknown format {format!r}, use one of {_FORMATS}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.format = format
+        self.shard_size = shard_size
+        self.strings = StringPool()
+        self.hands = 0
+        """Number of written hands."""
+        self.shards = 0
+        """Number of written shards."""
+        self._room_codes = _room_codes()
+        self._columns = self._empty_columns()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, hand):
+        """Add a parsed hand history to the tables."""
+        hand_row = self.hands
+        encode = self.strings.encode
+        hero = getattr(hand, "hero", None)
+        values = (
+            _number(hand.ident),
+            self._room_codes.get(type(hand), -1),
+            _timestamp(getattr(hand, "date", None)),
+            _code(GameType, getattr(hand, "game_type", None)),
+            _code(Game, getattr(hand, "game", None)),
+            _code(Limit, getattr(hand, "limit", None)),
+            _code(Currency, getattr(hand, "currency", None)),
+            _number(getattr(hand, "tournament_ident", None)),
+            encode(getattr(hand, "table_name", None)),
+            _amount(getattr(hand, "sb", None)),
+            _amount(getattr(hand, "bb", None)),
+            _amount(getattr(hand, "buyin", None)),
+            _amount(handhistory._buyin_rake(hand)),
+            _amount(getattr(hand, "total_pot", None)),
+            _amount(getattr(hand, "pot_rake", None)),
+            encode(hero.name if hero is not None else None),
+            _amount(getattr(hand, "earnings", None)),
+        )
+        player_rows = [
+            (hand_row, player.seat, encode(player.name), _amount(player.stack))
+            for player in getattr(hand, "players", None) or ()
+            if player.name != f"Empty Seat {player.seat}"
+        ]
+        action_rows = []
+        for street_code, street_name in enumerate(STREETS):
+            # some rooms have only the action lines of some streets, not street objects
+            street_actions = getattr(getattr(hand, street_name, None), "actions", None)
+            for action in street_actions or ():
+                action_rows.append((
+                    hand_row,
+                    street_code,
+                    encode(action.name),
+                    _code(Action, action.action),
+                    _amount(action.amount),
+                ))
+
+        # append only after every value is converted, so a bad hand doesn't leave partial rows
+        self._append("hands", [values])
+        self._append("players", player_rows)
+        self._append("actions", action_rows)
+        self.hands += 1
+        if self.hands % self.shard_size == 0:
+            self.flush()
+
+    def _append(self, table, rows):
+        for column, values in zip(self._columns[table].values(), zip(*rows)):
+            column.extend(values)
+
+    def flush(self):
+        """Write the buffered hands as a new shard."""
+        if not self._columns["hands"]["ident"]:
+            return
+        for table, columns in TABLES.items():
+            arrays = {
+                name: self._to_array(self._columns[table][name], dtype) for name, dtype in columns
+            }
+            self._save(f"{table}-{self.shards:05d}", arrays)
+        self.shards += 1
+        self._columns = self._empty_columns()
+
+    def close(self):
+        """Write the last shard and the string pool."""
+        self.flush()
+        self._save("strings", {"value": np.array(self.strings.strings, dtype=str)})
+
+    @staticmethod
+    def _empty_columns():
+        return {table: {name: [] for name, _ in columns} for table, columns in TABLES.items()}
+
+    @staticmethod
+    def _to_array(values, dtype):
+        if np.dtype(dtype).kind == "M":
+            return np.array(values, dtype=np.int64).view(dtype)
+        return np.array(values, dtype=dtype)
+
+    def _save(self, name, arrays):
+        path = self.directory / f"{name}.{self.format}"
+        if self.format == "npz":
+            np.savez(path, **arrays)
+        else:
+            import pyarrow
+            import pyarrow.parquet
+
+            pyarrow.parquet.write_table(pyarrow.table(arrays), str(path))
+
+
+def export(hands, directory, shard_size=100000, format=None):
+    """Write parsed hand histories with a :class:`ColumnarWriter`, return the number of hands."""
+    with ColumnarWriter(directory, shard_size, format) as writer:
+        for hand in hands:
+            writer.write(hand)
+    return writer.hands
+
+
+def load(directory):
+    """Load every shard written by :class:`ColumnarWriter`.
+
+    :return: ``{table: {column: array}}`` of the hands, players and actions tables, shards
+             concatenated in order, and the :class:`StringPool` under the ``"strings"`` key.
+    """
+    directory = Path(directory)
+    format = "npz" if (directory / "strings.npz").exists() else "parquet"
+    result = {}
+    for table, columns in TABLES.items():
+        shards = [_read(path, format) for path in sorted(directory.glob(f"{table}-*.{format}"))]
+        result[table] = {
+            name: np.concatenate([shard[name] for shard in shards])
+            if shards
+            else np.array([], dtype=dtype)
+            for name, dtype in columns
+        }
+    result["strings"] = StringPool(_read(directory / f"strings.{format}", format)["value"].tolist())
+    return result
+
+
+def _read(path, format):
+    if format == "npz":
+        with np.load(path) as arrays:
+            return dict(arrays)
+
+    import pyarrow.parquet
+
+    table = pyarrow.parquet.read_table(str(path))
+    return {name: table.column(name).to_numpy() for name in table.column_names}
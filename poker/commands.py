@@ -168,3 +168,31 @@ def psstatus():
 
     for site in status.sites:
         click.echo(site_format_str.format(site))
+
+
+@poker.group("index", short_help="Index hand history headers for fast lookups.")
+def index():
+    """Manage a SQLite index of hand history headers (ident, date, stakes, file location)."""
+
+
+@index.command("build", short_help="Index hand history files.")
+@click.argument("database", type=click.Path(dir_okay=False))
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+def index_build(database, paths):
+    """Index every hand of the hand history files and directories given in PATHS into the
+    SQLite DATABASE. Only the headers are parsed, unchanged files are skipped on rebuilds.
+    """
+    from .index import HandIndex
+
+    with HandIndex(database) as hand_index:
+        stats = hand_index.build(paths)
+        total = len(hand_index)
+
+    _print_header("Hand history index")
+    _print_values(
+        ("Indexed files", stats.files),
+        ("Skipped files", stats.skipped),
+        ("Indexed hands", stats.hands),
+        ("Header errors", stats.errors),
+        ("Total hands", total),
+    )
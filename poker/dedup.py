@@ -0,0 +1,206 @@
+"""
+    Drop hands seen before, e.g. in overlapping exports, before the expensive parsing.
+"""
+
+import os
+import math
+import array
+import bisect
+import struct
+import hashlib
+from pathlib import Path
+import attr
+from . import handhistory
+
+
+__all__ = ["hand_key", "BloomFilter", "HandSet", "DedupStats", "unique"]
+
+
+_BLOOM_HEADER = struct.Struct("<QQ")
+# number of keys and the capacity, in front of the filter in the .bloom file
+_BLOOM_FILE_HEADER = struct.Struct("<QQ")
+_MIN_CAPACITY = 1 << 16
+
+
+def hand_key(room, ident):
+    """64 bit key of a hand, hash of the room and the hand id."""
+    digest = hashlib.blake2b(f"{room.name}:{ident}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class BloomFilter:
+    """Set of 64 bit keys, which can tell for sure that a key was never added.
+
+    :param int capacity:        expected number of keys
+    :param float error_rate:    false positive probability at capacity
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        """Number of bits."""
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        """Number of bits set for one key."""
+        self._bits = bytearray((self.size + 7) // 8)
+
+    # The bit positions are derived from the two halves of the key (double hashing),
+    # the loops are inlined, because lookups of new hands should be cheaper than a binary search.
+
+    def add(self, key):
+        bits, size = self._bits, self.size
+        position, step = key & 0xFFFFFFFF, key >> 32 | 1
+        for _ in range(self.hashes):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+            position += step
+
+    def __contains__(self, key):
+        bits, size = self._bits, self.size
+        position, step = key & 0xFFFFFFFF, key >> 32 | 1
+        for _ in range(self.hashes):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position += step
+        return True
+
+    def to_bytes(self):
+        return _BLOOM_HEADER.pack(self.size, self.hashes) + self._bits
+
+    @classmethod
+    def from_bytes(cls, data):
+        self = cls.__new__(cls)
+        self.size, self.hashes = _BLOOM_HEADER.unpack_from(data)
+        self._bits = bytearray(data[_BLOOM_HEADER.size:])
+        if len(self._bits) != (self.size + 7) // 8:
+            raise ValueError("Truncated Bloom filter")
+        return self
+
+
+class HandSet:
+    """Persistent set of hand keys, see :func:`hand_key`.
+
+    The keys are saved as a sorted array of unsigned 64 bit ints (8 bytes per hand) and
+    looked up with binary search. A :class:`BloomFilter` in front of it answers most lookups of
+    new hands without searching, it is saved next to the keys with a ``.bloom`` suffix, so it
+    doesn't have to be built again every time the set is loaded.
+
+    :param path:    file of the sorted keys or None for a set in memory only.
+                    The files are written by :meth:`save`.
+    :param float error_rate:    false positive probability of the Bloom filter
+    """
+
+    def __init__(self, path=None, error_rate=0.01):
+        self.path = Path(path) if path is not None else None
+        self._keys = array.array("Q")
+        self._new = set()
+        self._error_rate = error_rate
+        self._bloom = None
+        if self.path is not None and self.path.exists():
+            self._keys.frombytes(self.path.read_bytes())
+            self._bloom = self._load_bloom()
+        if self._bloom is None:
+            self._make_bloom()
+
+    @property
+    def _bloom_path(self):
+        return self.path.with_name(self.path.name + ".bloom")
+
+    def _load_bloom(self):
+        try:
+            data = self._bloom_path.read_bytes()
+            count, capacity = _BLOOM_FILE_HEADER.unpack_from(data)
+            bloom = BloomFilter.from_bytes(data[_BLOOM_FILE_HEADER.size:])
+        except (OSError, ValueError, struct.error):
+            return None
+        # the filter is stale if the keys were saved without it
+        if count != len(self._keys):
+            return None
+        # the capacity the filter was sized for, not the one a new filter would get
+        self._capacity = capacity
+        return bloom
+
+    def _make_bloom(self):
+        # room for as many new keys as there are already, rebuilt on save when it gets full
+        self._capacity = max(2 * len(self._keys), _MIN_CAPACITY)
+        self._bloom = BloomFilter(self._capacity, self._error_rate)
+        for key in self._keys:
+            self._bloom.add(key)
+
+    def __len__(self):
+        return len(self._keys) + len(self._new)
+
+    def __contains__(self, key):
+        if key not in self._bloom:
+            return False
+        if key in self._new:
+            return True
+        keys = self._keys
+        ind = bisect.bisect_left(keys, key)
+        return ind < len(keys) and keys[ind] == key
+
+    def add(self, key):
+        """Add a key, return False if it was already in the set."""
+        if key in self:
+            return False
+        self._new.add(key)
+        self._bloom.add(key)
+        return True
+
+    def save(self):
+        """Merge the new keys in the sorted array and write it and the Bloom filter to files."""
+        if self._new:
+            self._keys = array.array("Q", sorted([*self._keys, *self._new]))
+            self._new = set()
+            if len(self._keys) > self._capacity:
+                self._make_bloom()
+        if self.path is None:
+            return
+        _write_atomic(self.path, self._keys.tobytes())
+        header = _BLOOM_FILE_HEADER.pack(len(self._keys), self._capacity)
+        _write_atomic(self._bloom_path, header + self._bloom.to_bytes())
+
+
+def _write_atomic(path, data):
+    # write the whole file first, so a crash never leaves a half written file
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+@attr.s(slots=True)
+class DedupStats:
+    """Counters of :func:`unique`."""
+
+    hands = attr.ib(default=0)
+    """Every hand seen."""
+    duplicates = attr.ib(default=0)
+    """Hands which were dropped."""
+    errors = attr.ib(default=0)
+    """Hands with unparsable headers, which were dropped."""
+
+
+def unique(hands, seen, stats=None):
+    """Yield the hands not in ``seen`` yet and add them to it.
+
+    Only :meth:`parse_header` is called on the hands to get the hand id, so duplicates are
+    dropped before :meth:`parse`. Call :meth:`HandSet.save` after the hands are processed.
+
+    :param hands:   unparsed hand histories, e.g. from :func:`poker.handhistory.open`
+    :param HandSet seen:  keys of the hands processed before
+    :param DedupStats stats:  updated with the counters if given
+    """
+    stats = stats if stats is not None else DedupStats()
+    rooms = handhistory._parser_rooms()
+    for hand in hands:
+        stats.hands += 1
+        try:
+            if not hand.header_parsed:
+                hand.parse_header()
+        except Exception:
+            stats.errors += 1
+            continue
+        if seen.add(hand_key(rooms[type(hand)], hand.ident)):
+            yield hand
+        else:
+            stats.duplicates += 1
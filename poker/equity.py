@@ -0,0 +1,306 @@
+"""
+    Equity calculation helpers.
+"""
+
+import pickle
+import sqlite3
+import itertools
+from collections import OrderedDict, namedtuple
+import attr
+from . import _lookup
+from .hand import Hand, Combo, Range
+
+
+__all__ = ["EquityCache", "canonical_key", "Outs", "outs"]
+
+
+CacheInfo = namedtuple("CacheInfo", "hits disk_hits misses maxsize currsize")
+
+
+def _combo_ids(obj):
+    if isinstance(obj, Combo):
+        return (_lookup.combo_id(obj),)
+    elif isinstance(obj, Hand):
+        combos = obj.to_combos()
+    elif isinstance(obj, Range):
+        combos = obj._all_combos
+    elif isinstance(obj, str):
+        combos = Range(obj)._all_combos
+    else:
+        combos = (Combo(combo) for combo in obj)
+    return tuple(_lookup.combo_id(combo) for combo in combos)
+
+
+def _mask(combo_map, combo_ids):
+    mask = 0
+    for combo in combo_ids:
+        mask |= 1 << combo_map[combo]
+    return mask
+
+
+def canonical_key(first, second, board=()):
+    """Make a cache key from two ranges and a board, which is the same for every suit permuted
+    version of the same spot. E.g. ``AhKh`` vs ``QQ`` on ``2c7d9s`` and ``AsKs`` vs ``QQ``
+    on ``2h7c9d`` share one key.
+
+    Ranges can be :class:`Range`, :class:`Hand`, :class:`Combo` instances, range strings or
+    iterables of Combos. The board is an iterable of Cards or a str like ``"2c7d9s"``.
+    The ranges are encoded as 1326 bit masks, the board as card ids, so the order of the
+    board cards does not matter, but the order of the two ranges does.
+    """
+    board_ids, permutations = _lookup.minimal_permutations(_lookup.card_ids(board))
+    first_ids, second_ids = _combo_ids(first), _combo_ids(second)
+
+    best = None
+    for ind in permutations:
+        combo_map = _lookup.COMBO_MAPS[ind]
+        masks = _mask(combo_map, first_ids), _mask(combo_map, second_ids)
+        if best is None or masks < best:
+            best = masks
+
+    board_str = "".join(str(_lookup.CARDS[card]) for card in board_ids)
+    return f"{board_str}|{best[0]:x}|{best[1]:x}"
+
+
+class EquityCache:
+    """Two level cache in front of an equity function.
+
+    The first level is an in-memory LRU of ``maxsize`` entries, the second level is an
+    optional SQLite file, which can be shared between runs and processes.
+    Keys are made by :func:`canonical_key`, so suit isomorphic spots share one entry.
+
+    :param calculate:   ``calculate(first, second, board)`` callable, which is only called on
+                        cache misses with the original arguments. The result have to be
+                        picklable.
+    :param path:        SQLite file path for the persistent level, ``None`` for memory only.
+    :param int maxsize: maximum number of entries kept in memory.
+    """
+
+    _COMMIT_EVERY = 1000
+
+    def __init__(self, calculate, path=None, maxsize=65536):
+        self._calculate = calculate
+        self._maxsize = maxsize
+        self._memory = OrderedDict()
+        self._uncommitted = 0
+        self.hits = self.disk_hits = self.misses = 0
+
+        if path is not None:
+            self._db = sqlite3.connect(str(path))
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS equity (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            self._db.commit()
+        else:
+            self._db = None
+
+    def __call__(self, first, second, board=()):
+        key = canonical_key(first, second, board)
+
+        try:
+            value = self._memory[key]
+        except KeyError:
+            pass
+        else:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return value
+
+        row = self._load(key)
+        if row is not None:
+            self.disk_hits += 1
+            value = pickle.loads(row[0])
+        else:
+            self.misses += 1
+            value = self._calculate(first, second, board)
+            self._save(key, value)
+
+        self._memory[key] = value
+        if len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+        return value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def hit_rate(self):
+        """Ratio of lookups served from either level of the cache."""
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def cache_info(self):
+        """Hit counters in the same spirit as :func:`functools.lru_cache`."""
+        return CacheInfo(
+            self.hits, self.disk_hits, self.misses, self._maxsize, len(self._memory)
+        )
+
+    def clear(self):
+        """Empty the in-memory level and reset the counters. The SQLite file is kept."""
+        self._memory.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def flush(self):
+        """Commit pending writes to the SQLite file."""
+        if self._db is not None and self._uncommitted:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        cursor = self._db.execute("SELECT value FROM equity WHERE key = ?", (key,))
+        return cursor.fetchone()
+
+    def _save(self, key, value):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO equity (key, value) VALUES (?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self._COMMIT_EVERY:
+            self.flush()
+
+
+@attr.s(slots=True, frozen=True)
+class Outs:
+    """Result of :func:`outs`."""
+
+    cards = attr.ib()
+    """Tuple of Cards improving hero to the best hand on the next street."""
+
+    next_card = attr.ib()
+    """Probability of hitting one of the outs with the next card."""
+
+    by_river = attr.ib()
+    """Probability of having the best hand on the river, from the flop with two cards to come."""
+
+
+# maximum number of hands evaluated at once, keeps memory usage of numpy arrays bounded
+_EVALUATION_CHUNK = 200000
+
+
+def _villain_combos(villain, dead):
+    import numpy as np
+    from .evaluation import range_weights
+
+    combo_cards = np.array(_lookup.COMBO_CARDS)
+    weights = range_weights(villain)
+    weights[np.isin(combo_cards, dead).any(axis=1)] = 0
+    live = weights.nonzero()[0]
+    return combo_cards[live], weights[live]
+
+
+def _hero_equities(hero, boards, villain_cards, villain_weights):
+    """Hero's showdown share against the weighted villain combos on every board."""
+    import numpy as np
+    from .evaluation import evaluate
+
+    hero_scores = evaluate(np.hstack([np.broadcast_to(hero, (len(boards), 2)), boards]))
+    equities = np.empty(len(boards))
+    step = max(1, _EVALUATION_CHUNK // max(1, len(villain_cards)))
+    for start in range(0, len(boards), step):
+        chunk = boards[start:start + step]
+        rows, size = len(chunk), len(villain_cards)
+        cards = np.concatenate(
+            [
+                np.broadcast_to(villain_cards, (rows, size, 2)),
+                np.broadcast_to(chunk[:, None, :], (rows, size, chunk.shape[1])),
+            ],
+            axis=2,
+        )
+        scores = evaluate(cards.reshape(rows * size, -1)).reshape(rows, size)
+        blocked = (villain_cards[None, :, :, None] == chunk[:, None, None, :]).any(axis=(2, 3))
+        weights = np.where(blocked, 0.0, villain_weights)
+        hero_chunk = hero_scores[start:start + step, None]
+        won = (weights * (scores < hero_chunk)).sum(axis=1)
+        tied = (weights * (scores == hero_chunk)).sum(axis=1)
+        total = weights.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            equities[start:start + step] = (won + tied / 2) / total
+    return equities
+
+
+def outs(hero, board, villain=None):
+    """Find the cards which improve hero to the best hand on the next street. Needs numpy.
+
+    With a known villain (a :class:`Combo`, :class:`Range` or range str) hero has the best hand
+    when it has more than 50% showdown share against the live villain combos. When hero has the
+    best hand already, there is nothing to improve to and there are no outs, but
+    :attr:`Outs.by_river` is still the probability of staying the best on the river.
+    When villain is unknown, outs are the cards improving hero to a higher
+    :class:`poker.evaluation.MadeHand` category, which is also higher than the board's own.
+
+    :param Combo hero:  hero's hole cards
+    :param board:       flop or turn, see :func:`poker.board.canonical`
+    :rtype: Outs
+    """
+    import numpy as np
+    from .evaluation import evaluate
+
+    hero = Combo(hero)
+    hero_ids = np.array([_lookup.card_id(hero.first), _lookup.card_id(hero.second)])
+    board_ids = _lookup.card_ids(getattr(board, "cards", board))
+    if len(board_ids) not in (3, 4):
+        raise ValueError(f"Outs are only on the flop or turn, not with {len(board_ids)} cards")
+
+    known = list(board_ids) + hero_ids.tolist()
+    if villain is not None:
+        villain_cards, villain_weights = _villain_combos(villain, known)
+        if not len(villain_cards):
+            raise ValueError("Villain has no combos left with hero's cards and the board")
+
+    # a single villain combo is not in the deck either
+    dead = known + (villain_cards[0].tolist() if isinstance(villain, Combo) else [])
+    dead_mask = 0
+    for card in dead:
+        dead_mask |= 1 << card
+    unseen = np.array([card for card in range(52) if not dead_mask >> card & 1])
+
+    current = np.array([board_ids])
+    next_boards = np.hstack(
+        [np.broadcast_to(board_ids, (len(unseen), len(board_ids))), unseen[:, None]]
+    )
+    if len(board_ids) == 3:
+        pairs = np.array(list(itertools.combinations(unseen, 2)))
+        river_boards = np.hstack([np.broadcast_to(board_ids, (len(pairs), 3)), pairs])
+    else:
+        river_boards = next_boards
+
+    if villain is None:
+        def categories(boards, with_hero=True):
+            if with_hero:
+                boards = np.hstack([np.broadcast_to(hero_ids, (len(boards), 2)), boards])
+            return evaluate(boards) >> 26
+
+        def is_best(boards):
+            made = categories(boards)
+            return (made > categories(current)[0]) & (made > categories(boards, with_hero=False))
+
+        best_now = False
+    else:
+        def is_best(boards):
+            return _hero_equities(hero_ids, boards, villain_cards, villain_weights) > 0.5
+
+        best_now = bool(is_best(current)[0])
+
+    if best_now:
+        return Outs(cards=(), next_card=0.0, by_river=float(is_best(river_boards).mean()))
+
+    hits = is_best(next_boards)
+    out_cards = tuple(_lookup.CARDS[card] for card in unseen[hits])
+    next_card = len(out_cards) / len(unseen)
+    by_river = float(is_best(river_boards).mean()) if len(board_ids) == 3 else next_card
+    return Outs(cards=out_cards, next_card=next_card, by_river=by_river)
@@ -0,0 +1,297 @@
+"""
+    Vectorized hand evaluation over the 1326 starting hand combos. Needs numpy.
+"""
+
+from collections.abc import Mapping
+import attr
+import numpy as np
+from ._common import PokerEnum
+from . import _lookup
+from .hand import Hand, Combo, Range
+
+
+__all__ = ["MadeHand", "Draw", "RangeBreakdown", "evaluate", "breakdown", "range_weights"]
+
+
+class MadeHand(PokerEnum):
+    HIGH_CARD = "High card", "high"
+    PAIR = "Pair", "one pair"
+    TWO_PAIR = "Two pair", "two pairs"
+    TRIPS = "Three of a kind", "trips", "set"
+    STRAIGHT = ("Straight",)
+    FLUSH = ("Flush",)
+    FULL_HOUSE = "Full house", "boat"
+    QUADS = "Four of a kind", "quads"
+    STRAIGHT_FLUSH = ("Straight flush",)
+
+
+class Draw(PokerEnum):
+    FLUSH_DRAW = "Flush draw", "FD"
+    OESD = "Open-ended straight draw", "OESD", "double gutshot"
+    GUTSHOT = ("Gutshot",)
+    BACKDOOR_FLUSH_DRAW = "Backdoor flush draw", "BDFD"
+    BACKDOOR_STRAIGHT_DRAW = "Backdoor straight draw", "BDSD"
+
+
+_MADE_HANDS = tuple(MadeHand)
+_DRAWS = tuple(Draw)
+
+# bit layout of scores: category << 26 | primary ranks << 13 | secondary ranks
+_CATEGORY_SHIFT = 26
+_PRIMARY_SHIFT = 13
+
+_COMBO_CARDS = np.array(_lookup.COMBO_CARDS, dtype=np.int64)
+_RANK_BITS = 1 << np.arange(13, dtype=np.int64)
+
+
+def _make_rank_tables():
+    masks = np.arange(8192, dtype=np.int64)
+
+    popcount = np.zeros(8192, dtype=np.int64)
+    highest_bit = np.zeros(8192, dtype=np.int64)
+    for bit in _RANK_BITS:
+        popcount += (masks & bit) != 0
+        highest_bit[masks >= bit] = bit
+
+    def top_bits(count):
+        remaining, result = masks.copy(), np.zeros(8192, dtype=np.int64)
+        for _ in range(count):
+            high = highest_bit[remaining]
+            result |= high
+            remaining &= ~high
+        return result
+
+    # highest rank index of the best straight, wheel (A2345) is 3, -1 means no straight
+    straight_high = np.full(8192, -1, dtype=np.int64)
+    wheel = _RANK_BITS[12] | 0b1111
+    straight_high[(masks & wheel) == wheel] = 3
+    for high in range(4, 13):
+        window = 0b11111 << (high - 4)
+        straight_high[(masks & window) == window] = high
+
+    # ranks completing a straight
+    straight_outs = np.zeros(8192, dtype=np.int64)
+    for bit in _RANK_BITS:
+        completes = ((masks & bit) == 0) & (straight_high[masks | bit] >= 0)
+        straight_outs[completes] |= bit
+
+    # two more ranks are enough for a straight
+    backdoor_straight = np.zeros(8192, dtype=bool)
+    for first in range(13):
+        for second in range(first + 1, 13):
+            backdoor_straight |= straight_high[masks | _RANK_BITS[first] | _RANK_BITS[second]] >= 0
+
+    return (
+        popcount,
+        {count: top_bits(count) for count in (1, 2, 3, 5)},
+        straight_high,
+        straight_outs,
+        backdoor_straight,
+    )
+
+
+_POPCOUNT, _TOP_BITS, _STRAIGHT_HIGH, _STRAIGHT_OUTS, _BACKDOOR_STRAIGHT = _make_rank_tables()
+
+
+def _rank_masks(cards):
+    """Rank mask of all the cards, rank masks per suit and rank counts of (N, k) card ids."""
+    ranks, suits = cards >> 2, cards & 3
+    bits = _RANK_BITS[ranks]
+    rank_mask = np.bitwise_or.reduce(bits, axis=1)
+    suit_masks = np.stack(
+        [np.bitwise_or.reduce(np.where(suits == suit, bits, 0), axis=1) for suit in range(4)],
+        axis=1,
+    )
+    counts = (ranks[:, :, None] == np.arange(13)).sum(axis=1)
+    return rank_mask, suit_masks, counts
+
+
+def _evaluate(cards):
+    rank_mask, suit_masks, counts = _rank_masks(cards)
+
+    def counted(condition):
+        return np.where(condition, _RANK_BITS, 0).sum(axis=1)
+
+    quads, trips, pairs = counted(counts == 4), counted(counts == 3), counted(counts == 2)
+    flush_mask = np.where(_POPCOUNT[suit_masks] >= 5, suit_masks, 0).max(axis=1)
+    flush_high = _STRAIGHT_HIGH[flush_mask]
+    straight_high = _STRAIGHT_HIGH[rank_mask]
+    top1, top2, top3, top5 = _TOP_BITS[1], _TOP_BITS[2], _TOP_BITS[3], _TOP_BITS[5]
+    top_trips, top_pairs = top1[trips], top2[pairs]
+
+    # the order of the conditions is from the strongest to the weakest
+    conditions = [
+        flush_high >= 0,
+        quads != 0,
+        (trips != 0) & ((_POPCOUNT[trips] >= 2) | (pairs != 0)),
+        flush_mask != 0,
+        straight_high >= 0,
+        trips != 0,
+        _POPCOUNT[pairs] >= 2,
+        pairs != 0,
+    ]
+    categories = np.select(conditions, [8, 7, 6, 5, 4, 3, 2, 1], default=0)
+    primary = np.select(
+        conditions,
+        [
+            _RANK_BITS[np.maximum(flush_high, 0)],
+            quads,
+            top_trips,
+            top5[flush_mask],
+            _RANK_BITS[np.maximum(straight_high, 0)],
+            trips,
+            top_pairs,
+            pairs,
+        ],
+        default=top5[rank_mask],
+    )
+    secondary = np.select(
+        conditions,
+        [
+            0,
+            top1[rank_mask & ~quads],
+            top1[(trips & ~top_trips) | pairs],
+            0,
+            0,
+            top2[rank_mask & ~trips],
+            top1[rank_mask & ~top_pairs],
+            top3[rank_mask & ~pairs],
+        ],
+        default=0,
+    )
+    return (categories << _CATEGORY_SHIFT) | (primary << _PRIMARY_SHIFT) | secondary
+
+
+def evaluate(cards):
+    """Evaluate hands given as an ``(N, k)`` array of card ids (see :mod:`poker._lookup`),
+    where k is between 1 and 7.
+
+    Returns an array of scores, where bigger score means better hand,
+    ``score >> 26`` is the index of the :class:`MadeHand` category.
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim == 1:
+        cards = cards[None, :]
+    return _evaluate(cards)
+
+
+@attr.s(slots=True, frozen=True)
+class RangeBreakdown:
+    """Made hand and draw breakdown of a range on a board, see :func:`breakdown`.
+
+    Every array is indexed by combo id (see :mod:`poker._lookup`).
+    """
+
+    made_hands = attr.ib()
+    """int8 array of :class:`MadeHand` indexes, -1 for combos not in the range."""
+
+    draws = attr.ib()
+    """uint8 array of draw flags, bit ``1 << index`` is set for the :class:`Draw` with that index."""
+
+    weights = attr.ib()
+    """float64 array of combo weights, 0 for combos not in the range or blocked by the board."""
+
+    def category(self, combo):
+        """:class:`MadeHand` of the combo or None if it's not in the range."""
+        index = self.made_hands[_lookup.combo_id(Combo(combo))]
+        return _MADE_HANDS[index] if index >= 0 else None
+
+    def to_dict(self):
+        """Weighted number of combos for every :class:`MadeHand` and :class:`Draw`."""
+        made_counts = np.bincount(
+            self.made_hands[self.made_hands >= 0],
+            weights=self.weights[self.made_hands >= 0],
+            minlength=len(_MADE_HANDS),
+        )
+        result = {made_hand: float(made_counts[ind]) for ind, made_hand in enumerate(_MADE_HANDS)}
+        for ind, draw in enumerate(_DRAWS):
+            result[draw] = float(self.weights[(self.draws & (1 << ind)) != 0].sum())
+        return result
+
+
+def range_weights(range):
+    """Weight of every combo of a range in an array of length 1326 indexed by combo id.
+
+    :param range:   :class:`Range`, range str, :class:`Hand`, :class:`Combo`,
+                    ``{Combo: weight}`` mapping or a weight array, which is copied.
+    """
+    weights = np.zeros(len(_COMBO_CARDS), dtype=np.float64)
+    if isinstance(range, np.ndarray):
+        weights[:] = range
+    elif isinstance(range, Mapping):
+        for combo, weight in range.items():
+            weights[_lookup.combo_id(Combo(combo))] = weight
+    else:
+        if isinstance(range, Combo):
+            combos = (range,)
+        elif isinstance(range, Hand):
+            combos = range.to_combos()
+        elif isinstance(range, str):
+            combos = Range(range)._all_combos
+        else:
+            combos = range._all_combos
+        for combo in combos:
+            weights[_lookup.combo_id(combo)] = 1
+    return weights
+
+
+def breakdown(range, board):
+    """Break down a range to made hands and draws on the given board.
+
+    All the 1326 combos are evaluated at once with precomputed rank tables.
+    Draws are only counted when they could improve the made hand and the hole cards take part
+    in them, backdoor draws only on the flop.
+
+    :param range:   :class:`Range`, range str, ``{Combo: weight}`` mapping or a weight array
+                    of length 1326 indexed by combo id.
+    :param board:   3, 4 or 5 cards, see :func:`poker.board.canonical`.
+    :rtype: RangeBreakdown
+    """
+    board_ids = np.array(_lookup.card_ids(getattr(board, "cards", board)), dtype=np.int64)
+    if not 3 <= len(board_ids) <= 5:
+        raise ValueError(f"A board should have 3, 4 or 5 cards, not {len(board_ids)}")
+
+    weights = range_weights(range)
+    blocked = np.isin(_COMBO_CARDS, board_ids).any(axis=1)
+    weights[blocked] = 0
+    in_range = weights > 0
+
+    cards = np.hstack([_COMBO_CARDS, np.broadcast_to(board_ids, (len(_COMBO_CARDS), len(board_ids)))])
+    categories = _evaluate(cards) >> _CATEGORY_SHIFT
+    made_hands = np.where(in_range, categories, -1).astype(np.int8)
+
+    draws = np.zeros(len(_COMBO_CARDS), dtype=np.uint8)
+    if len(board_ids) < 5:
+        rank_mask, suit_masks, _ = _rank_masks(cards)
+        board_mask = np.bitwise_or.reduce(_RANK_BITS[board_ids >> 2])
+        suit_counts = _POPCOUNT[suit_masks]
+        hole_suits = _COMBO_CARDS & 3
+        has_hole_suit = (hole_suits[:, :, None] == np.arange(4)).any(axis=1)
+
+        flush_draw = ((suit_counts == 4) & has_hole_suit).any(axis=1) & (categories < 5)
+        outs = _POPCOUNT[_STRAIGHT_OUTS[rank_mask] & ~_STRAIGHT_OUTS[board_mask]]
+        straight_possible = categories < 4
+        oesd = (outs >= 2) & straight_possible
+        gutshot = (outs == 1) & straight_possible
+        draws |= np.where(flush_draw, 1 << _DRAWS.index(Draw.FLUSH_DRAW), 0).astype(np.uint8)
+        draws |= np.where(oesd, 1 << _DRAWS.index(Draw.OESD), 0).astype(np.uint8)
+        draws |= np.where(gutshot, 1 << _DRAWS.index(Draw.GUTSHOT), 0).astype(np.uint8)
+
+        if len(board_ids) == 3:
+            backdoor_flush = ((suit_counts == 3) & has_hole_suit).any(axis=1) & (categories < 5)
+            backdoor_straight = (
+                _BACKDOOR_STRAIGHT[rank_mask]
+                & ~_BACKDOOR_STRAIGHT[board_mask]
+                & ~oesd
+                & ~gutshot
+                & straight_possible
+            )
+            draws |= np.where(
+                backdoor_flush, 1 << _DRAWS.index(Draw.BACKDOOR_FLUSH_DRAW), 0
+            ).astype(np.uint8)
+            draws |= np.where(
+                backdoor_straight, 1 << _DRAWS.index(Draw.BACKDOOR_STRAIGHT_DRAW), 0
+            ).astype(np.uint8)
+
+    draws[~in_range] = 0
+    return RangeBreakdown(made_hands, draws, weights)
@@ -3,13 +3,23 @@
 """
 
 import io
-import itertools
-from datetime import datetime
+import os
+import re
+import mmap
+import time
+import codecs
+import functools
+import importlib
+from collections import deque
+from concurrent import futures
+from decimal import Decimal
+from datetime import datetime, timedelta
 import attr
 import pytz
 from zope.interface import Interface, Attribute
 from cached_property import cached_property
-from .card import Rank
+from . import board
+from .constants import PokerRoom, GameType
 
 
 @attr.s(slots=True)
@@ -44,6 +54,9 @@ class IHandHistory(Interface):
     """
 
     # parsing information
+    integer_amounts = Attribute(
+        "Amounts are ints in the smallest unit (cents or chips) instead of Decimals."
+    )
     header_parsed = Attribute("Shows wheter header is parsed already or not.")
     parsed = Attribute("Shows wheter the whole hand history is parsed already or not.")
     date = Attribute("Date of the hand history.")
@@ -62,6 +75,9 @@ class IHandHistory(Interface):
     hero = Attribute("_Player instance with hero data.")
     button = Attribute("_Player instance of button.")
     winners = Attribute("Tuple of _Player instances with winners.")
+    earnings = Attribute("Net result of hero in the hand.")
+    results = Attribute("Dict of the net result of every seated player by name, antes included.")
+    rake_shares = Attribute("Dict of the rake paid by the winners, in proportion to the winnings.")
 
     # Game informations
     game_type = Attribute("GameType enum value (CASH, TOUR or SNG)")
@@ -73,7 +89,8 @@ class IHandHistory(Interface):
     limit = Attribute("Limit enum value (NL, PL or FL)")
     ident = Attribute("Unique id of the hand history.")
     currency = Attribute("Currency of the hand history.")
-    total_pot = Attribute("Total pot Decimal.")
+    total_pot = Attribute("Total pot Decimal or int with integer_amounts.")
+    pot_rake = Attribute("Rake taken from the pot, included in total_pot.")
 
     tournament_ident = Attribute("Unique tournament id.")
     tournament_name = Attribute("Name of the tournament.")
@@ -97,47 +114,40 @@ class _BaseStreet:
         self.cards = None
         if flop[0]:
             self._parse_cards(flop[0])
-            if self.cards is not None:
-                self._all_combinations = itertools.combinations(self.cards, 2)
         self._parse_actions(flop[1:])
 
     @cached_property
+    def texture(self):
+        """:class:`poker.board.Texture` flags of the cards, None if there are no cards."""
+        return board.texture(self.cards) if self.cards is not None else None
+
+    @property
     def is_rainbow(self):
-        return all(
-            first.suit != second.suit for first, second in self._all_combinations
-        )
+        return self._has_texture(board.Texture.RAINBOW)
 
-    @cached_property
+    @property
     def is_monotone(self):
-        return all(
-            first.suit == second.suit for first, second in self._all_combinations
-        )
+        return self._has_texture(board.Texture.MONOTONE)
 
-    @cached_property
+    @property
     def is_triplet(self):
-        return all(
-            first.rank == second.rank for first, second in self._all_combinations
-        )
+        return self._has_texture(board.Texture.TRIPLET)
 
-    @cached_property
+    @property
     def has_pair(self):
-        return any(
-            first.rank == second.rank for first, second in self._all_combinations
-        )
+        return self._has_texture(board.Texture.PAIR)
 
-    @cached_property
+    @property
     def has_straightdraw(self):
-        return any(1 <= diff <= 3 for diff in self._get_differences())
+        return self._has_texture(board.Texture.STRAIGHTDRAW)
 
-    @cached_property
+    @property
     def has_gutshot(self):
-        return any(1 <= diff <= 4 for diff in self._get_differences())
+        return self._has_texture(board.Texture.GUTSHOT)
 
-    @cached_property
+    @property
     def has_flushdraw(self):
-        return any(
-            first.suit == second.suit for first, second in self._all_combinations
-        )
+        return self._has_texture(board.Texture.FLUSHDRAW)
 
     @cached_property
     def players(self):
@@ -150,26 +160,47 @@ class _BaseStreet:
                 player_names.append(player_name)
         return tuple(player_names)
 
-    def _get_differences(self):
-        return (
-            Rank.difference(first.rank, second.rank)
-            for first, second in self._all_combinations
-        )
+    def _has_texture(self, flag):
+        return self.texture is not None and flag in self.texture
 
 
 class _BaseHandHistory:
     """Abstract base class for *all* kinds of parser."""
 
-    def __init__(self, hand_text):
-        """Save raw hand history."""
+    def __init__(self, hand_text, integer_amounts=False):
+        """Save raw hand history, bytes-like objects are decoded from UTF-8.
+
+        With ``integer_amounts=True`` stacks, blinds, bets, pots, rake and buyin are parsed to
+        ints in the smallest unit instead of Decimals: cents of real money and chips of
+        tournaments and play money. Buyins are always in cents.
+        """
+        if not isinstance(hand_text, str):
+            hand_text = self._bytes_text(hand_text)
         self.raw = hand_text.strip()
+        self.integer_amounts = integer_amounts
         self.header_parsed = False
         self.parsed = False
 
+    def _bytes_text(self, data):
+        """Text of a hand given as a bytes-like object."""
+        return _decode_hand([data])
+
     @classmethod
-    def from_file(cls, filename):
+    def from_file(cls, filename, integer_amounts=False):
         with io.open(filename, "rt", encoding="utf-8-sig") as f:
-            return cls(f.read())
+            return cls(f.read(), integer_amounts)
+
+    @classmethod
+    def iter_hands(cls, source, integer_amounts=False):
+        """Split a file with many hands and yield an unparsed instance for every hand.
+
+        The file is read line by line, only the lines of the current hand are kept in memory,
+        so files of any size can be processed.
+
+        :param source:  path or a file object opened in binary or text mode.
+        """
+        for _, _, hand_text in _split_hands(source, cls._HAND_START):
+            yield cls(hand_text, integer_amounts)
 
     def __str__(self):
         return f"<{self.__class__.__name__}: #{self.ident}>"
@@ -191,6 +222,20 @@ class _BaseHandHistory:
         date = datetime.strptime(date_string.strip(), self._DATE_FORMAT)
         self.date = self._TZ.localize(date).astimezone(pytz.UTC)
 
+    def _set_date(self, year, month, day, hour, minute, second):
+        """Set the date from the local time of the room, for fast room specific date parsers."""
+        self.date = _local_to_utc(self._TZ, year, month, day, hour, minute, second)
+
+    def _amount_parser(self, money):
+        """Converter of amount strings with an optional currency symbol in front.
+
+        :param bool money:  the amounts are real money, not chips
+        """
+        if not self.integer_amounts:
+            return _decimal
+        # chips are always whole numbers without a currency symbol
+        return _cents if money else int
+
     def _init_seats(self, player_num):
         players = []
         for seat in range(1, player_num + 1):
@@ -206,6 +251,129 @@ class _BaseHandHistory:
         return self.players[hero_index], hero_index
 
 
+# (zone, year, month, day) -> UTC offset of the whole local day, None when it changes that day
+_day_offsets = {}
+
+
+def _day_offset(tz, year, month, day):
+    start = datetime(year, month, day)
+    offset = tz.utcoffset(start)
+    return offset if tz.utcoffset(start + timedelta(days=1)) == offset else None
+
+
+def _local_to_utc(tz, year, month, day, hour, minute, second):
+    """Same as ``tz.localize(datetime(...)).astimezone(pytz.UTC)``, but the offset is looked up
+    only once per local day. On daylight saving time transition days :meth:`localize` is used.
+    """
+    key = tz.zone, year, month, day
+    try:
+        offset = _day_offsets[key]
+    except KeyError:
+        offset = _day_offsets[key] = _day_offset(tz, year, month, day)
+    local = datetime(year, month, day, hour, minute, second)
+    if offset is None:
+        return tz.localize(local).astimezone(pytz.UTC)
+    return (local - offset).replace(tzinfo=pytz.UTC)
+
+
+def _decimal(amount):
+    """Amount with an optional currency symbol in front."""
+    return Decimal(amount if amount[0].isdigit() else amount[1:])
+
+
+def _cents(amount):
+    """Amount of money with an optional currency symbol in front as int of cents,
+    e.g. ``"$1.5"`` is 150.
+    """
+    if not amount[0].isdigit():
+        amount = amount[1:]
+    whole, _, fraction = amount.partition(".")
+    if len(fraction) > 2:
+        raise ValueError(f"Amount {amount!r} has fractions of a cent")
+    # concatenating the digits is cheaper than Decimal arithmetic
+    return int(whole + fraction.ljust(2, "0"))
+
+
+def _split_hands(source, hand_start, start=0, end=None):
+    """Yield ``(offset, length, data)`` of every hand from a file, where hands start with a line
+    beginning with one of the hand_start bytes prefixes. Anything before the first hand is
+    skipped. The length in bytes includes the blank lines after the hand. The data is the
+    undecoded bytes of the hand without the BOM, the parsers decode it.
+
+    With start and end, only the hands starting in the ``[start, end)`` byte range are yielded,
+    so a big file can be split in ranges without knowing where the hands are.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with io.open(source, "rb") as f:
+            yield from _split_mapped_hands(f, hand_start, start, end)
+        return
+
+    offset = 0
+    if start:
+        # continue from the first full line at or after start
+        source.seek(start - 1)
+        offset = start - 1 + len(source.readline())
+
+    lines, hand_offset = [], None
+    for line in source:
+        line_offset = offset
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        offset += len(line)
+        # concatenated exports can have a BOM in the middle of the file too
+        if line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        if line.startswith(hand_start):
+            if lines:
+                yield hand_offset, line_offset - hand_offset, b"".join(lines)
+            if end is not None and line_offset >= end:
+                return
+            lines, hand_offset = [line], line_offset
+        elif lines:
+            lines.append(line)
+    if lines:
+        yield hand_offset, offset - hand_offset, b"".join(lines)
+
+
+def _split_mapped_hands(f, hand_start, start, end):
+    """Same as :func:`_split_hands` for real files, but the file is memory mapped and the hand
+    starts are searched by one regex in the whole map, so no line objects are made, only one
+    bytes object for every hand.
+    """
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty files can't be mapped
+        return
+
+    matches = _hand_start_re(hand_start).finditer(mapped, start)
+    try:
+        match = next(matches, None)
+        while match is not None and (end is None or match.start() < end):
+            hand_offset = match.start()
+            # the hand starts are ASCII, a first byte of 0xEF is the BOM
+            text_start = hand_offset + (3 if mapped[hand_offset] == 0xEF else 0)
+            match = next(matches, None)
+            stop = match.start() if match is not None else len(mapped)
+            yield hand_offset, stop - hand_offset, mapped[text_start:stop]
+    finally:
+        # the regex scanner holds the buffer of the map, it can't be closed before
+        del matches, match
+        mapped.close()
+
+
+@functools.lru_cache(maxsize=None)
+def _hand_start_re(hand_start):
+    prefixes = hand_start if isinstance(hand_start, tuple) else (hand_start,)
+    alternatives = b"|".join(re.escape(prefix) for prefix in prefixes)
+    return re.compile(b"^(?:" + codecs.BOM_UTF8 + b")?(?:" + alternatives + b")", re.MULTILINE)
+
+
+def _decode_hand(chunks):
+    """Decode a hand from bytes-like chunks."""
+    return b"".join(chunks).replace(b"\r\n", b"\n").decode("utf-8-sig")
+
+
 class _SplittableHandHistoryMixin:
     """Class for PokerStars and FullTiltPoker type hand histories, where you can split the hand
     history into sections.
@@ -217,6 +385,320 @@ class _SplittableHandHistoryMixin:
         self._splitted = self._split_re.split(self.raw)
         # search split locations (basically empty strings)
         self._sections = [ind for ind, elem in enumerate(self._splitted) if not elem]
+        self._find_markers()
+
+    def _find_markers(self):
+        """Map section names to the ``(name index, stop index)`` of their lines.
+
+        Section names are right after the split locations, every section lasts until the next
+        one, so the parsing stages can slice the lines without searching them again.
+        """
+        self._markers = {}
+        sections = self._sections
+        for start, stop in zip(sections, sections[1:] + [len(self._splitted)]):
+            if start + 1 < stop:
+                self._markers.setdefault(self._splitted[start + 1], (start + 1, stop))
 
     def _del_split_vars(self):
-        del self._splitted, self._sections
+        del self._splitted, self._sections, self._markers
+
+
+# parser classes of rooms, as "module:class" strings until they are first needed,
+# so the room modules are only imported when used
+_PARSERS = {
+    PokerRoom.STARS: "poker.room.pokerstars:PokerStarsHandHistory",
+    PokerRoom.FTP: "poker.room.fulltiltpoker:FullTiltPokerHandHistory",
+    PokerRoom.PKR: "poker.room.pkr:PKRHandHistory",
+}
+
+# number of bytes read from the beginning of files for detecting the room
+_SNIFF_SIZE = 4096
+
+
+def register(room, parser):
+    """Register a hand history parser class for a room.
+
+    :param PokerRoom room:  the room
+    :param parser:          parser class or a ``"module:class"`` string to import lazily.
+                            It needs a ``_HAND_START`` attribute with the bytes prefix (or tuple
+                            of prefixes) of the first line of a hand.
+    """
+    _PARSERS[PokerRoom(room)] = parser
+
+
+def get_parser(room):
+    """Parser class registered for the room. Raises KeyError for unknown rooms."""
+    room = PokerRoom(room)
+    parser = _PARSERS[room]
+    if isinstance(parser, str):
+        module_name, _, class_name = parser.partition(":")
+        parser = _PARSERS[room] = getattr(importlib.import_module(module_name), class_name)
+    return parser
+
+
+def _parser_rooms():
+    """Room of every registered parser class."""
+    return {get_parser(room): room for room in list(_PARSERS)}
+
+
+def _buyin_rake(hand):
+    """Tournament fee of a hand, the ``rake`` attribute of cash hands is the pot rake in some
+    rooms.
+    """
+    if getattr(hand, "game_type", None) in (None, GameType.CASH):
+        return None
+    return getattr(hand, "rake", None)
+
+
+def detect_room(first_bytes):
+    """Detect the room from the beginning of a hand history.
+
+    Only the first non-empty line is compared to the hand start markers of the registered
+    parsers, the header itself is not parsed.
+
+    :param bytes first_bytes:   beginning of a hand history file, str is also accepted.
+    :return: :class:`PokerRoom` or None if no registered room matches.
+    """
+    if isinstance(first_bytes, str):
+        first_bytes = first_bytes.encode("utf-8")
+    first_line = first_bytes.replace(codecs.BOM_UTF8, b"").lstrip()
+    for room in list(_PARSERS):
+        if first_line.startswith(get_parser(room)._HAND_START):
+            return room
+    return None
+
+
+def open(path):
+    """Detect the room of a hand history file and stream its hands with the right parser.
+
+    :return: iterator of unparsed hand histories, see :meth:`_BaseHandHistory.iter_hands`.
+    :raises ValueError: when the room can't be detected.
+    """
+    with io.open(path, "rb") as f:
+        first_bytes = f.read(_SNIFF_SIZE)
+    room = detect_room(first_bytes)
+    if room is None:
+        raise ValueError(f"Unknown hand history format: {path}")
+    return get_parser(room).iter_hands(path)
+
+
+@attr.s(slots=True, frozen=True)
+class HandRecord:
+    """Parsed hand history data with plain values only, which is cheap to send between
+    processes, see :func:`parse_many`. Attributes missing from a room's hand histories are None.
+    """
+
+    room = attr.ib()
+    ident = attr.ib()
+    date = attr.ib()
+    game_type = attr.ib()
+    game = attr.ib()
+    limit = attr.ib()
+    sb = attr.ib()
+    bb = attr.ib()
+    buyin = attr.ib()
+    rake = attr.ib()
+    currency = attr.ib()
+    tournament_ident = attr.ib()
+    table_name = attr.ib()
+    max_players = attr.ib()
+    button = attr.ib()
+    """Seat number of the button."""
+    hero = attr.ib()
+    """Name of hero."""
+    hero_combo = attr.ib()
+    """Hero's hole cards as a str like ``"AhKd"``."""
+    players = attr.ib()
+    """Tuple of ``(seat, name, stack)`` tuples of the seated players."""
+    board = attr.ib()
+    """Board cards as a str like ``"Ah7h2c"``."""
+    total_pot = attr.ib()
+    winners = attr.ib()
+    """Tuple of winner names."""
+    path = attr.ib()
+    offset = attr.ib()
+    """Byte offset of the hand in the file."""
+
+    @classmethod
+    def from_hand_history(cls, room, hand_history, path=None, offset=None):
+        def get(name):
+            return getattr(hand_history, name, None)
+
+        button, hero, board = get("button"), get("hero"), get("board")
+        players = get("players") or ()
+        return cls(
+            room=room,
+            ident=get("ident"),
+            date=get("date"),
+            game_type=get("game_type"),
+            game=get("game"),
+            limit=get("limit"),
+            sb=get("sb"),
+            bb=get("bb"),
+            buyin=get("buyin"),
+            rake=get("rake"),
+            currency=get("currency"),
+            tournament_ident=get("tournament_ident"),
+            table_name=get("table_name"),
+            max_players=get("max_players"),
+            button=button.seat if button is not None else None,
+            hero=hero.name if hero is not None else None,
+            hero_combo=str(hero.combo) if hero is not None and hero.combo else None,
+            # empty seats have 0 stack
+            players=tuple((p.seat, p.name, p.stack) for p in players if p.stack),
+            board="".join(str(card) for card in board) if board else None,
+            total_pot=get("total_pot"),
+            winners=tuple(get("winners") or ()),
+            path=path,
+            offset=offset,
+        )
+
+
+@attr.s(slots=True, frozen=True)
+class ParseError:
+    """A hand or file which could not be parsed by :func:`parse_many`."""
+
+    path = attr.ib()
+    offset = attr.ib()
+    """Byte offset of the hand in the file, None if the whole file failed."""
+    error = attr.ib()
+    """repr() of the exception."""
+
+
+@attr.s(slots=True)
+class WorkerStats:
+    """Throughput of one worker process of :func:`parse_many`."""
+
+    hands = attr.ib(default=0)
+    errors = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+    """Time spent parsing."""
+
+    @property
+    def hands_per_second(self):
+        return self.hands / self.seconds if self.seconds else 0.0
+
+
+def file_ranges(paths, chunksize, errors=None):
+    """Split hand history files to byte ranges, which can be parsed separately.
+
+    Every hand belongs to the range where it starts, read them with :func:`range_hands`.
+    The room of every file is detected by :func:`detect_room`.
+
+    :param paths:           iterable of file paths
+    :param int chunksize:   maximum number of bytes in one range
+    :param list errors:     :class:`ParseError` of unreadable files and files of unknown rooms
+                            are appended to it if given, they are skipped anyway
+    :return: iterator of ``(path, room, start, end)`` tuples
+    """
+    for path in paths:
+        path = os.fspath(path)
+        try:
+            with io.open(path, "rb") as f:
+                room = detect_room(f.read(_SNIFF_SIZE))
+            size = os.path.getsize(path)
+        except OSError as e:
+            if errors is not None:
+                errors.append(ParseError(path, None, repr(e)))
+            continue
+        if room is None:
+            if errors is not None:
+                errors.append(ParseError(path, None, "Unknown hand history format"))
+            continue
+        for start in range(0, size, chunksize):
+            yield path, room, start, start + chunksize
+
+
+def range_hands(path, room, start, end, integer_amounts=False):
+    """Yield ``(offset, hand_history)`` for every unparsed hand starting in a byte range
+    of a file, e.g. a range of :func:`file_ranges`.
+    """
+    parser = get_parser(room)
+    for offset, _, hand_text in _split_hands(path, parser._HAND_START, start, end):
+        yield offset, parser(hand_text, integer_amounts)
+
+
+def _parse_range(path, room, start, end):
+    """Parse hands starting in the byte range of a file in a worker process."""
+    started = time.perf_counter()
+    records, errors = [], []
+    for offset, hand_history in range_hands(path, room, start, end):
+        try:
+            hand_history.parse()
+        except Exception as e:
+            errors.append(ParseError(path, offset, repr(e)))
+        else:
+            records.append(HandRecord.from_hand_history(room, hand_history, path, offset))
+    return os.getpid(), time.perf_counter() - started, records, errors
+
+
+class BulkParse:
+    """Iterator of :class:`HandRecord` returned by :func:`parse_many`.
+
+    The statistics are updated while iterating, so they are complete after the iteration.
+
+    :ivar dict workers:     ``{pid: WorkerStats}`` for every worker process
+    :ivar list errors:      :class:`ParseError` list of hands and files which failed
+    """
+
+    def __init__(self, paths, workers, chunksize, ordered):
+        self.workers = {}
+        self.errors = []
+        self._paths = paths
+        self._max_workers = workers
+        self._chunksize = chunksize
+        self._ordered = ordered
+
+    @property
+    def hands(self):
+        """Number of successfully parsed hands so far."""
+        return sum(stats.hands for stats in self.workers.values())
+
+    def __iter__(self):
+        max_workers = self._max_workers or os.cpu_count() or 1
+        # only keep a few tasks ahead, so results don't pile up in memory
+        window = 2 * max_workers
+        with futures.ProcessPoolExecutor(max_workers) as executor:
+            pending = deque()
+            for task in self._tasks():
+                pending.append(executor.submit(_parse_range, *task))
+                if len(pending) >= window:
+                    yield from self._collect(pending)
+            while pending:
+                yield from self._collect(pending)
+
+    def _tasks(self):
+        return file_ranges(self._paths, self._chunksize, self.errors)
+
+    def _collect(self, pending):
+        if self._ordered:
+            future = pending.popleft()
+        else:
+            done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            future = next(iter(done))
+            pending.remove(future)
+
+        pid, seconds, records, errors = future.result()
+        stats = self.workers.setdefault(pid, WorkerStats())
+        stats.hands += len(records)
+        stats.errors += len(errors)
+        stats.seconds += seconds
+        self.errors.extend(errors)
+        return records
+
+
+def parse_many(paths, workers=None, chunksize=16 * 1024 * 1024, ordered=False):
+    """Parse hand history files in parallel with a process pool.
+
+    Files are split to byte ranges of ``chunksize``, so big files are shared between workers
+    too. The room of every file is detected by :func:`detect_room`, workers run ``parse()`` on
+    every hand and send back :class:`HandRecord` instances instead of the parser objects.
+    Hands failing to parse don't stop the processing, they are collected in ``errors``.
+
+    :param paths:           iterable of file paths
+    :param int workers:     number of worker processes, defaults to the number of CPUs
+    :param int chunksize:   maximum number of bytes parsed by one task
+    :param bool ordered:    yield hands in file order instead of as soon as they are parsed
+    :rtype: BulkParse
+    """
+    return BulkParse(paths, workers, chunksize, ordered)
@@ -0,0 +1,251 @@
+"""
+    SQLite index of hand history headers for random access to hands in big archives.
+"""
+
+import io
+import os
+import sqlite3
+import functools
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+import attr
+from . import handhistory
+from .constants import PokerRoom, Game, Limit
+from ._common import _utc_iso
+
+
+__all__ = ["HandIndex", "IndexEntry", "IndexStats"]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hands (
+    room TEXT NOT NULL,
+    ident TEXT NOT NULL,
+    date TEXT,
+    game TEXT,
+    "limit" TEXT,
+    sb REAL,
+    bb REAL,
+    tournament_ident TEXT,
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (room, ident)
+);
+CREATE INDEX IF NOT EXISTS hands_date ON hands (date);
+CREATE INDEX IF NOT EXISTS hands_stakes ON hands (bb, sb, date);
+CREATE INDEX IF NOT EXISTS hands_path ON hands (path);
+"""
+
+_COLUMNS = 'room, ident, date, game, "limit", sb, bb, tournament_ident, path, offset, length'
+
+
+def _decimal(value):
+    return Decimal(repr(value)) if value is not None else None
+
+
+def _enum(enum_class, name):
+    return enum_class[name] if name is not None else None
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+@attr.s(slots=True, frozen=True)
+class IndexEntry:
+    """One hand in the :class:`HandIndex`."""
+
+    room = attr.ib(converter=functools.partial(_enum, PokerRoom))
+    ident = attr.ib()
+    date = attr.ib(converter=_datetime)
+    game = attr.ib(converter=functools.partial(_enum, Game))
+    limit = attr.ib(converter=functools.partial(_enum, Limit))
+    sb = attr.ib(converter=_decimal)
+    bb = attr.ib(converter=_decimal)
+    tournament_ident = attr.ib()
+    path = attr.ib()
+    offset = attr.ib()
+    """Byte offset of the hand in the file."""
+    length = attr.ib()
+    """Length of the hand in bytes."""
+
+    def read(self):
+        """Raw text of the hand, read directly from the file."""
+        with io.open(self.path, "rb") as f:
+            f.seek(self.offset)
+            return handhistory._decode_hand([f.read(self.length)])
+
+    def hand_history(self):
+        """Unparsed hand history instance of the room's parser."""
+        return handhistory.get_parser(self.room)(self.read())
+
+
+@attr.s(slots=True)
+class IndexStats:
+    """Result of :meth:`HandIndex.build`."""
+
+    files = attr.ib(default=0)
+    """Number of indexed files."""
+    skipped = attr.ib(default=0)
+    """Files which are not changed since the last build or not hand histories."""
+    hands = attr.ib(default=0)
+    errors = attr.ib(default=0)
+    """Hands with unparsable headers."""
+
+
+class HandIndex:
+    """SQLite index of the header of every hand: ident, room, date, game, limit, blinds,
+    tournament id and the location of the hand (file path, byte offset and length).
+
+    Hands can be looked up by ident, date range or stakes, and the raw text is read with one
+    seek from the file, see :meth:`IndexEntry.read`.
+
+    :param path:    SQLite database file path
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM hands").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def build(self, paths):
+        """Index the hand history files, directories are searched recursively.
+
+        Only :meth:`parse_header` is called on the hands. Files already indexed with the same
+        size and modification time are skipped, changed files are indexed again.
+
+        :rtype: IndexStats
+        """
+        stats = IndexStats()
+        for path in _expand(paths):
+            with self._db:
+                self._index_file(path, stats)
+        return stats
+
+    def get(self, ident, room=None):
+        """:class:`IndexEntry` of the hand or None if it's not in the index."""
+        query = f"SELECT {_COLUMNS} FROM hands WHERE ident = ?"
+        params = [ident]
+        if room is not None:
+            query += " AND room = ?"
+            params.append(PokerRoom(room).name)
+        row = self._db.execute(query, params).fetchone()
+        return IndexEntry(*row) if row is not None else None
+
+    def find(self, start=None, end=None, sb=None, bb=None, game=None, limit=None, room=None):
+        """Yield :class:`IndexEntry` of hands matching every given condition, ordered by date.
+
+        :param datetime start:  first date, inclusive. Naive datetimes are in UTC.
+        :param datetime end:    last date, exclusive
+        :param sb:              small blind
+        :param bb:              big blind
+        :param game:            :class:`Game`
+        :param limit:           :class:`Limit`
+        :param room:            :class:`PokerRoom`
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("date >= ?", start and _utc_iso(start)),
+            ("date < ?", end and _utc_iso(end)),
+            ("sb = ?", sb if sb is None else float(sb)),
+            ("bb = ?", bb if bb is None else float(bb)),
+            ("game = ?", game and Game(game).name),
+            ('"limit" = ?', limit and Limit(limit).name),
+            ("room = ?", room and PokerRoom(room).name),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT {_COLUMNS} FROM hands{where} ORDER BY date"
+        for row in self._db.execute(query, params):
+            yield IndexEntry(*row)
+
+    def _index_file(self, path, stats):
+        stat = os.stat(path)
+        row = self._db.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        if row == (stat.st_size, stat.st_mtime):
+            stats.skipped += 1
+            return
+
+        with io.open(path, "rb") as f:
+            room = handhistory.detect_room(f.read(handhistory._SNIFF_SIZE))
+        if room is None:
+            stats.skipped += 1
+            return
+
+        parser = handhistory.get_parser(room)
+        self._db.execute("DELETE FROM hands WHERE path = ?", (path,))
+        rows = []
+        for offset, length, hand_text in handhistory._split_hands(path, parser._HAND_START):
+            hand_history = parser(hand_text)
+            try:
+                hand_history.parse_header()
+            except Exception:
+                stats.errors += 1
+                continue
+            rows.append(_make_row(room, hand_history, path, offset, length))
+
+        self._db.executemany(
+            f"INSERT OR REPLACE INTO hands ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime) VALUES (?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime),
+        )
+        stats.files += 1
+        stats.hands += len(rows)
+
+
+def _make_row(room, hand_history, path, offset, length):
+    def name(value):
+        return value.name if value is not None else None
+
+    def number(value):
+        return float(value) if value is not None else None
+
+    date = getattr(hand_history, "date", None)
+    return (
+        room.name,
+        hand_history.ident,
+        _utc_iso(date) if date is not None else None,
+        name(getattr(hand_history, "game", None)),
+        name(getattr(hand_history, "limit", None)),
+        number(getattr(hand_history, "sb", None)),
+        number(getattr(hand_history, "bb", None)),
+        getattr(hand_history, "tournament_ident", None),
+        path,
+        offset,
+        length,
+    )
+
+
+def _expand(paths):
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            for file_path in sorted(path.rglob("*")):
+                if file_path.is_file():
+                    yield str(file_path.resolve())
+        else:
+            yield str(path.resolve())
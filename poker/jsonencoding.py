@@ -1,142 +1,384 @@
-import jsonpickle
-from jsonpickle.handlers import BaseHandler
+"""
+    JSON encoding of cards, combos and parsed hand histories and loading them back.
+"""
 
-from poker import Card, Combo
-from poker.handhistory import _BaseStreet, _BaseHandHistory, _Player, _PlayerAction
+import io
+import json
+from datetime import datetime
+import attr
+from . import _lookup
+from .card import Card
+from .hand import Combo
+from .board import Texture
+from .constants import Game, GameType, Limit, Currency, MoneyType, Action
+from .handhistory import _BaseStreet, _BaseHandHistory, _Player, _PlayerAction
 
 
-@jsonpickle.handlers.register(Card, base=True)
-class CardHandler(BaseHandler):
+__all__ = ["JsonEncoder", "write_ndjson", "JsonHand", "JsonStreet", "decode_hand", "read_ndjson"]
 
-    def flatten(self, obj, data):
-        data = {'rank': obj.rank.val, 'suit': obj.suit.name}
-        return data
-
-    def restore(self, obj):
-        raise NotImplementedError
 
+_card_key = _lookup.card_str
 
-@jsonpickle.handlers.register(Combo, base=True)
-class ComboHandler(BaseHandler):
 
-    def flatten(self, obj, data):
-        data = {'1': self.context.flatten(obj.first, reset=False), '2': self.context.flatten(obj.second, reset=False)}
-        return data
+# the same dicts are shared by every encoded card and combo, they are never changed
+_CARDS = {
+    _card_key(card): {"rank": card.rank.val, "suit": card.suit.name} for card in _lookup.CARDS
+}
+_COMBOS = {}
 
-    def restore(self, obj):
-        raise NotImplementedError
 
+def _card_data(card):
+    return _CARDS[_card_key(card)]
 
-@jsonpickle.handlers.register(_Player, base=True)
-class PlayerHandler(BaseHandler):
 
-    def flatten(self, obj, data):
-        data.clear()
-        data = {'name': obj.name, 'stack': float(obj.stack), 'seat': obj.seat}
-        if obj.combo is not None:
-            data['hand'] = self.context.flatten(obj.combo, reset=False)
+def _combo_data(combo):
+    first, second = _card_key(combo.first), _card_key(combo.second)
+    try:
+        return _COMBOS[first + second]
+    except KeyError:
+        data = _COMBOS[first + second] = {"1": _CARDS[first], "2": _CARDS[second]}
         return data
 
-    def restore(self, obj):
-        raise NotImplementedError
-
 
-@jsonpickle.handlers.register(_PlayerAction, base=True)
-class PlayerActionsHandler(BaseHandler):
-
-    def flatten(self, obj, data):
-        data = {}
-        data['name'] = obj.name
-        data['action'] = obj.action.name
-        if obj.amount is not None:
-            data['amount'] = float(obj.amount)
-        return data
-
-    def restore(self, obj):
-        raise NotImplementedError
-
-
-@jsonpickle.handlers.register(_BaseStreet, base=True)
-class StreetHandler(BaseHandler):
-
-    def flatten(self, obj, data):
-        data = {}
-        if obj.actions is not None:
-            data['actions'] = [self.context.flatten(action, reset=False) for action in obj.actions]
-        if obj.cards is not None:
-            data['cards'] = [self.context.flatten(x, reset=False) for x in obj.cards]
-            data['flushdraw'] = obj.has_flushdraw
-            data['gutshot'] = obj.has_gutshot
-            data['paired'] = obj.has_pair
-            data['straightdraw'] = obj.has_straightdraw
-            data['monotone'] = obj.is_monotone
-            data['triplet'] = obj.is_triplet
-        return data
-
-    def restore(self, obj):
-        raise NotImplementedError
-
-
-@jsonpickle.handlers.register(_BaseHandHistory, base=True)
-class HandHistoryHandler(BaseHandler):
-
-    def flatten(self, obj, data):
-        data = {}
-        data['timestamp'] = str(obj.date)
-        data['id'] = int(obj.ident)
-        data['tablename'] = obj.table_name
-        data['bb'] = float(obj.bb)
-        data['sb'] = float(obj.sb)
-        data['game'] = str(obj.game)
-        data['gametype'] = str(obj.game_type)
-        data['limit'] = str(obj.limit)
-        data['max-players'] = obj.max_players
-        data['hero'] = obj.hero.name
-        data['button'] = obj.button.name
-        if obj.total_pot is not None:
-            data['total_pot'] = float(obj.total_pot)
-        if obj.rake is not None:
-            data['rake'] = float(obj.rake)
-        if obj.tournament_ident is not None:
-            data['tournament-id'] = int(obj.tournament_ident)
-        if obj.tournament_level is not None:
-            data['tournament-level'] = str(obj.tournament_level)
-        if obj.currency is not None:
-            data['currency'] = str(obj.currency)
-        if obj.extra is not None and obj.extra.get('money_type') is not None:
-            data['moneytype'] = str(obj.extra.get('money_type'))
-        data['players'] = [self.context.flatten(player, reset=True) for player in obj.players]
-
-        if obj.preflop is not None:
-            preflop_actions = [self.context.flatten(action, reset=False) for action in obj.preflop.actions]
-            data['preflop'] = {'actions': preflop_actions}
-
-        if obj.flop is not None:
-            data['flop'] = self.context.flatten(obj.flop, reset=True)
-
-        if obj.turn is not None:
-            data['turn'] = self.context.flatten(obj.turn, reset=True)
-
-        if obj.river is not None:
-            data['river'] = self.context.flatten(obj.river, reset=True)
-
-        if obj.show_down is not None:
-            data['show_down'] = self.context.flatten(obj.show_down, reset=True)
-
-        if obj.board is not None:
-            board_ = [self.context.flatten(card, reset=True) for card in obj.board]
-            data['board'] = board_
-        data['winners'] = obj.winners
-
-        if obj.earnings is not None:
-            data['earnings'] = float(obj.earnings)
-        return data
-
-    def restore(self, obj):
-        raise NotImplementedError
+def _player_data(player):
+    data = {"name": player.name, "stack": float(player.stack), "seat": player.seat}
+    if player.combo is not None:
+        data["hand"] = _combo_data(player.combo)
+    return data
+
+
+def _action_data(action):
+    data = {"name": action.name, "action": action.action._name_}
+    if action.amount is not None:
+        data["amount"] = float(action.amount)
+    return data
+
+
+def _street_data(street):
+    data = {}
+    if street.actions is not None:
+        data["actions"] = [_action_data(action) for action in street.actions]
+    if street.cards is not None:
+        data["cards"] = [_card_data(card) for card in street.cards]
+        texture = street.texture
+        data["flushdraw"] = Texture.FLUSHDRAW in texture
+        data["gutshot"] = Texture.GUTSHOT in texture
+        data["paired"] = Texture.PAIR in texture
+        data["straightdraw"] = Texture.STRAIGHTDRAW in texture
+        data["monotone"] = Texture.MONOTONE in texture
+        data["triplet"] = Texture.TRIPLET in texture
+    return data
+
+
+def _hand_data(hand):
+    data = {
+        "timestamp": str(hand.date),
+        "id": int(hand.ident),
+        "tablename": hand.table_name,
+        "bb": float(hand.bb),
+        "sb": float(hand.sb),
+        "game": str(hand.game),
+        "gametype": str(hand.game_type),
+        "limit": str(hand.limit),
+        "max-players": hand.max_players,
+        "hero": hand.hero.name,
+        "button": hand.button.name,
+    }
+    if hand.total_pot is not None:
+        data["total_pot"] = float(hand.total_pot)
+    if hand.rake is not None:
+        data["rake"] = float(hand.rake)
+    if hand.tournament_ident is not None:
+        data["tournament-id"] = int(hand.tournament_ident)
+    if hand.tournament_level is not None:
+        data["tournament-level"] = str(hand.tournament_level)
+    if hand.currency is not None:
+        data["currency"] = str(hand.currency)
+    extra = getattr(hand, "extra", None)
+    if extra is not None and extra.get("money_type") is not None:
+        data["moneytype"] = str(extra.get("money_type"))
+    data["players"] = [_player_data(player) for player in hand.players]
+
+    preflop = getattr(hand, "preflop", None)
+    if preflop is not None:
+        data["preflop"] = {"actions": [_action_data(action) for action in preflop.actions or ()]}
+    for street_name in ("flop", "turn", "river", "show_down"):
+        # some rooms have only the card of the turn and river, not a street
+        street = getattr(hand, street_name, None)
+        if street is not None:
+            data[street_name] = _data(street)
+
+    if hand.board is not None:
+        data["board"] = [_card_data(card) for card in hand.board]
+    data["winners"] = hand.winners
+
+    earnings = getattr(hand, "earnings", None)
+    if earnings is not None:
+        data["earnings"] = float(earnings)
+    return data
+
+
+_DATA = {
+    Card: _card_data,
+    Combo: _combo_data,
+    _Player: _player_data,
+    _PlayerAction: _action_data,
+}
+
+
+def _data(obj):
+    """JSON compatible data of a supported object, used as the ``default`` of the encoder."""
+    to_data = _DATA.get(type(obj))
+    if to_data is not None:
+        return to_data(obj)
+    elif isinstance(obj, _BaseHandHistory):
+        return _hand_data(obj)
+    elif isinstance(obj, _BaseStreet):
+        return _street_data(obj)
+    elif isinstance(obj, (bool, int, float, str, list, tuple, dict)) or obj is None:
+        return obj
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_ENCODER = json.JSONEncoder(default=_data)
 
 
 class JsonEncoder:
+    """Encode cards, combos, players, actions, streets and parsed hand histories to JSON.
+
+    The objects are turned to plain dicts and lists directly, cards and combos are shared
+    precomputed dicts, then encoded by the :mod:`json` module.
+    Containers of these objects (dicts, lists) are encoded too.
+    """
 
     def encode(self, obj):
-        return jsonpickle.encode(obj)
+        return _ENCODER.encode(_data(obj))
+
+
+def write_ndjson(hands, file):
+    """Write parsed hand histories as newline delimited JSON, one hand per line.
+
+    :param hands:   iterable of parsed hand histories
+    :param file:    path or a text file object
+    :return: number of written hands
+    """
+    if not hasattr(file, "write"):
+        with io.open(file, "w", encoding="utf-8") as f:
+            return write_ndjson(hands, f)
+
+    encode, write = _ENCODER.encode, file.write
+    count = 0
+    for hand in hands:
+        write(encode(_hand_data(hand)))
+        write("\n")
+        count += 1
+    return count
+
+
+@attr.s(slots=True)
+class JsonStreet:
+    """Street of a :class:`JsonHand`."""
+
+    actions = attr.ib(default=None)
+    """Tuple of ``_PlayerAction`` or None."""
+    cards = attr.ib(default=None)
+    """Tuple of :class:`Card` or None."""
+
+
+@attr.s(slots=True)
+class JsonHand:
+    """Hand history loaded from JSON written by :class:`JsonEncoder`. Amounts are floats,
+    attributes not in the JSON or not loaded are None.
+    """
+
+    date = attr.ib(default=None)
+    ident = attr.ib(default=None)
+    table_name = attr.ib(default=None)
+    bb = attr.ib(default=None)
+    sb = attr.ib(default=None)
+    game = attr.ib(default=None)
+    game_type = attr.ib(default=None)
+    limit = attr.ib(default=None)
+    max_players = attr.ib(default=None)
+    hero = attr.ib(default=None)
+    """Name of hero."""
+    button = attr.ib(default=None)
+    """Name of the player on the button."""
+    total_pot = attr.ib(default=None)
+    rake = attr.ib(default=None)
+    tournament_ident = attr.ib(default=None)
+    tournament_level = attr.ib(default=None)
+    currency = attr.ib(default=None)
+    money_type = attr.ib(default=None)
+    players = attr.ib(default=None)
+    """Tuple of ``_Player``, the combos are set when they were known."""
+    preflop = attr.ib(default=None)
+    """:class:`JsonStreet` of the preflop actions."""
+    flop = attr.ib(default=None)
+    """:class:`JsonStreet` with the cards and actions of the flop."""
+    turn = attr.ib(default=None)
+    """:class:`JsonStreet` or only the :class:`Card` of the turn, like in the hand history."""
+    river = attr.ib(default=None)
+    show_down = attr.ib(default=None)
+    board = attr.ib(default=None)
+    """Tuple of :class:`Card`."""
+    winners = attr.ib(default=None)
+    """Tuple of winner names."""
+    earnings = attr.ib(default=None)
+
+
+# every loaded card and combo is one of these objects, they are never changed
+_CARD_OBJECTS = {(card.rank.val, card.suit.name): card for card in _lookup.CARDS}
+_COMBO_OBJECTS = {}
+_ACTIONS = {action.name: action for action in Action}
+
+
+def _load_card(data):
+    return _CARD_OBJECTS[data["rank"], data["suit"]]
+
+
+def _load_cards(cards):
+    return tuple([_CARD_OBJECTS[card["rank"], card["suit"]] for card in cards])
+
+
+def _load_combo(data):
+    first, second = data["1"], data["2"]
+    key = first["rank"], first["suit"], second["rank"], second["suit"]
+    try:
+        return _COMBO_OBJECTS[key]
+    except KeyError:
+        combo = _COMBO_OBJECTS[key] = Combo.from_cards(_load_card(first), _load_card(second))
+        return combo
+
+
+def _load_players(players):
+    return tuple([
+        _Player(
+            name=player["name"],
+            stack=player["stack"],
+            seat=player["seat"],
+            combo=_load_combo(player["hand"]) if "hand" in player else None,
+        )
+        for player in players
+    ])
+
+
+def _load_actions(actions):
+    return tuple([
+        _PlayerAction(action["name"], _ACTIONS[action["action"]], action.get("amount"))
+        for action in actions
+    ])
+
+
+def _load_street(data):
+    # some rooms have only the card of the turn and river or a flag of the showdown
+    if not isinstance(data, dict):
+        return data
+    elif "rank" in data:
+        return _load_card(data)
+    actions = data.get("actions")
+    cards = data.get("cards")
+    return JsonStreet(
+        actions=_load_actions(actions) if actions else None,
+        cards=_load_cards(cards) if cards is not None else None,
+    )
+
+
+def _enum_loader(enum_class):
+    # looking up enum members by value is slow, every value is looked up only once
+    members = {}
+
+    def load(value):
+        try:
+            return members[value]
+        except KeyError:
+            member = members[value] = enum_class(value)
+            return member
+
+    return load
+
+
+def _same(value):
+    return value
+
+
+# attribute of JsonHand: key in the JSON and function loading its value
+_FIELDS = {
+    "date": ("timestamp", datetime.fromisoformat),
+    "ident": ("id", str),
+    "table_name": ("tablename", _same),
+    "bb": ("bb", _same),
+    "sb": ("sb", _same),
+    "game": ("game", _enum_loader(Game)),
+    "game_type": ("gametype", _enum_loader(GameType)),
+    "limit": ("limit", _enum_loader(Limit)),
+    "max_players": ("max-players", _same),
+    "hero": ("hero", _same),
+    "button": ("button", _same),
+    "total_pot": ("total_pot", _same),
+    "rake": ("rake", _same),
+    "tournament_ident": ("tournament-id", str),
+    "tournament_level": ("tournament-level", _same),
+    "currency": ("currency", _enum_loader(Currency)),
+    "money_type": ("moneytype", _enum_loader(MoneyType)),
+    "players": ("players", _load_players),
+    "preflop": ("preflop", _load_street),
+    "flop": ("flop", _load_street),
+    "turn": ("turn", _load_street),
+    "river": ("river", _load_street),
+    "show_down": ("show_down", _load_street),
+    "board": ("board", _load_cards),
+    "winners": ("winners", tuple),
+    "earnings": ("earnings", _same),
+}
+
+
+def _field_loaders(fields):
+    if fields is None:
+        return list(_FIELDS.items())
+    unknown = set(fields) - set(_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [(field, _FIELDS[field]) for field in fields]
+
+
+def _load_hand(data, loaders):
+    hand = JsonHand()
+    for field, (key, load) in loaders:
+        value = data.get(key)
+        if value is not None:
+            setattr(hand, field, load(value))
+    return hand
+
+
+def decode_hand(document, fields=None):
+    """Load a hand history encoded by :class:`JsonEncoder`.
+
+    :param str document:    JSON of one hand
+    :param fields:  names of the :class:`JsonHand` attributes to load, every attribute by
+                    default. The others are None and their values are not converted.
+    :rtype: JsonHand
+    """
+    return _load_hand(json.loads(document), _field_loaders(fields))
+
+
+def read_ndjson(file, fields=None):
+    """Yield the hands of newline delimited JSON written by :func:`write_ndjson`.
+
+    :param file:    path or a text file object
+    :param fields:  attributes to load, see :func:`decode_hand`
+    :return: iterator of :class:`JsonHand`
+    """
+    loaders = _field_loaders(fields)
+    if not hasattr(file, "read"):
+        with io.open(file, encoding="utf-8") as f:
+            yield from _read_lines(f, loaders)
+    else:
+        yield from _read_lines(file, loaders)
+
+
+def _read_lines(f, loaders):
+    loads = json.loads
+    for line in f:
+        if line.strip():
+            yield _load_hand(loads(line), loaders)
@@ -0,0 +1,145 @@
+"""
+    Follow hand history files while the poker client is writing them.
+"""
+
+import os
+import io
+import json
+import codecs
+import asyncio
+import logging
+from pathlib import Path
+from . import handhistory
+
+
+__all__ = ["watch"]
+
+
+log = logging.getLogger(__name__)
+
+
+def _complete_hands(data, hand_start):
+    """Split data to complete hands. A hand is complete when a blank line or the start of the
+    next hand follows it.
+
+    :return: list of ``(offset, text)`` of the complete hands relative to the start of the data
+             and the number of bytes consumed. The rest should be read again later.
+    """
+    hands, consumed, hand_offset, position = [], 0, None, 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            # line is still being written
+            break
+        content = line[len(codecs.BOM_UTF8):] if line.startswith(codecs.BOM_UTF8) else line
+        if content.startswith(hand_start):
+            if hand_offset is not None:
+                hands.append((hand_offset, data[hand_offset:position]))
+                consumed = position
+            hand_offset = position
+        elif not content.strip() or hand_offset is None:
+            if hand_offset is not None:
+                hands.append((hand_offset, data[hand_offset:position]))
+                hand_offset = None
+            consumed = position + len(line)
+        position += len(line)
+    return [(offset, handhistory._decode_hand([text])) for offset, text in hands], consumed
+
+
+class _Checkpoint:
+    """Byte offsets of the already published data of every file, saved as a JSON file."""
+
+    def __init__(self, path):
+        self.path = Path(path) if path is not None else None
+        self.offsets = {}
+        if self.path is not None and self.path.exists():
+            self.offsets = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def save(self):
+        if self.path is None:
+            return
+        # write the whole file first, so a crash never leaves a half written checkpoint
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.offsets), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def _read_new(path, offset):
+    size = os.path.getsize(path)
+    if size < offset:
+        # the file was truncated or replaced, start again
+        offset = 0
+    if size == offset:
+        return offset, b""
+    with io.open(path, "rb") as f:
+        f.seek(offset)
+        return offset, f.read(size - offset)
+
+
+async def watch(
+    directory, queue, checkpoint=None, interval=0.1, pattern="*.txt", header_only=False
+):
+    """Poll a hand history folder and put the newly written hands to an :class:`asyncio.Queue`.
+
+    Only the appended bytes of the files are read, a hand is published when it is complete,
+    after :meth:`parse_header` or :meth:`parse` is called on it. The room of every file is
+    detected by :func:`poker.handhistory.detect_room`. Hands which fail to parse are logged
+    and skipped. When the queue has a ``maxsize``, polling waits until the consumer catches up.
+
+    The offsets are saved to the checkpoint file after the hands are published, so after a
+    restart only hands not yet published are parsed again. Runs until cancelled.
+
+    :param directory:       folder of the hand history files
+    :param asyncio.Queue queue:  parsed hand histories are put here
+    :param checkpoint:      JSON file path for the offsets or None to start at the beginning
+                            of every file on every run
+    :param float interval:  seconds to sleep between polls
+    :param str pattern:     glob pattern of the hand history files
+    :param bool header_only:  only call :meth:`parse_header` on the hands
+    """
+    directory = Path(directory)
+    checkpoint = _Checkpoint(checkpoint)
+    parsers = {}
+    try:
+        while True:
+            for path in sorted(directory.glob(pattern)):
+                if await _publish_new(path, queue, checkpoint, parsers, header_only):
+                    checkpoint.save()
+            await asyncio.sleep(interval)
+    finally:
+        checkpoint.save()
+
+
+async def _publish_new(path, queue, checkpoint, parsers, header_only):
+    """Publish the new complete hands of a file, return True if the offset changed."""
+    key = str(path)
+    try:
+        parser = parsers.get(key)
+        if parser is None:
+            with io.open(path, "rb") as f:
+                room = handhistory.detect_room(f.read(handhistory._SNIFF_SIZE))
+            if room is None:
+                # nothing useful was written yet or it is not a hand history file
+                return False
+            parser = parsers[key] = handhistory.get_parser(room)
+        offset, data = _read_new(path, checkpoint.offsets.get(key, 0))
+    except OSError:
+        # the file disappeared between listing and reading
+        return False
+
+    hands, consumed = _complete_hands(data, parser._HAND_START)
+    for hand_offset, hand_text in hands:
+        hand_history = parser(hand_text)
+        try:
+            if header_only:
+                hand_history.parse_header()
+            else:
+                hand_history.parse()
+        except Exception:
+            log.warning("Could not parse hand at %s:%d", path, offset + hand_offset, exc_info=True)
+            continue
+        await queue.put(hand_history)
+
+    if not consumed:
+        return False
+    checkpoint.offsets[key] = offset + consumed
+    return True
@@ -1,5 +1,4 @@
 import re
-from decimal import Decimal
 import pytz
 from zope.interface import implementer
 from .. import handhistory as hh
@@ -14,6 +13,10 @@ __all__ = ["FullTiltPokerHandHistory"]
 
 @implementer(hh.IStreet)
 class _Street(hh._BaseStreet):
+    def __init__(self, flop, amount=hh._decimal):
+        self._amount = amount
+        super().__init__(flop)
+
     def _parse_cards(self, boardline):
         self.cards = (Card(boardline[1:3]), Card(boardline[4:6]), Card(boardline[7:9]))
 
@@ -43,14 +46,14 @@ class _Street(hh._BaseStreet):
         amount = line[amount_start_index:space_after_amount_index]
         name_start_index = line.find("to ") + 3
         name = line[name_start_index:]
-        return name, Action.RETURN, Decimal(amount)
+        return name, Action.RETURN, self._amount(amount)
 
     def _parse_raise(self, line):
         first_space_index = line.find(" ")
         name = line[:first_space_index]
         amount_start_index = line.find("to ") + 3
         amount = line[amount_start_index:]
-        return name, Action.RAISE, Decimal(amount)
+        return name, Action.RAISE, self._amount(amount)
 
     def _parse_win(self, line):
         first_space_index = line.find(" ")
@@ -58,7 +61,7 @@ class _Street(hh._BaseStreet):
         first_paren_index = line.find("(")
         last_paren_index = -1
         amount = line[first_paren_index + 1 : last_paren_index]
-        self.pot = Decimal(amount)
+        self.pot = self._amount(amount)
         return name, Action.WIN, self.pot
 
     def _parse_muck(self, line):
@@ -81,7 +84,7 @@ class _Street(hh._BaseStreet):
         action = Action(line[space_index + 1 : end_action_index])
         if end_action_index:
             amount = line[end_action_index + 1 :]
-            return name, action, Decimal(amount)
+            return name, action, self._amount(amount)
         else:
             return name, action, None
 
@@ -93,6 +96,7 @@ class FullTiltPokerHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHisto
     rake = None
     tournament_level = None
 
+    _HAND_START = b"Full Tilt Poker Game #"
     _DATE_FORMAT = "%H:%M:%S ET - %Y/%m/%d"
     _TZ = pytz.timezone("US/Eastern")  # ET
     _split_re = re.compile(r" ?\*\*\* ?\n?|\n")
@@ -128,8 +132,10 @@ class FullTiltPokerHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHisto
         self._split_raw()
 
         header_match = self._header_re.match(self._splitted[0])
-        self.sb = Decimal(header_match.group("sb"))
-        self.bb = Decimal(header_match.group("bb"))
+        # only tournaments are supported, every amount is in chips except the buyin
+        self._amount = self._amount_parser(money=False)
+        self.sb = self._amount(header_match.group("sb"))
+        self.bb = self._amount(header_match.group("bb"))
         self._parse_date(header_match.group("date"))
         self.ident = header_match.group("ident")
         tournament_name = header_match.group("tournament_name")
@@ -142,13 +148,26 @@ class FullTiltPokerHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHisto
         self.limit = Limit(header_match.group("limit"))
         self.game = Game(header_match.group("game"))
         buyin = header_match.group("buyin")
-        self.buyin = Decimal(buyin) if buyin else None
+        self.buyin = self._amount_parser(money=True)(buyin) if buyin else None
 
         self.extra = dict()
         self.extra["tournament_name"] = tournament_name
 
         self.header_parsed = True
 
+    def _parse_date(self, date_string):
+        # 13:26:50 ET - 2013/09/22
+        time, separator, date = date_string.strip().partition(" ET - ")
+        try:
+            if not separator:
+                raise ValueError(date_string)
+            hour, minute, second = time.split(":")
+            year, month, day = date.split("/")
+            self._set_date(int(year), int(month), int(day), int(hour), int(minute), int(second))
+        except ValueError:
+            # strptime gives the usual error for malformed dates
+            super()._parse_date(date_string)
+
     def parse(self):
         """Parses the body of the hand history, but first parse header if not yet parsed."""
         if not self.header_parsed:
@@ -216,7 +235,7 @@ class FullTiltPokerHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHisto
             return
         stop = next(v for v in self._sections if v > start)
         floplines = self._splitted[start + 1 : stop]
-        self.flop = _Street(floplines)
+        self.flop = _Street(floplines, self._amount)
 
     def _parse_street(self, street):
         try:
@@ -242,6 +261,7 @@ class FullTiltPokerHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHisto
         potline = self._splitted[self._sections[-1] + 2]
         match = self._pot_re.match(potline.replace(",", ""))
         self.total_pot = int(match.group(1))
+        self.pot_rake = int(match.group(2))
 
     def _parse_board(self):
         boardline = self._splitted[self._sections[-1] + 3]
@@ -281,7 +301,7 @@ class FullTiltPokerHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHisto
         board_line = self._splitted[start]
         match = self._street_re.search(board_line)
         pot = match.group(2)
-        self.extra[f"{street}_pot"] = Decimal(pot)
+        self.extra[f"{street}_pot"] = self._amount(pot)
 
         num_players = int(match.group(3))
         self.extra[f"{street}_num_players"] = num_players
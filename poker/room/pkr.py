@@ -1,5 +1,4 @@
 import re
-from decimal import Decimal
 import pytz
 from zope.interface import implementer
 from .. import handhistory as hh
@@ -12,6 +11,10 @@ __all__ = ["PKRHandHistory"]
 
 @implementer(hh.IStreet)
 class _Street(hh._BaseStreet):
+    def __init__(self, flop, amount=hh._decimal):
+        self._amount = amount
+        super().__init__(flop)
+
     def _parse_cards(self, boardline):
         self.cards = (
             Card(boardline[6:9:2]),
@@ -33,7 +36,7 @@ class _Street(hh._BaseStreet):
     def _parse_pot(self, line):
         amount_start_index = 12
         amount = line[amount_start_index:]
-        self.pot = Decimal(amount)
+        self.pot = self._amount(amount)
 
     def _parse_player_action(self, line):
         space_index = line.find(" ")
@@ -46,7 +49,7 @@ class _Street(hh._BaseStreet):
         if end_action_index:
             amount_start_index = line.find("$") + 1
             amount = line[amount_start_index:]
-            return name, action, Decimal(amount)
+            return name, action, self._amount(amount)
         else:
             return name, action, None
 
@@ -60,8 +63,16 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
     tournament_name = None
     tournament_level = None
 
+    _HAND_START = b"Table #"
     _DATE_FORMAT = "%d %b %Y %H:%M:%S"
     _TZ = pytz.UTC
+    _MONTHS = {
+        name: number
+        for number, name in enumerate(
+            ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+            start=1,
+        )
+    }
     _SPLIT_CARD_SPACE = slice(0, 3, 2)
     _STREET_SECTIONS = {"flop": 2, "turn": 3, "river": 4}
     _split_re = re.compile(r"Dealing |\nDealing Cards\n|Taking |Moving |\n")
@@ -87,10 +98,24 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
         self.game_type = GameType(self._splitted[6][12:])  # cut off "Table Type: "
 
         match = self._blinds_re.match(self._splitted[8])
-        self.sb = Decimal(match.group(1))
-        self.bb = Decimal(match.group(2))
+        # every amount is in dollars
+        self._amount = self._amount_parser(money=True)
+        self.sb = self._amount(match.group(1))
+        self.bb = self._amount(match.group(2))
         self.buyin = self.bb * 100
 
+    def _parse_date(self, date_string):
+        # 05 Oct 2013 13:26:50
+        try:
+            day, month, year, time = date_string.split()
+            hour, minute, second = time.split(":")
+            self._set_date(
+                int(year), self._MONTHS[month], int(day), int(hour), int(minute), int(second)
+            )
+        except (ValueError, KeyError):
+            # strptime gives the usual error for malformed dates
+            super()._parse_date(date_string)
+
     def parse(self):
         """Parses the body of the hand history, but first parse header if not yet parsed."""
         if not self.header_parsed:
@@ -121,7 +146,7 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
             seat_number = int(match.group(1))
             players[seat_number - 1] = hh._Player(
                 name=match.group(2),
-                stack=Decimal(match.group(3)),
+                stack=self._amount(match.group(3)),
                 seat=seat_number,
                 combo=None,
             )
@@ -159,7 +184,7 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
         start = self._sections[flop_section] + 1
         stop = next(v for v in self._sections if v > start)
         floplines = self._splitted[start:stop]
-        self.flop = _Street(floplines)
+        self.flop = _Street(floplines, self._amount)
 
     def _parse_street(self, street):
         section = self._STREET_SECTIONS[street]
@@ -176,7 +201,7 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
             setattr(self, f"{street}_actions", tuple(self._splitted[start + 1 : stop]))
 
             sizes_line = self._splitted[start - 2]
-            pot = Decimal(self._sizes_re.match(sizes_line).group(1))
+            pot = self._amount(self._sizes_re.match(sizes_line).group(1))
             setattr(self, f"{street}_pot", pot)
         except IndexError:
             setattr(self, street, None)
@@ -188,7 +213,7 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
 
         rake_line = self._splitted[start]
         match = self._rake_re.match(rake_line)
-        self.rake = Decimal(match.group(1))
+        self.rake = self.pot_rake = self._amount(match.group(1))
 
         winners = []
         total_pot = self.rake
@@ -198,7 +223,7 @@ class PKRHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
             elif "wins" in line:
                 match = self._win_re.match(line)
                 winners.append(match.group(1))
-                total_pot += Decimal(match.group(2))
+                total_pot += self._amount(match.group(2))
 
         self.winners = tuple(winners)
         self.total_pot = total_pot
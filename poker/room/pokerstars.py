@@ -1,5 +1,7 @@
 import re
-from decimal import Decimal
+import codecs
+import collections
+from decimal import Decimal, ROUND_DOWN
 from datetime import datetime
 import attr
 import pytz
@@ -13,20 +15,69 @@ from ..constants import Limit, Game, GameType, Currency, Action, MoneyType
 __all__ = ["PokerStarsHandHistory", "Notes"]
 
 
-@implementer(hh.IStreet)
-class _Street(hh._BaseStreet):
+# number of action lines by how they were classified in every parsed hand in this process,
+# unrecognized lines are also collected in the diagnostics of the streets
+line_stats = collections.Counter()
+
+_UNRECOGNIZED = object()
+
 
-    _blind_re = re.compile(
-            r"""^(?P<name>.+?): posts (?P<blind>\w+\s\w+) [\D]?(?P<amount>(\d+(?:\.\d+)?))""")
+_BLINDS = {"small blind": Action.SB, "big blind": Action.BB}
+_PUT_IN = frozenset((Action.BET, Action.CALL, Action.SB, Action.BB))
+_TAKEN = frozenset((Action.WIN, Action.CASH_OUT, Action.RETURN))
 
-    _raise_re = re.compile(
-        r"""^(?P<name>.+?): raises \D?(?P<raise>(\d+(?:\.\d+)?)) to \D?(?P<amount>(\d+(?:\.\d+)?))""")
+_PLAYER_ACTIONS = {
+    "folds": Action.FOLD,
+    "checks": Action.CHECK,
+    "calls": Action.CALL,
+    "bets": Action.BET,
+}
 
-    _cash_out_re = re.compile(
-        r"^(?P<name>.+?) (?P<action>cashed out) the hand for [\D](?P<amount>(\d+(?:\.\d+)?))")
 
-    _collected_re = re.compile(
-        r"""^(?P<name>.+?) collected \D?(?P<amount>(\d+(?:\.\d+)?))"""
+def _rake_shares(rake, won):
+    """Split the rake between the winners in proportion to the amounts they won."""
+    total = sum(won.values())
+    if not rake or not total:
+        return {}
+    if isinstance(rake, int):
+        shares = {name: rake * amount // total for name, amount in won.items()}
+    else:
+        unit = Decimal(1).scaleb(rake.as_tuple().exponent)
+        shares = {
+            name: (rake * amount / total).quantize(unit, ROUND_DOWN) for name, amount in won.items()
+        }
+    # the rounding remainder goes to the biggest winner, so the shares add up to the rake
+    shares[max(won, key=won.get)] += rake - sum(shares.values())
+    return shares
+
+
+@implementer(hh.IStreet)
+class _Street(hh._BaseStreet):
+    def __init__(self, flop, amount=hh._decimal):
+        self._amount = amount
+        super().__init__(flop)
+
+    # lines without the "name: " prefix
+    _other_line_re = re.compile(
+        r"""
+        ^(?:
+            Uncalled\ bet\ \((?P<returned>\S+)\)\ returned\ to\ (?P<returned_to>.+)
+          | (?P<collector>.+?)\ collected\ (?P<collected>\S+)\ from\ .*
+          | (?P<cashed_out>.+?)\ cashed\ out\ the\ hand\ for\ (?P<cash_out>\S+).*
+          | .+?\ (?:
+                said,\ ".*"
+              | joins\ the\ table.*
+              | leaves\ the\ table
+              | is\ (?:dis)?connected
+              | has\ timed\ out.*
+              | was\ removed\ from\ the\ table.*
+              | finished\ the\ tournament.*
+              | has\ returned
+              | is\ sitting\ out
+            )
+        )$
+        """,
+        re.VERBOSE,
     )
 
     def _parse_cards(self, boardline):
@@ -40,98 +91,110 @@ class _Street(hh._BaseStreet):
 
     def _parse_actions(self, actionlines):
         actions = []
+        self.diagnostics = []
         for line in actionlines:
-            if line.startswith("Uncalled bet"):
-                action = self._parse_uncalled(line)
-            elif "collected" in line:
-                action = self._parse_collected(line)
-            elif "doesn't show hand" in line:
-                action = self._parse_muck(line)
-            elif ' said, "' in line:  # skip chat lines
-                continue
-            elif "posts" in line:
-                action = self._parse_blind(line)
-            elif "raises" in line:
-                action = self._parse_raise(line)
-            elif "joins" in line:
-                continue
-            elif "leaves" in line:
-                continue
-            elif "connected" in line: # also includes disconnected
-                continue
-            elif "cashed out" in line:
-                action = self._parse_cashed_out(line)
-            elif "removed from the table" in line:
-                continue
-            elif "shows" in line:
-                # shows is ignored at the moment
-                continue
-            elif "mucks" in line:
-                # muck is ignored at the moment
-                continue
-            elif "finished" in line:
-                # muck is ignored at the moment
-                continue
-            elif ":" in line:
-                action = self._parse_player_action(line)
+            # most of the lines are "name: action ...", the first word of the action picks the
+            # parser, so words in player names can't confuse the classification.
+            # Names can contain ": " too, the name ends before the first known action word.
+            # Chat messages can contain anything, so the search stops where the chat starts.
+            parser = None
+            chat = line.find(' said, "')
+            end = chat if chat != -1 else len(line)
+            separator = line.find(": ", 0, end)
+            while separator != -1:
+                parser = self._COLON_ACTIONS.get(line[separator + 2:].partition(" ")[0])
+                if parser is not None:
+                    break
+                separator = line.find(": ", separator + 2, end)
+            if parser is not None:
+                action = parser(self, line[:separator], line[separator + 2:], self._amount)
             else:
-                error_message = RuntimeError("bad action line: " + line)
-                print(error_message)
-                continue
+                action = self._parse_other_line(line, self._amount)
 
-            actions.append(hh._PlayerAction(*action))
+            if action is _UNRECOGNIZED:
+                line_stats["unrecognized"] += 1
+                self.diagnostics.append(line)
+            elif action is None:
+                line_stats["ignored"] += 1
+            else:
+                line_stats["actions"] += 1
+                actions.append(hh._PlayerAction(*action))
         self.actions = tuple(actions) if actions else None
 
-    # TODO: all currency symobols should be removed
-    def _parse_uncalled(self, line):
-        first_paren_index = line.find("(")
-        second_paren_index = line.find(")")
-        amount = line[first_paren_index + 1: second_paren_index]
-        amount = str.replace(amount, "$", "")
-        name_start_index = line.find("to ") + 3
-        name = line[name_start_index:]
-        return name, Action.RETURN, Decimal(amount)
-
-    def _parse_muck(self, line):
-        colon_index = line.find(":")
-        name = line[:colon_index]
-        return name, Action.MUCK, None
-
-    def _parse_player_action(self, line):
-        name, _, action = line.partition(": ")
+    def _parse_player_action(self, name, action, to_amount):
         action, _, amount = action.partition(" ")
         amount, _, _ = amount.partition(" ")
-
-        if amount:
-            amount = str.replace(amount, "$", "")
-            return name, Action(action), Decimal(amount)
+        action = _PLAYER_ACTIONS.get(action) or Action(action)
+        # folds can be followed by the shown cards
+        if amount and not amount.startswith("["):
+            return name, action, to_amount(amount)
         else:
-            return name, Action(action), None
-
-    def _parse_collected(self, line):
-        match = self._collected_re.match(line)
-        return match.group("name"), Action.WIN, Decimal(match.group("amount"))
-
-    def _parse_raise(self, line):
-        match = self._raise_re.match(line)
-        return match.group("name"), Action.RAISE, Decimal(match.group("amount"))
-
-    def _parse_blind(self, line):
-        match = self._blind_re.match(line)
-        return match.group("name"), Action(match.group("blind")), Decimal(match.group("amount"))
+            return name, action, None
+
+    def _parse_raise(self, name, action, to_amount):
+        # name: raises $0.03 to $0.05 [and is all-in]
+        words = action.split(" ", 4)
+        return name, Action.RAISE, to_amount(words[3])
+
+    def _parse_blind(self, name, action, to_amount):
+        # name: posts small blind $0.01 [and is all-in]
+        words = action.split(" ", 4)
+        blind = _BLINDS.get(f"{words[1]} {words[2]}") if len(words) > 3 else None
+        if blind is None:
+            return _UNRECOGNIZED
+        return name, blind, to_amount(words[3])
+
+    def _parse_muck(self, name, action, to_amount):
+        return name, Action.MUCK, None
 
-    def _parse_cashed_out(self, line):
-        match = self._cash_out_re.match(line)
-        return match.group("name"), Action(match.group("action")), Decimal(match.group("amount"))
+    def _ignore(self, name, action, to_amount):
+        return None
+
+    def _parse_other_line(self, line, to_amount):
+        match = self._other_line_re.match(line)
+        if match is None:
+            return _UNRECOGNIZED
+        elif match.group("returned_to") is not None:
+            return match.group("returned_to"), Action.RETURN, to_amount(match.group("returned"))
+        elif match.group("collector") is not None:
+            return match.group("collector"), Action.WIN, to_amount(match.group("collected"))
+        elif match.group("cashed_out") is not None:
+            return match.group("cashed_out"), Action.CASH_OUT, to_amount(match.group("cash_out"))
+        # chat, joins, leaves, etc. are not actions
+        return None
+
+    # first word after "name: " -> parser method, called with the name and the action text
+    _COLON_ACTIONS = {
+        "folds": _parse_player_action,
+        "checks": _parse_player_action,
+        "calls": _parse_player_action,
+        "bets": _parse_player_action,
+        "raises": _parse_raise,
+        "posts": _parse_blind,
+        "doesn't": _parse_muck,
+        # shows, mucks and sitting out are ignored at the moment
+        "shows": _ignore,
+        "mucks": _ignore,
+        "sits": _ignore,
+    }
 
 
 @implementer(hh.IHandHistory)
-class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory):
-    """Parses PokerStars Tournament hands."""
+class PokerStarsHandHistory(hh._BaseHandHistory):
+    """Parses PokerStars Tournament hands.
+
+    Hands given as bytes, e.g. by :meth:`iter_hands` from a memory mapped file, are not decoded
+    as a whole. The sections are found by their offsets in the text and every parsing stage
+    decodes and splits only the lines it parses, so :meth:`parse_header` decodes only the first
+    line and a lazy :meth:`parse` leaves the streets which are never accessed alone.
+    """
 
+    _HAND_START = (b"PokerStars Hand #", b"PokerStars Zoom Hand #", b"PokerStars Game #")
     _DATE_FORMAT = "%Y/%m/%d %H:%M:%S ET"
     _TZ = pytz.timezone("US/Eastern")  # ET
-    _split_re = re.compile(r" ?\*\*\* ?\n?|\n")
+    # *** FLOP *** [Jc Td 2d], the rest of the line is part of the section
+    _marker_re = re.compile(r"^\*\*\* ?(?P<name>[^*\n]*?) ?\*\*\* ?", re.MULTILINE)
+    _marker_bytes_re = re.compile(_marker_re.pattern.encode(), re.MULTILINE)
     _header_re = re.compile(
         r"""
                         ^PokerStars\s+                                # Poker Room
@@ -172,12 +235,84 @@ class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory)
     _board_re = re.compile(r"(?<=[\[ ])(..)(?=[\] ])")
 
 
-    def parse_header(self):
-        # sections[0] is before HOLE CARDS
-        # sections[-1] is before SUMMARY
-        self._split_raw()
+    def _bytes_text(self, data):
+        # kept as bytes, the parsing stages decode only their own lines
+        data = bytes(data)
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        return data.replace(b"\r\n", b"\n") if b"\r" in data else data
+
+    @property
+    def raw(self):
+        """Text of the hand, hands given as bytes are decoded on first access."""
+        text = self._text
+        if isinstance(text, str):
+            return text
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raw = self._raw = text.decode("utf-8")
+        return raw
+
+    @raw.setter
+    def raw(self, text):
+        self._text = text
+        self.__dict__.pop("_raw", None)
+
+    def _decoded(self, start, stop):
+        part = self._text[start:stop]
+        return part if isinstance(part, str) else part.decode("utf-8")
+
+    def _line(self, start):
+        """The line starting at the offset and the offset of the next line."""
+        text = self._text
+        end = text.find("\n" if isinstance(text, str) else b"\n", start)
+        if end == -1:
+            end = len(text)
+        return self._decoded(start, end), end + 1
+
+    def _lines(self, start, stop):
+        """The non-empty lines between the offsets."""
+        return [line for line in self._decoded(start, stop).split("\n") if line]
+
+    def _section(self, name):
+        """The rest of the marker line of a section, e.g. the cards, and the lines after it.
+
+        :raises KeyError: if the hand has no such section
+        """
+        start, stop = self._markers[name]
+        rest, start = self._line(start)
+        return rest, self._lines(start, stop)
+
+    def _summary_lines(self):
+        """Lines of the SUMMARY section, decoded once for the pot, board and winners."""
+        if self._summary is None:
+            self._summary = self._section("SUMMARY")[1]
+        return self._summary
+
+    def _find_markers(self):
+        """Map section names to the ``(start, stop)`` offsets of their text after the
+        ``*** NAME ***`` marker, every section lasts until the next marker.
+        """
+        text = self._text
+        marker_re = self._marker_re if isinstance(text, str) else self._marker_bytes_re
+        self._markers = markers = {}
+        self._summary = None
+        name = start = None
+        self._players_end = len(text)
+        for match in marker_re.finditer(text, self._body_start):
+            if name is None:
+                self._players_end = match.start()
+            else:
+                markers.setdefault(name, (start, match.start()))
+            name, start = match.group("name"), match.end()
+            if not isinstance(name, str):
+                name = name.decode("ascii")
+        if name is not None:
+            markers.setdefault(name, (start, len(text)))
 
-        match = self._header_re.match(self._splitted[0])
+    def parse_header(self):
+        header, self._body_start = self._line(0)
+        match = self._header_re.match(header)
 
         self.extra = dict()
         self.ident = match.group("ident")
@@ -186,8 +321,8 @@ class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory)
         # and cash blind captures because a cash game play money blind looks exactly
         # like a tournament blind
 
-        self.sb = Decimal(match.group("sb") or match.group("cash_sb"))
-        self.bb = Decimal(match.group("bb") or match.group("cash_bb"))
+        sb = match.group("sb") or match.group("cash_sb")
+        bb = match.group("bb") or match.group("cash_bb")
 
         if match.group("tournament_ident"):
             self.game_type = GameType.TOUR
@@ -195,8 +330,9 @@ class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory)
             self.tournament_level = match.group("tournament_level")
 
             currency = match.group("currency")
-            self.buyin = Decimal(match.group("buyin") or 0)
-            self.rake = Decimal(match.group("rake") or 0)
+            money = self._amount_parser(money=True)
+            self.buyin = money(match.group("buyin") or "0")
+            self.rake = money(match.group("rake") or "0")
         else:
             self.game_type = GameType.CASH
             self.tournament_ident = None
@@ -215,6 +351,13 @@ class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory)
             self.extra["money_type"] = MoneyType.REAL
             self.currency = Currency(currency)
 
+        # tournament and play money amounts are chips
+        self._amount = self._amount_parser(
+            money=self.game_type == GameType.CASH and self.currency is not None
+        )
+        self.sb = self._amount(sb)
+        self.bb = self._amount(bb)
+
         self.game = Game(match.group("game"))
         self.limit = Limit(match.group("limit"))
 
@@ -222,83 +365,161 @@ class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory)
 
         self.header_parsed = True
 
-    def parse(self):
-        """Parses the body of the hand history, but first parse header if not yet parsed."""
+    def _parse_date(self, date_string):
+        # 2013/10/04 13:53:27 ET, the hour can be one digit
+        date, _, time = date_string.strip().partition(" ")
+        time, _, zone = time.partition(" ")
+        try:
+            year, month, day = date.split("/")
+            hour, minute, second = time.split(":")
+            if zone != "ET":
+                raise ValueError(zone)
+            self._set_date(int(year), int(month), int(day), int(hour), int(minute), int(second))
+        except ValueError:
+            # strptime gives the usual error for malformed dates
+            super()._parse_date(date_string)
+
+    # attributes computed on first access after parse(lazy=True): method name and arguments
+    _LAZY_STAGES = {
+        "preflop": ("_parse_preflop",),
+        "flop": ("_parse_street", "FLOP"),
+        "turn": ("_parse_street", "TURN"),
+        "river": ("_parse_street", "RIVER"),
+        "show_down": ("_parse_showdown",),
+        "winners": ("_parse_winners",),
+        "earnings": ("_calculate_earnings",),
+        "results": ("_calculate_earnings",),
+        "rake_shares": ("_calculate_earnings",),
+    }
+
+    def parse(self, lazy=False):
+        """Parses the body of the hand history, but first parse header if not yet parsed.
+
+        With ``lazy=True`` only the table, players, button, hero and total pot are parsed, the
+        streets, showdown, winners and earnings are parsed on first access. Showdown combos of
+        the players are only set after ``winners`` is accessed and the board is not validated.
+        """
         if not self.header_parsed:
             self.parse_header()
 
+        self._find_markers()
         self._parse_table()
         self._parse_players()
         self._parse_button()
         self._parse_hero()
-        self._parse_preflop()
-        self._parse_street("FLOP")
-        self._parse_street("TURN")
-        self._parse_street("RIVER")
-        self._parse_showdown()
         self._parse_pot()
-        self._parse_board()
-        self._parse_winners()
-        self._calculate_earnings()
 
-        self._del_split_vars()
+        if lazy:
+            self._lazy = True
+        else:
+            self._parse_preflop()
+            self._parse_street("FLOP")
+            self._parse_street("TURN")
+            self._parse_street("RIVER")
+            self._parse_showdown()
+            self._parse_board()
+            self._parse_winners()
+            self._calculate_earnings()
         self.parsed = True
 
-    def _calculate_earnings(self):
-        earnings = Decimal(0)
-        all_actions = []
-        if self.preflop is not None and self.preflop.actions is not None:
-            all_actions.extend(list(filter(lambda action : action.name == self.hero.name, self.preflop.actions)))
-        if self.flop is not None and self.flop.actions is not None:
-            all_actions.extend(list(filter(lambda action : action.name == self.hero.name, self.flop.actions)))
-        if self.turn is not None and self.turn.actions is not None:
-            all_actions.extend(list(filter(lambda action: action.name == self.hero.name, self.turn.actions)))
-        if self.river is not None and self.river.actions is not None:
-            all_actions.extend(list(filter(lambda action : action.name == self.hero.name, self.river.actions)))
-        if self.show_down is not None and self.show_down.actions is not None:
-            all_actions.extend(list(filter(lambda action : action.name == self.hero.name, self.show_down.actions)))
-
-        for action in all_actions:
-            if action.action in [Action.BET, Action.RAISE, Action.CALL, Action.SB, Action.BB]:
-                earnings -= action.amount
-            elif action.action in [Action.WIN, Action.CASH_OUT, Action.RETURN]:
-                earnings += action.amount
-        self.earnings = earnings
+    @property
+    def diagnostics(self):
+        """Unrecognized action lines of every street."""
+        streets = self.preflop, self.flop, self.turn, self.river, self.show_down
+        return [line for street in streets if street is not None for line in street.diagnostics]
+
+    def __getattr__(self, name):
+        # only called when the attribute is not set yet
+        stage = self._LAZY_STAGES.get(name)
+        if stage is None or not self.__dict__.get("_lazy", False):
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
+        method_name, *args = stage
+        getattr(self, method_name)(*args)
+        return self.__dict__[name]
 
+    def _calculate_earnings(self):
+        zero = self._amount("0")
+        results = {
+            player.name: zero
+            for player in self.players
+            if player.name != f"Empty Seat {player.seat}"
+        }
+        for name, amount in self._dead_money.items():
+            results[name] = results.get(name, zero) - amount
+        for name, amount in self._live_blinds.items():
+            results[name] = results.get(name, zero) - amount
+        won = {}
+        for street in (self.preflop, self.flop, self.turn, self.river, self.show_down):
+            if street is None or street.actions is None:
+                continue
+            # raises are "to" the total the player put in on the street
+            put_in = dict(self._live_blinds) if street is self.preflop else {}
+            for action in street.actions:
+                kind, name, amount = action.action, action.name, action.amount
+                if kind is Action.RAISE:
+                    results[name] = results.get(name, zero) - (amount - put_in.get(name, zero))
+                    put_in[name] = amount
+                elif kind in _PUT_IN:
+                    results[name] = results.get(name, zero) - amount
+                    put_in[name] = put_in.get(name, zero) + amount
+                elif kind in _TAKEN:
+                    results[name] = results.get(name, zero) + amount
+                    if kind is Action.WIN:
+                        won[name] = won.get(name, zero) + amount
+        self.results = results
+        self.rake_shares = _rake_shares(self.pot_rake, won)
+        self.earnings = results.get(self.hero.name, zero)
 
     def _parse_table(self):
-        self._table_match = self._table_re.match(self._splitted[1])
+        table, self._players_start = self._line(self._body_start)
+        self._table_match = self._table_re.match(table)
         self.table_name = self._table_match.group(1)
         self.max_players = int(self._table_match.group(2))
 
     def _parse_players(self):
         self.players = self._init_seats(self.max_players)
-        for line in self._splitted[2:self._sections[0]]:
+        self._blind_lines = []
+        # antes and the dead small blind part of "small & big blinds" by name, they are in the
+        # pot, but not put in on the street, and the live big blind part of the latter
+        self._dead_money, self._live_blinds = {}, {}
+        for line in self._lines(self._players_start, self._players_end):
             match = self._seat_re.match(line)
             if bool(match):
                 index = int(match.group("seat")) - 1
                 self.players[index] = hh._Player(
                     name=match.group("name"),
-                    stack=Decimal(match.group("stack")),
+                    stack=self._amount(match.group("stack")),
                     seat=int(match.group("seat")),
                     combo=None,
                 )
             # we reached the end of the players section
-            else:
-                if "posts small blind" in line:
-                    self._small_blind_line = line
-                elif "posts big blind" in line:
-                    self._big_blind_line = line
-                # else ignore
-
-
+            # players joining the table can post an extra big blind, every blind is kept
+            elif "posts small blind" in line or "posts big blind" in line:
+                self._blind_lines.append(line)
+            elif "posts the ante" in line or "posts small & big blinds" in line:
+                self._parse_dead_money(line)
+
+    def _parse_dead_money(self, line):
+        # name: posts the ante 75 [and is all-in]
+        # name: posts small & big blinds $0.03 [and is all-in]
+        name, _, posted = line.rpartition(": posts ")
+        words = posted.split(" ")
+        if words[0] == "the":
+            dead = self._amount(words[2])
+        else:
+            amount = self._amount(words[4])
+            live = self._live_blinds[name] = min(amount, self.bb)
+            dead = amount - live
+        self._dead_money[name] = self._dead_money.get(name, 0) + dead
 
     def _parse_button(self):
         button_seat = int(self._table_match.group("button"))
         self.button = self.players[button_seat - 1]
 
     def _parse_hero(self):
-        hole_cards_line = self._splitted[self._sections[0] + 2]
+        start, _ = self._markers["HOLE CARDS"]
+        _, start = self._line(start)
+        hole_cards_line, self._preflop_start = self._line(start)
         match = self._hero_re.match(hole_cards_line)
         hero, hero_index = self._get_hero_from_players(match.group("hero_name"))
         hero.combo = Combo(match.group(2) + match.group(3))
@@ -307,69 +528,51 @@ class PokerStarsHandHistory(hh._SplittableHandHistoryMixin, hh._BaseHandHistory)
             self.button = hero
 
     def _parse_preflop(self):
-        start = self._sections[0] + 3
-        stop = self._sections[1]
+        _, stop = self._markers["HOLE CARDS"]
         nocards = [""]  # cause no cards are dealt
-        if self._small_blind_line is not None:
-            nocards.append(self._small_blind_line)
-        if self._big_blind_line is not None:
-            nocards.append(self._big_blind_line)
-        nocards.extend(self._splitted[start:stop])
-        preflop = _Street(nocards)
+        nocards.extend(self._blind_lines)
+        nocards.extend(self._lines(self._preflop_start, stop))
+        preflop = _Street(nocards, self._amount)
         self.preflop = preflop
 
     def _parse_street(self, street_name):
         try:
-            start = self._splitted.index(street_name) + 1
-        except ValueError:
-            setattr(
-                self,
-                f"{street_name.lower()}",
-                None,
-            )
+            cards, lines = self._section(street_name)
+        except KeyError:
+            setattr(self, street_name.lower(), None)
             return
-        stop = self._splitted.index("", start)
-        streetlines = self._splitted[start:stop]
-        street = _Street(streetlines)
-        setattr(
-            self,
-            f"{street_name.lower()}",
-            street,
-        )
+        street = _Street([cards, *lines], self._amount)
+        setattr(self, street_name.lower(), street)
 
     def _parse_showdown(self):
-        if "SHOW DOWN" in self._splitted:
-            showdown_lines = []
-            start_showdown = self._splitted.index("SHOW DOWN")
-            end_showdown = self._splitted.index("SUMMARY")
-            showdown_lines.extend(self._splitted[start_showdown+1:end_showdown-1])
-            street = _Street(showdown_lines)
-            self.show_down = street
-        else:
+        try:
+            _, lines = self._section("SHOW DOWN")
+        except KeyError:
             self.show_down = None
+        else:
+            self.show_down = _Street(["", *lines], self._amount)
 
     def _parse_pot(self):
-        potline = self._splitted[self._sections[-1] + 2]
+        potline = self._summary_lines()[0]
         match = self._pot_re.match(potline)
-        self.total_pot = Decimal(match.group(1))
+        self.total_pot = self._amount(match.group(1))
+        self.pot_rake = self._amount(match.group(2))
 
     def _parse_board(self):
-        boardline = self._splitted[self._sections[-1] + 3]
+        boardline = self._summary_lines()[1]
         if not boardline.startswith("Board"):
             return
         cardsstr = self._board_re.findall(boardline)
-        i = 0
         # value is not needed to set cause board is populated by property in
         # _BaseHandHistory#board
-        for card in cardsstr:
-            if self.board[i] != Card(card):
+        board = self.board
+        for ind, card in enumerate(cardsstr):
+            if board[ind] != Card(card):
                 raise RuntimeError("Boardcard not in Board as expected")
-            i += 1
 
     def _parse_winners(self):
         winners = set()
-        start = self._sections[-1] + 4
-        for line in self._splitted[start:]:
+        for line in self._summary_lines()[2:]:
             if not self.show_down and "collected" in line:
                 match = self._winner_re.match(line)
                 winners.add(self._clean_name(match.group(2)))
@@ -0,0 +1,424 @@
+"""
+    Player statistics (VPIP, PFR, 3-bet, AF, WTSD, W$SD) computed from a stream of parsed hands.
+"""
+
+import os
+import sys
+import array
+import struct
+from collections import deque
+from concurrent import futures
+import attr
+from . import handhistory
+from .constants import Action
+
+
+__all__ = [
+    "COUNTERS",
+    "PlayerStats",
+    "StatsAccumulator",
+    "accumulate_many",
+    "result_series",
+    "result_series_by_player",
+]
+
+
+COUNTERS = (
+    "hands",
+    "voluntarily_put",
+    "preflop_raised",
+    "three_bets",
+    "three_bet_chances",
+    "postflop_aggressive",
+    "postflop_calls",
+    "saw_flop",
+    "went_to_showdown",
+    "won_at_showdown",
+)
+"""Counters kept for every player, in the order of :class:`PlayerStats` attributes."""
+
+(
+    _HANDS,
+    _VPIP,
+    _PFR,
+    _THREE_BETS,
+    _THREE_BET_CHANCES,
+    _AGGRESSIVE,
+    _CALLS,
+    _SAW_FLOP,
+    _WENT_TO_SHOWDOWN,
+    _WON_AT_SHOWDOWN,
+) = range(len(COUNTERS))
+
+_ZEROS = array.array("q", bytes(8 * len(COUNTERS)))
+
+# magic, version, hero_only, counters per player, hands, skipped, players, length of the names
+_HEADER = struct.Struct("<4sBBHQQQQ")
+_MAGIC = b"PKST"
+_VERSION = 1
+
+_FOLD, _CALL, _BET, _RAISE = Action.FOLD, Action.CALL, Action.BET, Action.RAISE
+_DECISIONS = frozenset((Action.CHECK, _CALL, _BET, _RAISE))
+
+
+def _ratio(count, total):
+    return count / total if total else None
+
+
+@attr.s(slots=True, frozen=True)
+class PlayerStats:
+    """Counters of one player, the stats are fractions between 0 and 1 or None when the player
+    had no chance yet.
+    """
+
+    name = attr.ib()
+    hands = attr.ib()
+    """Number of hands the player was dealt in."""
+    voluntarily_put = attr.ib()
+    """Hands with a preflop call or raise, blinds don't count."""
+    preflop_raised = attr.ib()
+    three_bets = attr.ib()
+    """Hands the player re-raised the first preflop raise."""
+    three_bet_chances = attr.ib()
+    """Hands the player had to act facing exactly one preflop raise."""
+    postflop_aggressive = attr.ib()
+    """Number of bets and raises on the flop, turn and river."""
+    postflop_calls = attr.ib()
+    saw_flop = attr.ib()
+    went_to_showdown = attr.ib()
+    won_at_showdown = attr.ib()
+
+    @property
+    def vpip(self):
+        return _ratio(self.voluntarily_put, self.hands)
+
+    @property
+    def pfr(self):
+        return _ratio(self.preflop_raised, self.hands)
+
+    @property
+    def three_bet(self):
+        return _ratio(self.three_bets, self.three_bet_chances)
+
+    @property
+    def af(self):
+        """Aggression factor: postflop bets and raises per call, not a fraction."""
+        return _ratio(self.postflop_aggressive, self.postflop_calls)
+
+    @property
+    def wtsd(self):
+        """Went to showdown after seeing the flop."""
+        return _ratio(self.went_to_showdown, self.saw_flop)
+
+    @property
+    def wsd(self):
+        """Won money at showdown (W$SD)."""
+        return _ratio(self.won_at_showdown, self.went_to_showdown)
+
+
+class StatsAccumulator:
+    """Count the actions of every player in parsed hands, one hand at a time.
+
+    Every hand is processed in one pass over its actions, nothing is kept from it. Player names
+    are interned to ids and the counters of every player are stored in one flat array of int64
+    (80 bytes per player), see :data:`COUNTERS`.
+
+    The preflop actions are needed, so only hands with preflop streets are counted (PokerStars),
+    hands of parsers which keep only the raw preflop lines are counted in :attr:`skipped`.
+
+    Accumulators of separate shards of hands can be combined with :meth:`merge`, the result is
+    the same as counting every hand with one accumulator. :meth:`to_bytes` is a compact
+    serialization for sending them between processes or machines, it's also used for pickling.
+
+    :param bool hero_only:  count only the actions of the hero of every hand
+    """
+
+    def __init__(self, hero_only=False):
+        self.hero_only = hero_only
+        self.hands = 0
+        """Number of counted hands."""
+        self.skipped = 0
+        """Number of hands without preflop actions."""
+        self.names = []
+        """Player names by id."""
+        self._ids = {}
+        self._counters = array.array("q")
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __getitem__(self, name):
+        base = self._ids[name] * len(COUNTERS)
+        return PlayerStats(name, *self._counters[base:base + len(COUNTERS)])
+
+    def __iter__(self):
+        return (self[name] for name in self.names)
+
+    def __eq__(self, other):
+        if not isinstance(other, StatsAccumulator):
+            return NotImplemented
+        return self.to_bytes() == other.to_bytes()
+
+    def __reduce__(self):
+        return StatsAccumulator.from_bytes, (self.to_bytes(),)
+
+    def merge(self, other):
+        """Add the counters of an other accumulator to this one, return self.
+
+        New players get their ids in the order of ``other``, so merging the accumulators of
+        consecutive shards in order gives the same player ids as a serial run.
+        """
+        if other.hero_only != self.hero_only:
+            raise ValueError("Can't merge hero only and every player statistics")
+        self.hands += other.hands
+        self.skipped += other.skipped
+        counters, other_counters = self._counters, other._counters
+        width = len(COUNTERS)
+        for other_base, name in zip(range(0, len(other_counters), width), other.names):
+            base = self._base(name)
+            for ind in range(width):
+                counters[base + ind] += other_counters[other_base + ind]
+        return self
+
+    def to_bytes(self):
+        """Serialize to a header, the UTF-8 player names and the counters as little endian int64."""
+        names = "\0".join(self.names).encode("utf-8")
+        counters = self._counters
+        if sys.byteorder == "big":
+            counters = array.array("q", counters)
+            counters.byteswap()
+        header = _HEADER.pack(
+            _MAGIC,
+            _VERSION,
+            self.hero_only,
+            len(COUNTERS),
+            self.hands,
+            self.skipped,
+            len(self.names),
+            len(names),
+        )
+        return header + names + counters.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load an accumulator serialized by :meth:`to_bytes`."""
+        magic, version, hero_only, width, hands, skipped, players, names_size = (
+            _HEADER.unpack_from(data)
+        )
+        if magic != _MAGIC or version != _VERSION or width != len(COUNTERS):
+            raise ValueError("Not a serialized StatsAccumulator of this version")
+        self = cls(bool(hero_only))
+        self.hands, self.skipped = hands, skipped
+        start = _HEADER.size
+        if players:
+            self.names = data[start:start + names_size].decode("utf-8").split("\0")
+        self._ids = {name: player_id for player_id, name in enumerate(self.names)}
+        self._counters.frombytes(data[start + names_size:])
+        if sys.byteorder == "big":
+            self._counters.byteswap()
+        if len(self.names) != players or len(self._counters) != players * width:
+            raise ValueError("Truncated StatsAccumulator")
+        return self
+
+    def _base(self, name):
+        try:
+            player_id = self._ids[name]
+        except KeyError:
+            player_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+            self._counters.extend(_ZEROS)
+        return player_id * len(COUNTERS)
+
+    def add_many(self, hands):
+        for hand in hands:
+            self.add(hand)
+
+    def add(self, hand):
+        """Count the actions of a parsed hand."""
+        preflop_actions = getattr(getattr(hand, "preflop", None), "actions", None)
+        if not preflop_actions:
+            self.skipped += 1
+            return
+        self.hands += 1
+
+        # counters of this hand for every player who acted preflop, in order of COUNTERS
+        rows = {}
+        folded = set()
+        raises = 0
+        for action in preflop_actions:
+            name, kind = action.name, action.action
+            row = rows.get(name)
+            if row is None:
+                row = rows[name] = [1, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+            if kind is _FOLD:
+                folded.add(name)
+            elif kind not in _DECISIONS:
+                # blinds, returned bets, wins, etc.
+                continue
+            if raises == 1 and not row[_THREE_BET_CHANCES]:
+                row[_THREE_BET_CHANCES] = 1
+                if kind is _RAISE or kind is _BET:
+                    row[_THREE_BETS] = 1
+            if kind is _CALL:
+                row[_VPIP] = 1
+            elif kind is _RAISE or kind is _BET:
+                row[_VPIP] = row[_PFR] = 1
+                raises += 1
+
+        flop = getattr(hand, "flop", None)
+        if flop is not None:
+            for name, row in rows.items():
+                if name not in folded:
+                    row[_SAW_FLOP] = 1
+            for street in (flop, getattr(hand, "turn", None), getattr(hand, "river", None)):
+                # some rooms have only the card of the turn and river, not a street
+                for action in getattr(street, "actions", None) or ():
+                    row = rows.get(action.name)
+                    if row is None:
+                        continue
+                    kind = action.action
+                    if kind is _BET or kind is _RAISE:
+                        row[_AGGRESSIVE] += 1
+                    elif kind is _CALL:
+                        row[_CALLS] += 1
+                    elif kind is _FOLD:
+                        folded.add(action.name)
+
+            if getattr(hand, "show_down", None):
+                # winner names can have a trailing space left from "(button)"
+                winners = {
+                    getattr(winner, "name", winner).rstrip() for winner in hand.winners or ()
+                }
+                for name, row in rows.items():
+                    if row[_SAW_FLOP] and name not in folded:
+                        row[_WENT_TO_SHOWDOWN] = 1
+                        row[_WON_AT_SHOWDOWN] = int(name in winners)
+
+        if self.hero_only:
+            hero = getattr(hand, "hero", None)
+            row = rows.get(hero.name) if hero is not None else None
+            rows = {hero.name: row} if row is not None else {}
+        counters = self._counters
+        for name, row in rows.items():
+            base = self._base(name)
+            for ind, value in enumerate(row):
+                counters[base + ind] += value
+
+
+def _accumulate_range(path, room, start, end, hero_only):
+    """Count the hands starting in the byte range of a file in a worker process."""
+    accumulator = StatsAccumulator(hero_only)
+    try:
+        for _, hand in handhistory.range_hands(path, room, start, end):
+            try:
+                hand.parse()
+            except Exception:
+                continue
+            accumulator.add(hand)
+    except OSError:
+        # the file can't be read anymore, ignored like unreadable files
+        return StatsAccumulator(hero_only).to_bytes()
+    return accumulator.to_bytes()
+
+
+def accumulate_many(paths, workers=None, chunksize=16 * 1024 * 1024, hero_only=False):
+    """Count the hands of hand history files in parallel with a process pool.
+
+    Files are split to byte ranges by :func:`poker.handhistory.file_ranges`, every worker
+    counts its own range and sends back the serialized accumulator, which are merged in file
+    order, so the result is the same as counting the hands in one process.
+    Hands failing to parse, files of unknown rooms and files which can't be read are ignored.
+
+    :rtype: StatsAccumulator
+    """
+    max_workers = workers or os.cpu_count() or 1
+    # only keep a few tasks ahead, so results don't pile up in memory
+    window = 2 * max_workers
+    result = StatsAccumulator(hero_only)
+    with futures.ProcessPoolExecutor(max_workers) as executor:
+        pending = deque()
+        for task in handhistory.file_ranges(paths, chunksize):
+            pending.append(executor.submit(_accumulate_range, *task, hero_only))
+            if len(pending) >= window:
+                result.merge(StatsAccumulator.from_bytes(pending.popleft().result()))
+        while pending:
+            result.merge(StatsAccumulator.from_bytes(pending.popleft().result()))
+    return result
+
+
+def _series(np, results, bbs):
+    cumulative = np.cumsum(results)
+    bb_per_100 = np.cumsum(results / bbs) * 100 / np.arange(1, len(results) + 1)
+    return cumulative, bb_per_100
+
+
+def result_series(hands, player=None):
+    """Results of a player after every hand they were seated in, for graphs. Needs numpy.
+
+    Uses the ``results`` of the hands (PokerStars), hands without them are skipped.
+
+    :param hands:   parsed hands in the order of the graph, e.g. by date
+    :param str player:  name of the player, the hero of every hand by default
+    :return: ``(cumulative, bb_per_100)`` float64 arrays: the cumulative net result and
+             the win rate in big blinds per 100 hands so far, one item for every hand
+    """
+    import numpy as np
+
+    results, bbs = [], []
+    for hand in hands:
+        hand_results = getattr(hand, "results", None)
+        if hand_results is None:
+            continue
+        result = hand_results.get(player if player is not None else hand.hero.name)
+        if result is not None:
+            results.append(result)
+            bbs.append(hand.bb)
+    return _series(np, np.array(results, dtype=float), np.array(bbs, dtype=float))
+
+
+def result_series_by_player(hands):
+    """:func:`result_series` of every player, in one pass over the hands. Needs numpy.
+
+    :return: ``{name: (cumulative, bb_per_100)}``
+    """
+    import numpy as np
+
+    ids, player_ids, results, bbs = {}, [], [], []
+    for hand in hands:
+        hand_results = getattr(hand, "results", None)
+        if hand_results is None:
+            continue
+        for name, result in hand_results.items():
+            player_id = ids.get(name)
+            if player_id is None:
+                player_id = ids[name] = len(ids)
+            player_ids.append(player_id)
+            results.append(result)
+            bbs.append(hand.bb)
+    if not ids:
+        return {}
+
+    # group the hands of every player, keeping their order, then cumulate every group at once
+    order = np.argsort(np.array(player_ids, dtype=np.int64), kind="stable")
+    results = np.array(results, dtype=float)[order]
+    in_bb = results / np.array(bbs, dtype=float)[order]
+    counts = np.bincount(np.array(player_ids, dtype=np.int64), minlength=len(ids))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    def cumulate(values):
+        sums = np.cumsum(values)
+        before_group = np.concatenate(([0.0], sums))[starts]
+        return sums - np.repeat(before_group, counts)
+
+    hands_played = np.arange(1, len(results) + 1) - np.repeat(starts, counts)
+    cumulative = cumulate(results)
+    bb_per_100 = cumulate(in_bb) * 100 / hands_played
+    ends = np.cumsum(counts)
+    return {
+        name: (cumulative[starts[player_id]:ends[player_id]],
+               bb_per_100[starts[player_id]:ends[player_id]])
+        for name, player_id in ids.items()
+    }
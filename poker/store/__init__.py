@@ -0,0 +1,3 @@
+"""
+    Persistent stores of parsed hand histories.
+"""
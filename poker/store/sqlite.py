@@ -0,0 +1,331 @@
+"""
+    Normalized SQLite store of parsed hand histories for bulk imports.
+"""
+
+import sqlite3
+from decimal import Decimal
+import attr
+from .. import handhistory, _lookup
+from ..card import Card
+from .._common import _utc_iso
+
+
+__all__ = ["HandStore", "StoreStats", "STREETS"]
+
+
+STREETS = ("preflop", "flop", "turn", "river", "show_down")
+"""The ``street`` column of the streets and actions tables is the index in this tuple."""
+
+
+# the rows of the child tables are clustered by hand_id, which is increasing on inserts
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS hands (
+    id INTEGER PRIMARY KEY,
+    room TEXT NOT NULL,
+    ident TEXT NOT NULL,
+    date TEXT,
+    game_type TEXT,
+    game TEXT,
+    "limit" TEXT,
+    currency TEXT,
+    sb NUMERIC,
+    bb NUMERIC,
+    buyin NUMERIC,
+    buyin_rake NUMERIC,
+    total_pot NUMERIC,
+    pot_rake NUMERIC,
+    tournament_ident TEXT,
+    tournament_level TEXT,
+    table_name TEXT,
+    max_players INTEGER,
+    button_seat INTEGER,
+    hero_id INTEGER REFERENCES players (id),
+    earnings NUMERIC,
+    board TEXT,
+    UNIQUE (room, ident)
+);
+CREATE TABLE IF NOT EXISTS seats (
+    hand_id INTEGER NOT NULL REFERENCES hands (id),
+    seat INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    stack NUMERIC,
+    combo TEXT,
+    PRIMARY KEY (hand_id, seat)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS streets (
+    hand_id INTEGER NOT NULL REFERENCES hands (id),
+    street INTEGER NOT NULL,
+    cards TEXT,
+    pot NUMERIC,
+    PRIMARY KEY (hand_id, street)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS actions (
+    hand_id INTEGER NOT NULL REFERENCES hands (id),
+    street INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    action TEXT NOT NULL,
+    amount NUMERIC,
+    PRIMARY KEY (hand_id, street, position)
+) WITHOUT ROWID;
+"""
+
+# secondary indexes are created after the bulk inserts, maintaining them row by row is slower
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS hands_date ON hands (date);
+CREATE INDEX IF NOT EXISTS hands_stakes ON hands (bb, sb);
+CREATE INDEX IF NOT EXISTS hands_hero ON hands (hero_id);
+CREATE INDEX IF NOT EXISTS seats_player ON seats (player_id);
+CREATE INDEX IF NOT EXISTS actions_player ON actions (player_id);
+"""
+
+_HAND_COLUMNS = (
+    "id", "room", "ident", "date", "game_type", "game", '"limit"', "currency", "sb", "bb",
+    "buyin", "buyin_rake", "total_pot", "pot_rake", "tournament_ident", "tournament_level",
+    "table_name", "max_players", "button_seat", "hero_id", "earnings", "board",
+)
+
+
+def _insert(table, columns):
+    placeholders = ", ".join("?" * len(columns))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+_INSERT_HAND = _insert("hands", _HAND_COLUMNS)
+_INSERT_SEAT = _insert("seats", ("hand_id", "seat", "player_id", "stack", "combo"))
+_INSERT_STREET = _insert("streets", ("hand_id", "street", "cards", "pot"))
+_INSERT_ACTION = _insert(
+    "actions", ("hand_id", "street", "position", "player_id", "action", "amount")
+)
+
+
+def _amount(value):
+    # sqlite3 can't bind Decimals, integer amounts are stored exactly
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _name(value):
+    return value.name if value is not None else None
+
+
+def _cards(cards):
+    if not cards:
+        return None
+    return "".join([_lookup.card_str(card) for card in cards])
+
+
+def _board(hand):
+    # some rooms have only the card of the turn and river, not a street
+    cards = list(getattr(getattr(hand, "flop", None), "cards", None) or ())
+    for street in (getattr(hand, "turn", None), getattr(hand, "river", None)):
+        if isinstance(street, Card):
+            cards.append(street)
+        elif street is not None and street.cards:
+            cards = list(street.cards)
+    return _cards(cards)
+
+
+@attr.s(slots=True)
+class StoreStats:
+    """Result of :meth:`HandStore.add_many`."""
+
+    inserted = attr.ib(default=0)
+    duplicates = attr.ib(default=0)
+    """Hands already in the store or earlier in the same batch, which were skipped."""
+
+
+class HandStore:
+    """Normalized SQLite store of parsed hand histories: hands, players, seats, streets and
+    actions tables.
+
+    Hands are buffered and inserted ``batch_size`` at a time with ``executemany`` in one
+    transaction, the database is in WAL mode. ``(room, ident)`` is unique, so importing the same
+    hands again only counts them as duplicates. Secondary indexes are created on :meth:`close`
+    or :meth:`create_indexes`, after the bulk inserts.
+
+    Every parser of :mod:`poker.room` is accepted, attributes a room doesn't have are NULL.
+    Amounts are stored exactly when the hands are parsed with ``integer_amounts=True``,
+    Decimals are stored as floats.
+
+    :param path:            SQLite database file path
+    :param int batch_size:  number of hands inserted in one transaction
+    """
+
+    def __init__(self, path, batch_size=10000):
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # the WAL is still consistent after a crash, only the last transactions can be lost
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.batch_size = batch_size
+        self._batch = []
+        self._rooms = handhistory._parser_rooms()
+        self._stats = StoreStats()
+        self._load_ids()
+
+    def _load_ids(self):
+        self._player_ids = dict(self._db.execute("SELECT name, id FROM players"))
+        query = "SELECT coalesce(max(id), 0) + 1 FROM hands"
+        self._next_hand_id = self._db.execute(query).fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        self.flush()
+        return self._db.execute("SELECT count(*) FROM hands").fetchone()[0]
+
+    def add(self, hand):
+        """Buffer a parsed hand history, the batch is inserted when it's full."""
+        self._batch.append(hand)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, hands):
+        """Insert every parsed hand history.
+
+        :rtype: StoreStats
+        """
+        self._stats = StoreStats()
+        for hand in hands:
+            self.add(hand)
+        self.flush()
+        return self._stats
+
+    def flush(self):
+        """Insert the buffered hands in one transaction."""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            with self._db:
+                self._insert(batch)
+        except BaseException:
+            # the transaction is rolled back, forget the ids given out in it
+            self._load_ids()
+            raise
+
+    def create_indexes(self):
+        self.flush()
+        self._db.executescript(_INDEXES)
+
+    def close(self):
+        """Insert the buffered hands, create the indexes and close the database."""
+        self.create_indexes()
+        self._db.close()
+
+    def execute(self, sql, parameters=()):
+        """Run a query on the store, e.g. ``store.execute("SELECT count(*) FROM actions")``."""
+        self.flush()
+        return self._db.execute(sql, parameters)
+
+    def _insert(self, batch):
+        keys = [(self._room(hand).name, hand.ident) for hand in batch]
+        existing = self._existing(keys)
+        new_players = []
+        hand_rows, seat_rows, street_rows, action_rows = [], [], [], []
+
+        def player_id(name):
+            try:
+                return self._player_ids[name]
+            except KeyError:
+                new_id = self._player_ids[name] = len(self._player_ids) + 1
+                new_players.append((new_id, name))
+                return new_id
+
+        for key, hand in zip(keys, batch):
+            if key in existing:
+                self._stats.duplicates += 1
+                continue
+            existing.add(key)
+            hand_id = self._next_hand_id
+            self._next_hand_id += 1
+
+            hero, button = getattr(hand, "hero", None), getattr(hand, "button", None)
+            date = getattr(hand, "date", None)
+            hand_rows.append((
+                hand_id,
+                key[0],
+                key[1],
+                _utc_iso(date) if date is not None else None,
+                _name(getattr(hand, "game_type", None)),
+                _name(getattr(hand, "game", None)),
+                _name(getattr(hand, "limit", None)),
+                _name(getattr(hand, "currency", None)),
+                _amount(getattr(hand, "sb", None)),
+                _amount(getattr(hand, "bb", None)),
+                _amount(getattr(hand, "buyin", None)),
+                _amount(handhistory._buyin_rake(hand)),
+                _amount(getattr(hand, "total_pot", None)),
+                _amount(getattr(hand, "pot_rake", None)),
+                getattr(hand, "tournament_ident", None),
+                getattr(hand, "tournament_level", None),
+                getattr(hand, "table_name", None),
+                getattr(hand, "max_players", None),
+                button.seat if button is not None else None,
+                player_id(hero.name) if hero is not None else None,
+                _amount(getattr(hand, "earnings", None)),
+                _board(hand),
+            ))
+
+            for player in getattr(hand, "players", None) or ():
+                if player.name == f"Empty Seat {player.seat}":
+                    continue
+                combo = str(player.combo) if player.combo is not None else None
+                seat_rows.append(
+                    (hand_id, player.seat, player_id(player.name), _amount(player.stack), combo)
+                )
+
+            for street_code, street_name in enumerate(STREETS):
+                street = getattr(hand, street_name, None)
+                # some rooms have only the action lines or the card of a street
+                if not hasattr(street, "actions"):
+                    continue
+                street_rows.append(
+                    (hand_id, street_code, _cards(street.cards), _amount(street.pot))
+                )
+                for position, action in enumerate(street.actions or ()):
+                    action_rows.append((
+                        hand_id,
+                        street_code,
+                        position,
+                        player_id(action.name),
+                        action.action._name_,
+                        _amount(action.amount),
+                    ))
+
+        self._db.executemany("INSERT INTO players (id, name) VALUES (?, ?)", new_players)
+        self._db.executemany(_INSERT_HAND, hand_rows)
+        self._db.executemany(_INSERT_SEAT, seat_rows)
+        self._db.executemany(_INSERT_STREET, street_rows)
+        self._db.executemany(_INSERT_ACTION, action_rows)
+        self._stats.inserted += len(hand_rows)
+
+    def _room(self, hand):
+        try:
+            return self._rooms[type(hand)]
+        except KeyError:
+            raise ValueError(f"{type(hand).__name__} is not a registered parser") from None
+
+    def _existing(self, keys):
+        idents_by_room = {}
+        for room, ident in keys:
+            idents_by_room.setdefault(room, []).append(ident)
+        existing = set()
+        for room, idents in idents_by_room.items():
+            # stay under the SQLite limit of bound parameters
+            for start in range(0, len(idents), 900):
+                chunk = idents[start:start + 900]
+                query = (
+                    f"SELECT room, ident FROM hands "
+                    f"WHERE room = ? AND ident IN ({', '.join('?' * len(chunk))})"
+                )
+                existing.update(self._db.execute(query, [room, *chunk]))
+        return existing
@@ -0,0 +1,401 @@
+"""
+    Compact binary encoding of parsed hand histories for sending them between processes.
+"""
+
+import struct
+from decimal import Decimal
+from datetime import datetime
+import pytz
+from . import _lookup
+from .card import Card
+from .hand import Combo
+from .constants import Game, GameType, Limit, Currency, MoneyType, Action
+from .handhistory import _Player, _PlayerAction
+from .jsonencoding import JsonHand, JsonStreet
+
+
+__all__ = ["VERSION", "encode_hand", "decode_hand", "encode_batch", "decode_batch"]
+
+
+VERSION = 1
+"""Version of the format, written in the header of every batch."""
+
+_HEADER = struct.Struct("<3sB")
+_MAGIC = b"PKW"
+
+_NONE = 0xFF
+
+# one byte codes: card id of the card, index of the enum member in its tuple
+_CARDS = _lookup.CARDS
+_ACTION_CODES = {action: code for code, action in enumerate(Action)}
+_ACTIONS = tuple(Action)
+_HAS_AMOUNT = 0x80
+_ENUMS = (Game, GameType, Limit, Currency, MoneyType)
+_ENUM_CODES = {
+    enum_class: {member: code for code, member in enumerate(enum_class)} for enum_class in _ENUMS
+}
+_ENUM_MEMBERS = {enum_class: tuple(enum_class) for enum_class in _ENUMS}
+
+# bits of the flags of a hand
+_DECIMAL = 1 << 0
+_TOTAL_POT = 1 << 1
+_RAKE = 1 << 2
+_TOURNAMENT = 1 << 3
+_EARNINGS = 1 << 4
+
+_STREETS = ("preflop", "flop", "turn", "river", "show_down")
+# three bits for every street
+_ABSENT, _STREET, _CARD_ONLY, _TRUE, _FALSE = range(5)
+# cards of the streets are taken from the board
+_STREET_CARDS = {"flop": 3, "turn": 4, "river": 5}
+_BOARD_INDEX = {"turn": 3, "river": 4}
+
+
+def _card_code(card):
+    # without hashing the enums of the card
+    return _lookup.CARD_STR_IDS[_lookup.card_str(card)]
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class _Strings:
+    """String table of a batch."""
+
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def encode(self, string):
+        try:
+            return self._ids[string]
+        except KeyError:
+            string_id = self._ids[string] = len(self.strings)
+            self.strings.append(string)
+            return string_id
+
+
+class _Writer:
+    def __init__(self, strings):
+        self.out = bytearray()
+        self.strings = strings
+        self.to_int = None
+
+    def varint(self, value):
+        _write_varint(self.out, value)
+
+    def string(self, string):
+        _write_varint(self.out, self.strings.encode(string))
+
+    def amount(self, value):
+        _write_varint(self.out, self.to_int(value))
+
+    def enum(self, enum_class, member):
+        self.out.append(_ENUM_CODES[enum_class][member] if member is not None else _NONE)
+
+
+def _cents(amount):
+    # some rooms mix ints in the Decimal amounts
+    if type(amount) is int:
+        return amount * 100
+    cents = amount.scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount {amount} has more than 2 decimals")
+    return int(cents)
+
+
+def _int(amount):
+    return amount
+
+
+def _board(hand):
+    # not the board property, the turn and river are only cards in some rooms
+    flop = getattr(hand, "flop", None)
+    if flop is None or not flop.cards:
+        return ()
+    board = list(flop.cards)
+    for street, index in ((hand.turn, 3), (hand.river, 4)):
+        if street is None:
+            break
+        board.append(street if isinstance(street, Card) else street.cards[index])
+    return board
+
+
+def _write_hand(writer, hand):
+    decimal = isinstance(hand.bb, Decimal)
+    writer.to_int = _cents if decimal else _int
+    total_pot = getattr(hand, "total_pot", None)
+    rake = getattr(hand, "rake", None)
+    tournament_ident = getattr(hand, "tournament_ident", None)
+    earnings = getattr(hand, "earnings", None)
+    flags = (
+        (_DECIMAL if decimal else 0)
+        | (_TOTAL_POT if total_pot is not None else 0)
+        | (_RAKE if rake is not None else 0)
+        | (_TOURNAMENT if tournament_ident is not None else 0)
+        | (_EARNINGS if earnings is not None else 0)
+    )
+    streets = [getattr(hand, street_name, None) for street_name in _STREETS]
+    street_kinds = 0
+    for ind, street in enumerate(streets):
+        if street is None:
+            kind = _ABSENT
+        elif street is True:
+            kind = _TRUE
+        elif street is False:
+            kind = _FALSE
+        elif isinstance(street, Card):
+            kind = _CARD_ONLY
+        else:
+            kind = _STREET
+        street_kinds |= kind << (3 * ind)
+
+    writer.varint(flags)
+    writer.varint(street_kinds)
+    writer.varint(int(hand.ident))
+    writer.varint(int(hand.date.timestamp()))
+    writer.string(hand.table_name)
+    writer.enum(Game, hand.game)
+    writer.enum(GameType, hand.game_type)
+    writer.enum(Limit, hand.limit)
+    writer.enum(Currency, hand.currency)
+    extra = getattr(hand, "extra", None) or {}
+    writer.enum(MoneyType, extra.get("money_type"))
+    writer.out.append(hand.max_players or 0)
+    writer.amount(hand.sb)
+    writer.amount(hand.bb)
+    if total_pot is not None:
+        writer.amount(total_pot)
+    if rake is not None:
+        writer.amount(rake)
+    if tournament_ident is not None:
+        writer.varint(int(tournament_ident))
+        writer.string(getattr(hand, "tournament_level", None) or "")
+    if earnings is not None:
+        writer.varint(_zigzag(writer.to_int(earnings)))
+
+    # empty seats are left out
+    players = [
+        player for player in hand.players if player.name != f"Empty Seat {player.seat}"
+    ]
+    writer.out.append(len(players))
+    hero, button = getattr(hand, "hero", None), getattr(hand, "button", None)
+    hero_index = button_index = _NONE
+    for ind, player in enumerate(players):
+        writer.out.append(player.seat)
+        writer.string(player.name)
+        writer.amount(player.stack)
+        if player.combo is not None:
+            writer.out.append(_card_code(player.combo.first))
+            writer.out.append(_card_code(player.combo.second))
+        else:
+            writer.out.append(_NONE)
+        if hero is not None and player.name == hero.name:
+            hero_index = ind
+        if button is not None and player.name == button.name:
+            button_index = ind
+    writer.out.append(hero_index)
+    writer.out.append(button_index)
+
+    board = _board(hand)
+    writer.out.append(len(board))
+    writer.out.extend([_card_code(card) for card in board])
+
+    for street in streets:
+        if not hasattr(street, "actions"):
+            continue
+        actions = street.actions or ()
+        writer.varint(len(actions))
+        for action in actions:
+            writer.string(action.name)
+            code = _ACTION_CODES[action.action]
+            if action.amount is None:
+                writer.out.append(code)
+            else:
+                writer.out.append(code | _HAS_AMOUNT)
+                writer.amount(action.amount)
+
+    winners = getattr(hand, "winners", None) or ()
+    writer.out.append(len(winners))
+    for winner in winners:
+        writer.string(winner)
+
+
+class _Reader:
+    def __init__(self, data, offset, strings):
+        self.data = data
+        self.pos = offset
+        self.strings = strings
+        self.to_amount = None
+
+    def byte(self):
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self):
+        data, pos = self.data, self.pos
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return value
+            shift += 7
+
+    def string(self):
+        return self.strings[self.varint()]
+
+    def amount(self):
+        return self.to_amount(self.varint())
+
+    def enum(self, enum_class):
+        code = self.byte()
+        return _ENUM_MEMBERS[enum_class][code] if code != _NONE else None
+
+
+def _from_cents(value):
+    return Decimal(value).scaleb(-2)
+
+
+def _read_hand(reader):
+    flags = reader.varint()
+    street_kinds = reader.varint()
+    reader.to_amount = _from_cents if flags & _DECIMAL else _int
+    hand = JsonHand()
+    hand.ident = str(reader.varint())
+    hand.date = datetime.fromtimestamp(reader.varint(), pytz.UTC)
+    hand.table_name = reader.string()
+    hand.game = reader.enum(Game)
+    hand.game_type = reader.enum(GameType)
+    hand.limit = reader.enum(Limit)
+    hand.currency = reader.enum(Currency)
+    hand.money_type = reader.enum(MoneyType)
+    hand.max_players = reader.byte() or None
+    hand.sb = reader.amount()
+    hand.bb = reader.amount()
+    if flags & _TOTAL_POT:
+        hand.total_pot = reader.amount()
+    if flags & _RAKE:
+        hand.rake = reader.amount()
+    if flags & _TOURNAMENT:
+        hand.tournament_ident = str(reader.varint())
+        hand.tournament_level = reader.string() or None
+    if flags & _EARNINGS:
+        hand.earnings = reader.to_amount(_unzigzag(reader.varint()))
+
+    players = []
+    for _ in range(reader.byte()):
+        seat = reader.byte()
+        name = reader.string()
+        stack = reader.amount()
+        first = reader.byte()
+        combo = None
+        if first != _NONE:
+            combo = Combo.from_cards(_CARDS[first], _CARDS[reader.byte()])
+        players.append(_Player(name=name, stack=stack, seat=seat, combo=combo))
+    hand.players = tuple(players)
+    hero_index, button_index = reader.byte(), reader.byte()
+    hand.hero = players[hero_index].name if hero_index != _NONE else None
+    hand.button = players[button_index].name if button_index != _NONE else None
+
+    board = tuple([_CARDS[reader.byte()] for _ in range(reader.byte())])
+    hand.board = board or None
+
+    for ind, street_name in enumerate(_STREETS):
+        kind = street_kinds >> (3 * ind) & 7
+        if kind == _STREET:
+            actions = []
+            for _ in range(reader.varint()):
+                name = reader.string()
+                code = reader.byte()
+                amount = reader.amount() if code & _HAS_AMOUNT else None
+                actions.append(_PlayerAction(name, _ACTIONS[code & ~_HAS_AMOUNT], amount))
+            street_cards = _STREET_CARDS.get(street_name)
+            cards = board[:street_cards] if street_cards and len(board) >= street_cards else None
+            setattr(hand, street_name, JsonStreet(tuple(actions) or None, cards))
+        elif kind == _CARD_ONLY:
+            setattr(hand, street_name, board[_BOARD_INDEX[street_name]])
+        elif kind == _TRUE:
+            setattr(hand, street_name, True)
+        elif kind == _FALSE:
+            setattr(hand, street_name, False)
+
+    hand.winners = tuple([reader.string() for _ in range(reader.byte())])
+    return hand
+
+
+def encode_batch(hands):
+    """Encode parsed hand histories to one batch.
+
+    The batch is a header with the format version, a string table with every table and player
+    name, and the hands. Amounts are variable length ints: the amount itself with
+    ``integer_amounts``, cents of Decimal amounts. Cards and actions are one byte codes,
+    empty seats are left out.
+
+    :raises ValueError: for Decimal amounts with more than 2 decimals.
+    :rtype: bytes
+    """
+    strings = _Strings()
+    writer = _Writer(strings)
+    count = 0
+    for hand in hands:
+        _write_hand(writer, hand)
+        count += 1
+
+    out = bytearray(_HEADER.pack(_MAGIC, VERSION))
+    _write_varint(out, len(strings.strings))
+    for string in strings.strings:
+        encoded = string.encode("utf-8")
+        _write_varint(out, len(encoded))
+        out += encoded
+    _write_varint(out, count)
+    out += writer.out
+    return bytes(out)
+
+
+def decode_batch(data):
+    """Decode a batch of :func:`encode_batch` to a list of
+    :class:`poker.jsonencoding.JsonHand` records, the same records as loaded from JSON,
+    but with exact amounts: ints or Decimals, like they were parsed.
+    """
+    magic, version = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not an encoded batch of hands")
+    if version != VERSION:
+        raise ValueError(f"Unsupported version {version}, only {VERSION} is supported")
+    reader = _Reader(data, _HEADER.size, None)
+    strings = []
+    for _ in range(reader.varint()):
+        size = reader.varint()
+        strings.append(bytes(data[reader.pos:reader.pos + size]).decode("utf-8"))
+        reader.pos += size
+    reader.strings = strings
+    return [_read_hand(reader) for _ in range(reader.varint())]
+
+
+def encode_hand(hand):
+    """Encode one parsed hand history, a batch of one hand."""
+    return encode_batch([hand])
+
+
+def decode_hand(data):
+    """Decode one hand encoded by :func:`encode_hand`."""
+    hands = decode_batch(data)
+    if len(hands) != 1:
+        raise ValueError(f"Expected one hand, got {len(hands)}")
+    return hands[0]
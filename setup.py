@@ -13,10 +13,12 @@ install_requires = [
     "configparser",
     "zope.interface",
     "attrs",
-    "jsonpickle"
 ]
 
 
+extras_require = {"numpy": ["numpy"], "parquet": ["numpy", "pyarrow"]}
+
+
 console_scripts = ["poker = poker.commands:poker"]
 
 
@@ -43,6 +45,7 @@ setup(
     license="MIT",
     packages=find_packages(),
     install_requires=install_requires,
+    extras_require=extras_require,
     entry_points={"console_scripts": console_scripts},
     tests_require=["pytest", "coverage", "coveralls"],
 )
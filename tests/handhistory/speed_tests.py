@@ -1,25 +1,80 @@
-from timeit import timeit, repeat
-
-
-results, single_results = [], []
-for handnr in range(1, 5):
-    single_results.append(
-        timeit(
-            f"PokerStarsHandHistory(HAND{handnr})",
-            number=100000,
-            setup="from poker.room.pokerstars import PokerStarsHandHistory; "
-            f"from tests.handhistory.stars_hands import HAND{handnr}",
-        )
-    )
-    results.extend(
-        repeat(
-            f"PokerStarsHandHistory(HAND{handnr})",
-            repeat=3,
-            number=100000,
-            setup="from poker.room.pokerstars import PokerStarsHandHistory; "
-            f"from tests.handhistory.stars_hands import HAND{handnr}",
-        )
-    )
-
-print("Single results average:", sum(single_results) / len(single_results))
-print("Repeated results average:", sum(results) / len(results))
+"""Parsing speed of PokerStars hand histories.
+
+Run from the repository root with: python -m tests.handhistory.speed_tests
+"""
+
+from pathlib import Path
+from timeit import repeat
+from poker.room.pokerstars import PokerStarsHandHistory
+from tests.handhistory import stars_hands
+
+
+DATA_DIR = Path(__file__).parent / "data" / "PokerStars"
+REPEAT = 5
+
+
+def _parsable_hands():
+    texts = [getattr(stars_hands, name) for name in dir(stars_hands) if name.startswith("HAND")]
+    texts.extend(hand.raw for path in DATA_DIR.iterdir() for hand in PokerStarsHandHistory.iter_hands(path))
+    parsable = []
+    for text in texts:
+        try:
+            PokerStarsHandHistory(text).parse()
+        except Exception:
+            continue
+        parsable.append(text)
+    return parsable
+
+
+def _measure(texts, stage, **kwargs):
+    def run():
+        for text in texts:
+            stage(PokerStarsHandHistory(text, **kwargs))
+
+    return min(repeat(run, repeat=REPEAT, number=1))
+
+
+def _measure_dates():
+    """Room specific date parsers against strptime and pytz localize for every date."""
+    from poker import handhistory
+    from poker.room.fulltiltpoker import FullTiltPokerHandHistory
+    from poker.room.pkr import PKRHandHistory
+
+    dates = [
+        (PokerStarsHandHistory, "2013/10/04 13:53:27 ET"),
+        (FullTiltPokerHandHistory, "13:26:50 ET - 2013/09/22"),
+        (PKRHandHistory, "05 Oct 2013 13:26:50"),
+    ]
+    number = 10000
+    print(f"date parsing, {number} dates, best of {REPEAT} runs")
+    for parser, date_string in dates:
+        hand = parser("")
+        strptime = min(repeat(
+            lambda: handhistory._BaseHandHistory._parse_date(hand, date_string),
+            repeat=REPEAT, number=number,
+        ))
+        fast = min(repeat(lambda: hand._parse_date(date_string), repeat=REPEAT, number=number))
+        name = parser.__name__
+        print(f"{name:<28}{strptime:>8.3f} s strptime {fast:>8.3f} s sliced")
+
+
+def main():
+    texts = _parsable_hands()
+    stages = [
+        ("init", lambda hh: None),
+        ("parse_header", lambda hh: hh.parse_header()),
+        ("parse", lambda hh: hh.parse()),
+        ("parse(lazy=True)", lambda hh: hh.parse(lazy=True)),
+    ]
+    print(f"{len(texts)} hands, best of {REPEAT} runs")
+    for name, stage in stages:
+        for kwargs in ({}, {"integer_amounts": True}):
+            label = f"{name}, integer" if kwargs else name
+            seconds = _measure(texts, stage, **kwargs)
+            print(f"{label:<28}{seconds:>8.3f} s {len(texts) / seconds:>12,.0f} hands/s")
+    print()
+    _measure_dates()
+
+
+if __name__ == "__main__":
+    main()
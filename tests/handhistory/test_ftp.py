@@ -1,3 +1,4 @@
+import io
 from datetime import datetime
 from decimal import Decimal
 import pytz
@@ -120,6 +121,7 @@ class TestHandWithFlopOnly:
             ("turn", None),
             ("river", None),
             ("total_pot", Decimal(230)),
+            ("pot_rake", 0),
             ("show_down", False),
             ("winners", ("FatalRevange",)),
             ("board", (Card("8h"), Card("4h"), Card("Tc"))),
@@ -286,3 +288,39 @@ class TestHandWithFlopTurnRiver:
 
     def test_flop(self, hand):
         assert isinstance(hand.flop, _Street)
+
+
+def test_iter_hands():
+    text = ftp_hands.HAND1 + "\n\n" + ftp_hands.TURBO_SNG
+    hands = list(FullTiltPokerHandHistory.iter_hands(io.BytesIO(text.encode("utf-8"))))
+    assert [hand.raw for hand in hands] == [ftp_hands.HAND1.strip(), ftp_hands.TURBO_SNG.strip()]
+    hands[1].parse_header()
+    assert hands[1].ident == "34374264321"
+
+
+def test_integer_amounts():
+    decimal_hand = FullTiltPokerHandHistory(ftp_hands.HAND1)
+    decimal_hand.parse()
+    integer_hand = FullTiltPokerHandHistory(ftp_hands.HAND1, integer_amounts=True)
+    integer_hand.parse()
+    assert (integer_hand.sb, integer_hand.bb) == (10, 20)
+    assert integer_hand.flop.actions == decimal_hand.flop.actions
+    assert all(
+        type(action.amount) is int
+        for action in integer_hand.flop.actions
+        if action.amount is not None
+    )
+    assert integer_hand.extra == decimal_hand.extra
+
+
+@pytest.mark.parametrize(
+    ("date_string", "expected"),
+    [
+        ("13:26:50 ET - 2013/09/22", datetime(2013, 9, 22, 17, 26, 50, tzinfo=pytz.UTC)),
+        ("1:30:00 ET - 2013/11/03", datetime(2013, 11, 3, 6, 30, tzinfo=pytz.UTC)),
+    ],
+)
+def test_parse_date(date_string, expected):
+    hand = FullTiltPokerHandHistory("")
+    hand._parse_date(date_string)
+    assert hand.date == expected
@@ -0,0 +1,70 @@
+from pathlib import Path
+from poker.constants import PokerRoom
+from poker.handhistory import parse_many, HandRecord, file_ranges, range_hands, _split_hands
+from poker.room.pokerstars import PokerStarsHandHistory
+
+
+DATA_DIR = Path(__file__).parent / "data"
+STARS_FILES = sorted((DATA_DIR / "PokerStars").iterdir())
+AKSNES = DATA_DIR / "PokerStars" / "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+
+
+def test_byte_ranges_split_hands_exactly_once():
+    whole = list(_split_hands(AKSNES, PokerStarsHandHistory._HAND_START))
+    size = AKSNES.stat().st_size
+    ranges = []
+    for start in range(0, size, 1000):
+        ranges.extend(_split_hands(AKSNES, PokerStarsHandHistory._HAND_START, start, start + 1000))
+    assert ranges == whole
+
+
+def test_file_ranges(tmp_path):
+    unknown = tmp_path / "unknown.txt"
+    unknown.write_text("not a hand history")
+    errors = []
+    ranges = list(file_ranges([AKSNES, unknown, tmp_path / "missing.txt"], 1000, errors))
+    assert [error.path for error in errors] == [str(unknown), str(tmp_path / "missing.txt")]
+    assert all(room == PokerRoom.STARS for _, room, _, _ in ranges)
+    hands = [hand for task in ranges for hand in range_hands(*task)]
+    whole = list(_split_hands(AKSNES, PokerStarsHandHistory._HAND_START))
+    assert [offset for offset, _ in hands] == [offset for offset, _, _ in whole]
+    assert all(isinstance(hand, PokerStarsHandHistory) for _, hand in hands)
+
+
+def test_records_are_parsed_in_workers():
+    result = parse_many([AKSNES], workers=2, chunksize=4096, ordered=True)
+    records = list(result)
+    assert all(isinstance(record, HandRecord) for record in records)
+    assert records[0].ident == "212113219605"
+    assert records[0].room == PokerRoom.STARS
+    assert records[0].table_name == "Aksnes II"
+    assert records[0].offset == 0
+    assert [record.offset for record in records] == sorted(record.offset for record in records)
+    assert len(records) + len(result.errors) == 32
+    assert result.hands == len(records)
+
+
+def test_unordered_results_are_the_same():
+    ordered = parse_many(STARS_FILES, workers=2, chunksize=20000, ordered=True)
+    unordered = parse_many(STARS_FILES, workers=2, chunksize=20000)
+    assert sorted(r.ident for r in unordered) == sorted(r.ident for r in ordered)
+    assert len(unordered.errors) == len(ordered.errors)
+
+
+def test_worker_stats_and_errors():
+    result = parse_many(STARS_FILES + [DATA_DIR / "missing.txt"], workers=2)
+    records = list(result)
+    assert sum(stats.hands for stats in result.workers.values()) == len(records)
+    # Zoom hand headers are not supported
+    hand_errors = [error for error in result.errors if error.offset is not None]
+    assert sum(stats.errors for stats in result.workers.values()) == len(hand_errors)
+    assert hand_errors
+    file_errors = [error for error in result.errors if error.offset is None]
+    assert [error.path for error in file_errors] == [str(DATA_DIR / "missing.txt")]
+
+
+def test_unknown_files_are_skipped():
+    eight = sorted((DATA_DIR / "888poker").iterdir())[:2]
+    result = parse_many(eight, workers=1)
+    assert list(result) == []
+    assert len(result.errors) == 2
@@ -0,0 +1,56 @@
+import pytest
+from poker.constants import PokerRoom
+from poker import handhistory
+from poker.room.pokerstars import PokerStarsHandHistory
+from poker.room.fulltiltpoker import FullTiltPokerHandHistory
+from . import stars_hands, ftp_hands, pkr_hands
+
+
+@pytest.mark.parametrize(
+    ("hand_text", "room"),
+    [
+        (stars_hands.HAND1, PokerRoom.STARS),
+        ("\ufeffPokerStars Zoom Hand #212510000000:  Hold'em No Limit", PokerRoom.STARS),
+        (ftp_hands.HAND1, PokerRoom.FTP),
+        (pkr_hands.HANDS["holdem_full"], PokerRoom.PKR),
+    ],
+)
+def test_detect_room(hand_text, room):
+    assert handhistory.detect_room(hand_text.encode("utf-8")) == room
+
+
+def test_unknown_room():
+    assert handhistory.detect_room(b"#Game No : 123456\n***** 888poker Hand History") is None
+
+
+def test_registered_parsers():
+    assert handhistory.get_parser(PokerRoom.STARS) is PokerStarsHandHistory
+    assert handhistory.get_parser("FTP") is FullTiltPokerHandHistory
+    with pytest.raises(KeyError):
+        handhistory.get_parser(PokerRoom.EIGHT)
+
+
+def test_register_new_room():
+    class EightHandHistory(PokerStarsHandHistory):
+        _HAND_START = b"#Game No :"
+
+    handhistory.register(PokerRoom.EIGHT, EightHandHistory)
+    try:
+        assert handhistory.detect_room(b"#Game No : 123456") == PokerRoom.EIGHT
+    finally:
+        del handhistory._PARSERS[PokerRoom.EIGHT]
+
+
+def test_open_picks_parser(tmp_path):
+    path = tmp_path / "hands.txt"
+    path.write_text(ftp_hands.HAND1 + "\n\n" + ftp_hands.TURBO_SNG, encoding="utf-8")
+    hands = list(handhistory.open(path))
+    assert len(hands) == 2
+    assert all(isinstance(hand, FullTiltPokerHandHistory) for hand in hands)
+
+
+def test_open_unknown_format(tmp_path):
+    path = tmp_path / "hands.txt"
+    path.write_text("not a hand history", encoding="utf-8")
+    with pytest.raises(ValueError):
+        handhistory.open(path)
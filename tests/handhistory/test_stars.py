@@ -1,13 +1,18 @@
+import io
+from pathlib import Path
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import pytest
 from poker.card import Card
 from poker.hand import Combo
 from poker.constants import Currency, GameType, Game, Limit, Action, MoneyType
-from poker.handhistory import _Player, _PlayerAction
+from poker import handhistory as hh
+from poker.handhistory import _Player, _PlayerAction, _split_hands
+from poker.room import pokerstars
 from poker.room.pokerstars import PokerStarsHandHistory, _Street
 from . import stars_hands
+from .conftest import all_test_hands
 
 
 ET = pytz.timezone("US/Eastern")
@@ -140,7 +145,7 @@ class TestParseBetCashGame:
         ],
     )
     def test_bet_parsed(self, bet_input, expected):
-        action = _Street._parse_player_action(self, bet_input)
+        action = _Street._parse_player_action(self, *bet_input.split(": ", 1), hh._decimal)
         assert action[2] == expected
 
 
@@ -155,7 +160,7 @@ class TestParseBetRaiseCashGame:
         ],
     )
     def test_rasie_parsed(self, bet_input, expected):
-        action = _Street._parse_player_action(self, bet_input)
+        action = _Street._parse_player_action(self, *bet_input.split(": ", 1), hh._decimal)
         assert action[2] == expected
 
 
@@ -170,9 +175,72 @@ class TestParseCollectedWonCashGame:
         ],
     )
     def test_rasie_parsed(self, bet_input, expected):
-        action = _Street._parse_player_action(self, bet_input)
+        action = _Street._parse_player_action(self, *bet_input.split(": ", 1), hh._decimal)
         assert action[2] == expected
 
+
+class TestActionLineClassification:
+
+    @pytest.mark.parametrize(
+        ("action_line", "expected"),
+        [
+            ("collected: folds", ("collected", Action.FOLD, None)),
+            ("bets: calls 40", ("bets", Action.CALL, Decimal("40"))),
+            ("Happy we:-): checks", ("Happy we:-)", Action.CHECK, None)),
+            ("foo: bar: folds", ("foo: bar", Action.FOLD, None)),
+            ("a: raises: raises 20 to 40", ("a: raises", Action.RAISE, Decimal("40"))),
+            ("W2lkm2n: folds [9d Ks]", ("W2lkm2n", Action.FOLD, None)),
+            ("ps25sp: raises $0.02 to $0.04", ("ps25sp", Action.RAISE, Decimal("0.04"))),
+            ("pokerHero: posts big blind 20 and is all-in", ("pokerHero", Action.BB, Decimal("20"))),
+            ("raises collected 250 from pot", ("raises", Action.WIN, Decimal("250"))),
+            ("Uncalled bet (40) returned to folds", ("folds", Action.RETURN, Decimal("40"))),
+            (
+                "pokerHero cashed out the hand for $2.70 | Cash Out Fee $0.03",
+                ("pokerHero", Action.CASH_OUT, Decimal("2.70")),
+            ),
+        ],
+    )
+    def test_action_classified(self, action_line, expected):
+        street = _Street([""])
+        street._parse_actions([action_line])
+        assert street.actions == (_PlayerAction(*expected),)
+        assert street.diagnostics == []
+
+    @pytest.mark.parametrize(
+        "action_line",
+        [
+            "W2lkm2n said, \"gl\"",
+            "W2lkm2n said, \"nh: calls 10 lol\"",
+            "foo: bar said, \"x: raises 10 to 20\"",
+            "pokerHero joins the table at seat #3",
+            "pokerHero leaves the table",
+            "pokerHero is disconnected",
+            "pokerHero has timed out while disconnected",
+            "pokerHero: sits out",
+            "pokerHero: shows [Ah Kh] (a pair of Aces)",
+        ],
+    )
+    def test_ignored_line(self, action_line):
+        street = _Street([""])
+        street._parse_actions([action_line])
+        assert street.actions is None
+        assert street.diagnostics == []
+
+    def test_unrecognized_line_is_collected_not_printed(self, capsys):
+        before = pokerstars.line_stats["unrecognized"]
+        street = _Street([""])
+        street._parse_actions(["pokerHero: does something new", "pokerHero: checks"])
+        assert street.actions == (_PlayerAction("pokerHero", Action.CHECK, None),)
+        assert street.diagnostics == ["pokerHero: does something new"]
+        assert pokerstars.line_stats["unrecognized"] == before + 1
+        assert capsys.readouterr().out == ""
+
+    def test_hand_history_diagnostics(self):
+        hh = PokerStarsHandHistory(stars_hands.HAND1)
+        hh.parse()
+        assert hh.diagnostics == []
+
+
 class TestHandHeaderNoLimitHoldemTourPlayMoney:
     hand_text = """
 PokerStars Hand #152504147861: Tournament #1545751329, 870+130 Hold'em No Limit - Level I (10/20) - 2016/04/27 0:17:16 ET
@@ -331,6 +399,7 @@ class TestVillainCardsParsed:
             ),
             ("board", (Card("3c"), Card("3h"), Card("3s"), Card("7c"), Card("Ks"))),
             ("total_pot", Decimal('1.29')),
+            ("pot_rake", Decimal('0.05')),
         ],
     )
     def test_body(self, hand, attribute, expected_value):
@@ -415,6 +484,7 @@ class TestTournamentHand:
                 ])),
             ),
             ("total_pot", Decimal(3120)),
+            ("pot_rake", 0),
             (
                 "show_down", (_Street(["",
                     "SARA CONAR collected 3120 from pot",
@@ -910,3 +980,354 @@ class TestEarningsWinner:
 
     def testEarnings(self, hand):
         assert hand.earnings == Decimal('4.68')
+
+
+class TestPlayerResults:
+    hand_text = stars_hands.HAND14
+
+    def test_results_of_every_seated_player(self, hand):
+        assert hand.results == {
+            "BigAngryFish": Decimal("-0.02"),
+            # the extra big blind, a call and raise "to" $0.52, then a call
+            "nanoroma": Decimal("2.72"),
+            "moneymakerxyz": 0,
+            "xricks": 0,
+            "pokerguy": 0,
+            "Extanse": 0,
+            "mikemb69": 0,
+            "Theo53842": Decimal("-2.03"),
+            "TchilePR": Decimal("-0.43"),
+        }
+        assert hand.earnings == hand.results["Theo53842"]
+
+    def test_rake_shares(self, hand):
+        assert hand.rake_shares == {"nanoroma": Decimal("0.23")}
+
+    def test_extra_big_blind_is_an_action(self, hand):
+        blinds = [(action.name, action.action) for action in hand.preflop.actions[:3]]
+        assert blinds == [
+            ("BigAngryFish", Action.SB),
+            ("nanoroma", Action.BB),
+            ("Theo53842", Action.BB),
+        ]
+
+    def test_lazy(self):
+        hand = PokerStarsHandHistory(self.hand_text)
+        hand.parse(lazy=True)
+        assert hand.results["Theo53842"] == Decimal("-2.03")
+
+
+def test_rake_shares_add_up_to_the_rake():
+    won = {"a": Decimal("1"), "b": Decimal("2")}
+    assert pokerstars._rake_shares(Decimal("0.10"), won) == {
+        "a": Decimal("0.03"), "b": Decimal("0.07")
+    }
+    assert pokerstars._rake_shares(10, {"a": 100, "b": 200}) == {"a": 3, "b": 7}
+    assert pokerstars._rake_shares(Decimal("0"), won) == {}
+    assert pokerstars._rake_shares(5, {}) == {}
+
+
+DATA_DIR = Path(__file__).parent / "data" / "PokerStars"
+IGUASSU = DATA_DIR / "HH20200416 Iguassu III - $0,01-$0,02 - USD No Limit Hold'em.txt"
+
+
+def _iguassu_hand(ident):
+    for hand in PokerStarsHandHistory.iter_hands(IGUASSU):
+        if hand.raw.startswith(f"PokerStars Hand #{ident}:"):
+            return hand.raw
+    raise LookupError(ident)
+
+
+class TestDeadMoney:
+
+    @pytest.mark.parametrize(
+        "hand_text",
+        [
+            stars_hands.HAND2,
+            stars_hands.HAND3,
+            stars_hands.HAND7,
+            # "posts small & big blinds"
+            pytest.param(None, id="212114866335"),
+        ],
+    )
+    def test_results_add_up_to_the_rake(self, hand_text):
+        hand = PokerStarsHandHistory(hand_text or _iguassu_hand("212114866335"))
+        hand.parse()
+        if "cashed out" in hand.raw:
+            pytest.skip("cashed out amounts are not paid from the pot")
+        assert sum(hand.results.values()) + hand.pot_rake == 0
+
+    def test_ante_is_charged(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND2)
+        hand.parse()
+        # all-in for the whole 1030 stack, the ante included
+        assert hand.results["Newfie_187"] == -1030
+        # folded preflop, only the ante
+        assert hand.results["RichFatWhale"] == -75
+
+    def test_dead_small_blind_is_charged(self):
+        hand = PokerStarsHandHistory(_iguassu_hand("212114866335"))
+        hand.parse()
+        # the live big blind is put in on preflop, the checked option doesn't cost more
+        assert hand.results["Baulöwe1958"] == Decimal("-0.03")
+        assert hand.results["flip4mysocks"] == Decimal("0.07")
+
+    def test_integer_amounts(self):
+        hand = PokerStarsHandHistory(_iguassu_hand("212114866335"), integer_amounts=True)
+        hand.parse()
+        assert hand.results["Baulöwe1958"] == -3
+
+
+class TestIterHands:
+    def test_every_hand_is_yielded(self):
+        path = DATA_DIR / "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+        hands = list(PokerStarsHandHistory.iter_hands(path))
+        assert len(hands) == 32
+        assert not any(hand.header_parsed for hand in hands)
+        assert all(hand.raw.startswith("PokerStars Hand #") for hand in hands)
+
+    def test_hands_can_be_parsed(self):
+        path = DATA_DIR / "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+        first = next(PokerStarsHandHistory.iter_hands(path))
+        first.parse()
+        assert first.ident == "212113219605"
+        assert first.table_name == "Aksnes II"
+
+    def test_zoom_hands_are_split(self):
+        for path in DATA_DIR.iterdir():
+            text = path.read_text(encoding="utf-8-sig")
+            if "PokerStars Zoom Hand #" in text:
+                break
+        hands = list(PokerStarsHandHistory.iter_hands(str(path)))
+        assert len(hands) == text.count("PokerStars Zoom Hand #")
+
+    def test_memory_mapped_split_is_the_same_as_streamed(self):
+        for path in DATA_DIR.iterdir():
+            mapped = list(_split_hands(path, PokerStarsHandHistory._HAND_START))
+            with path.open("rb") as f:
+                assert list(_split_hands(f, PokerStarsHandHistory._HAND_START)) == mapped
+
+    def test_stopping_early_releases_the_map(self):
+        path = DATA_DIR / "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+        hands = PokerStarsHandHistory.iter_hands(path)
+        next(hands)
+        hands.close()
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.txt"
+        path.write_bytes(b"")
+        assert list(PokerStarsHandHistory.iter_hands(path)) == []
+
+    def test_bytes_and_memoryview(self):
+        data = stars_hands.HAND1.encode("utf-8")
+        assert PokerStarsHandHistory(data).raw == stars_hands.HAND1.strip()
+        hand = PokerStarsHandHistory(data)
+        assert hand.raw is hand.raw
+        hand.raw = stars_hands.HAND2.strip().encode("utf-8")
+        assert hand.raw == stars_hands.HAND2.strip()
+        hand = PokerStarsHandHistory(memoryview(b"\xef\xbb\xbf" + data)[:len(data) + 3])
+        hand.parse_header()
+        assert hand.ident == "105024000105"
+
+    def test_file_objects(self):
+        text = stars_hands.HAND1.strip() + "\n\n\n" + stars_hands.HAND2
+        binary = [hand.raw for hand in PokerStarsHandHistory.iter_hands(io.BytesIO(text.encode()))]
+        assert binary == [stars_hands.HAND1.strip(), stars_hands.HAND2.strip()]
+        windows = io.BytesIO(b"\xef\xbb\xbf" + text.replace("\n", "\r\n").encode())
+        assert [hand.raw for hand in PokerStarsHandHistory.iter_hands(windows)] == binary
+        textio = io.StringIO("garbage before the first hand\n" + text)
+        assert [hand.raw for hand in PokerStarsHandHistory.iter_hands(textio)] == binary
+
+
+class TestLazyParse:
+    ATTRIBUTES = ("preflop", "flop", "turn", "river", "show_down", "winners", "earnings")
+
+    @staticmethod
+    def _street(street):
+        if street is None:
+            return None
+        return street.cards, street.actions, street.pot
+
+    @pytest.mark.parametrize("hand_text", all_test_hands)
+    def test_same_result_as_eager(self, hand_text):
+        eager = PokerStarsHandHistory(hand_text)
+        try:
+            eager.parse()
+        except Exception:
+            pytest.skip("hand is not supported by the parser")
+        lazy = PokerStarsHandHistory(hand_text)
+        lazy.parse(lazy=True)
+
+        assert lazy.parsed
+        assert lazy.hero == eager.hero
+        assert lazy.total_pot == eager.total_pot
+        for name in ("preflop", "flop", "turn", "river", "show_down"):
+            assert self._street(getattr(lazy, name)) == self._street(getattr(eager, name))
+        assert sorted(lazy.winners) == sorted(eager.winners)
+        assert lazy.earnings == eager.earnings
+        assert lazy.board == eager.board
+
+    def test_streets_are_parsed_on_first_access(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND1)
+        hand.parse(lazy=True)
+        assert not any(name in vars(hand) for name in self.ATTRIBUTES)
+        flop = hand.flop
+        assert "flop" in vars(hand)
+        assert hand.flop is flop
+        assert "turn" not in vars(hand)
+
+    def test_earnings_need_the_streets(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND16)
+        hand.parse(lazy=True)
+        assert hand.earnings == Decimal("4.68")
+
+    def test_unknown_attributes_still_raise(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND1)
+        with pytest.raises(AttributeError):
+            hand.flop
+        hand.parse(lazy=True)
+        with pytest.raises(AttributeError):
+            hand.nonexistent
+
+
+class TestIntegerAmounts:
+
+    @staticmethod
+    def _amounts(hand):
+        amounts = [hand.sb, hand.bb, hand.total_pot, hand.earnings]
+        amounts.extend(player.stack for player in hand.players)
+        for street in (hand.preflop, hand.flop, hand.turn, hand.river, hand.show_down):
+            if street is not None and street.actions is not None:
+                amounts.extend(action.amount for action in street.actions)
+        return amounts
+
+    @pytest.mark.parametrize("hand_text", all_test_hands)
+    def test_same_amounts_as_decimal(self, hand_text):
+        decimal_hand = PokerStarsHandHistory(hand_text)
+        try:
+            decimal_hand.parse()
+        except Exception:
+            pytest.skip("hand is not supported by the parser")
+        integer_hand = PokerStarsHandHistory(hand_text, integer_amounts=True)
+        integer_hand.parse()
+
+        is_money = decimal_hand.game_type == GameType.CASH and decimal_hand.currency is not None
+        unit = 100 if is_money else 1
+        for decimal, integer in zip(self._amounts(decimal_hand), self._amounts(integer_hand)):
+            if decimal is None:
+                assert integer is None
+            else:
+                assert type(integer) is int
+                assert integer == decimal * unit
+
+    def test_cash_game_in_cents(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND16, integer_amounts=True)
+        hand.parse()
+        assert (hand.sb, hand.bb) == (2, 5)
+        assert hand.players[0].stack == 195
+        assert hand.earnings == 468
+
+    def test_tournament_in_chips_buyin_in_cents(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND1, integer_amounts=True)
+        hand.parse()
+        assert (hand.sb, hand.bb) == (10, 20)
+        assert (hand.buyin, hand.rake) == (319, 31)
+
+    def test_lazy_parse(self):
+        hand = PokerStarsHandHistory(stars_hands.HAND16, integer_amounts=True)
+        hand.parse(lazy=True)
+        assert hand.earnings == 468
+
+    def test_iter_hands(self):
+        path = DATA_DIR / "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+        hand = next(PokerStarsHandHistory.iter_hands(path, integer_amounts=True))
+        hand.parse_header()
+        assert (hand.sb, hand.bb) == (1, 2)
+
+    @pytest.mark.parametrize(
+        ("amount", "expected"),
+        [("$0.02", 2), ("1.5", 150), ("$12", 1200), ("€3.45", 345), ("0", 0)],
+    )
+    def test_cents(self, amount, expected):
+        assert hh._cents(amount) == expected
+
+    def test_fraction_of_a_cent(self):
+        with pytest.raises(ValueError):
+            hh._cents("$0.005")
+
+
+class TestParseDate:
+
+    @staticmethod
+    def _strptime_date(date_string):
+        hand = PokerStarsHandHistory("")
+        hh._BaseHandHistory._parse_date(hand, date_string)
+        return hand.date
+
+    @pytest.mark.parametrize(
+        "date_string",
+        [
+            "2013/10/04 13:53:27 ET",
+            "2016/04/27 0:17:16 ET",
+            # start of daylight saving time, 2:30 doesn't exist
+            "2020/03/08 0:30:00 ET",
+            "2020/03/08 1:59:59 ET",
+            "2020/03/08 2:30:00 ET",
+            "2020/03/08 3:00:00 ET",
+            "2020/03/08 23:59:59 ET",
+            # end of daylight saving time, 1:30 is ambiguous
+            "2020/11/01 0:59:59 ET",
+            "2020/11/01 1:30:00 ET",
+            "2020/11/01 2:00:00 ET",
+            "2020/11/02 1:30:00 ET",
+            "2020/12/31 23:59:59 ET",
+        ],
+    )
+    def test_same_as_strptime(self, date_string):
+        hand = PokerStarsHandHistory("")
+        hand._parse_date(date_string)
+        expected = self._strptime_date(date_string)
+        assert hand.date == expected
+        assert hand.date.tzinfo is expected.tzinfo
+
+    def test_offset_is_cached_per_day(self):
+        hand = PokerStarsHandHistory("")
+        hand._parse_date("2019/07/01 10:00:00 ET")
+        hand._parse_date("2020/03/08 1:00:00 ET")
+        assert hh._day_offsets[("US/Eastern", 2019, 7, 1)] == -timedelta(hours=4)
+        # the offset changes on the day of the daylight saving time switch
+        assert hh._day_offsets[("US/Eastern", 2020, 3, 8)] is None
+
+    @pytest.mark.parametrize(
+        "date_string", ["2020/04/16 13:55:19 E", "2020-04-16 13:55:19 ET", "2020/13/16 1:00:00 ET"]
+    )
+    def test_malformed_date(self, date_string):
+        with pytest.raises(ValueError):
+            PokerStarsHandHistory("")._parse_date(date_string)
+
+
+@pytest.mark.parametrize("hand_text", all_test_hands)
+@pytest.mark.parametrize("encode", [False, True], ids=["str", "bytes"])
+def test_sections_are_the_lines_between_the_markers(hand_text, encode):
+    hand = PokerStarsHandHistory(hand_text.encode() if encode else hand_text)
+    # without parse_header, which fails on the unsupported games
+    _, hand._body_start = hand._line(0)
+    hand._find_markers()
+    lines = hand_text.strip().split("\n")
+    markers = [ind for ind, line in enumerate(lines) if line.startswith("***")]
+    assert list(hand._markers) == [lines[ind].split("***")[1].strip() for ind in markers]
+    for ind, stop in zip(markers, markers[1:] + [len(lines)]):
+        name, _, rest = lines[ind][4:].partition(" ***")
+        assert hand._section(name) == (rest.strip(), [line for line in lines[ind + 1:stop] if line])
+
+
+def test_bytes_are_decoded_by_the_stages():
+    hand = PokerStarsHandHistory(stars_hands.HAND12.encode())
+    hand.parse(lazy=True)
+    assert isinstance(hand._text, bytes)
+    assert hand.flop.cards == (Card("3c"), Card("3h"), Card("3s"))
+    text_hand = PokerStarsHandHistory(stars_hands.HAND12)
+    text_hand.parse()
+    assert hand.results == text_hand.results
+    assert sorted(hand.winners) == sorted(text_hand.winners)
+    assert hand.players == text_hand.players
@@ -0,0 +1,103 @@
+import pytest
+from poker.card import Card, Suit
+from poker.hand import Combo
+from poker.board import canonical, flops, texture, Texture
+from poker.room.pokerstars import _Street
+
+
+def test_suit_permuted_flops_are_the_same():
+    result = canonical("AhKh2c")
+    assert result.cards == (Card("2c"), Card("Kd"), Card("Ad"))
+    assert canonical("AsKs2d").cards == result.cards
+    assert canonical([Card("2h"), Card("Ac"), Card("Kc")]).cards == result.cards
+
+
+def test_order_of_cards_does_not_matter():
+    assert canonical("2c7d9s") == canonical("9s2c7d")
+
+
+def test_permutation_maps_original_to_canonical():
+    result = canonical("AhKh2c")
+    original = (Card("Ah"), Card("Kh"), Card("2c"))
+    mapped = sorted(Card(f"{c.rank}{result.permutation[c.suit]}") for c in original)
+    assert tuple(mapped) == result.cards
+    assert sorted(result.permutation.values()) == sorted(Suit)
+
+
+def test_hero_is_permuted_together_with_board():
+    first = canonical("2c7d9s", Combo("AhKh"))
+    second = canonical("2h7c9d", Combo("AsKs"))
+    assert first.cards == second.cards
+    assert first.hero == second.hero
+    assert canonical("2c7d9s", Combo("AhKd")).hero != first.hero
+
+
+def test_turn_and_river():
+    assert len(canonical("2c7d9sTh").cards) == 4
+    assert canonical("2c7d9sTh5c").cards == canonical("2d7h9cTs5d").cards
+
+
+def test_street_cards_can_be_used():
+    street = _Street(["[8s 5h Jh]"])
+    assert canonical(street) == canonical("8s5hJh")
+
+
+@pytest.mark.parametrize("board", ["2c", "2x7d9s"])
+def test_invalid_cards_raise(board):
+    with pytest.raises(ValueError):
+        canonical(board)
+
+
+def test_there_are_1755_flops():
+    all_flops = list(flops())
+    assert len(all_flops) == 1755
+    assert sum(weight for _, weight in all_flops) == 22100
+
+
+def test_flop_weights():
+    weights = dict(flops())
+    assert weights[(Card("2c"), Card("2d"), Card("2h"))] == 4
+    assert weights[canonical("AhKh2c").cards] == 12
+    assert weights[canonical("AhKd2c").cards] == 24
+    assert weights[canonical("AhKhQh").cards] == 4
+
+
+def test_flops_are_canonical():
+    for cards, _ in flops():
+        assert canonical(cards).cards == cards
+
+
+@pytest.mark.parametrize(
+    ("board", "expected"),
+    [
+        ("2s6d6h", Texture.RAINBOW | Texture.PAIR | Texture.GUTSHOT),
+        ("3c6s9d", Texture.RAINBOW | Texture.STRAIGHTDRAW | Texture.GUTSHOT),
+        ("8s5hJh", Texture.STRAIGHTDRAW | Texture.GUTSHOT | Texture.FLUSHDRAW),
+        ("2h7h9h", Texture.MONOTONE | Texture.FLUSHDRAW | Texture.STRAIGHTDRAW | Texture.GUTSHOT),
+        ("KcKdKh", Texture.RAINBOW | Texture.TRIPLET | Texture.PAIR),
+        ("Ac2d8h", Texture.RAINBOW | Texture.STRAIGHTDRAW | Texture.GUTSHOT),
+        ("Ac5d9h", Texture.RAINBOW | Texture.GUTSHOT),
+        ("Ac6d9h", Texture.RAINBOW | Texture.STRAIGHTDRAW | Texture.GUTSHOT),
+    ],
+)
+def test_flop_texture(board, expected):
+    assert texture(board) == expected
+
+
+def test_turn_and_river_texture():
+    assert texture("2s6d6hKc") == Texture.RAINBOW | Texture.PAIR | Texture.GUTSHOT
+    assert texture("2s6d6hKs") == Texture.PAIR | Texture.GUTSHOT | Texture.FLUSHDRAW
+    assert texture("2h7h9hTh") == (
+        Texture.MONOTONE | Texture.FLUSHDRAW | Texture.STRAIGHTDRAW | Texture.GUTSHOT
+    )
+    assert not texture("2c3d4h5sKc") & Texture.RAINBOW
+
+
+def test_street_texture_properties_are_independent():
+    street = _Street(["[8s 5h Jh]"])
+    assert street.has_flushdraw
+    # every property used to share one exhausted iterator
+    assert not street.is_triplet
+    assert street.has_straightdraw
+    assert street.has_gutshot
+    assert not street.is_monotone
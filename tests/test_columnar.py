@@ -0,0 +1,152 @@
+from pathlib import Path
+import pytest
+from poker.constants import Action, GameType
+from poker.room.pokerstars import PokerStarsHandHistory
+from tests.handhistory import stars_hands
+
+np = pytest.importorskip("numpy")
+from poker import columnar  # noqa: E402
+
+
+AKSNES = (
+    Path(__file__).parent / "handhistory" / "data" / "PokerStars" /
+    "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+)
+
+
+def _parsed_hands(**kwargs):
+    hands = []
+    for hand in PokerStarsHandHistory.iter_hands(AKSNES, **kwargs):
+        try:
+            hand.parse()
+        except Exception:
+            continue
+        hands.append(hand)
+    return hands
+
+
+@pytest.fixture(scope="module")
+def hands():
+    return _parsed_hands(integer_amounts=True)
+
+
+@pytest.fixture
+def tables(hands, tmp_path):
+    assert columnar.export(hands, tmp_path, shard_size=10, format="npz") == len(hands)
+    return columnar.load(tmp_path)
+
+
+def test_shards(hands, tmp_path):
+    with columnar.ColumnarWriter(tmp_path, shard_size=10, format="npz") as writer:
+        for hand in hands:
+            writer.write(hand)
+    assert writer.shards == -(-len(hands) // 10)
+    assert len(list(tmp_path.glob("actions-*.npz"))) == writer.shards
+    assert (tmp_path / "strings.npz").exists()
+
+
+def test_hands_table(hands, tables):
+    hands_table, strings = tables["hands"], tables["strings"]
+    assert len(hands_table["ident"]) == len(hands)
+    first = hands[0]
+    assert hands_table["ident"][0] == int(first.ident)
+    assert hands_table["date"][0] == np.datetime64(first.date.replace(tzinfo=None), "s")
+    assert hands_table["sb"][0] == 1 and hands_table["bb"][0] == 2
+    assert hands_table["total_pot"][0] == first.total_pot
+    # cash hands have the rake of the pot, but no buyin fee
+    assert hands_table["pot_rake"].tolist() == [hand.pot_rake for hand in hands]
+    assert (hands_table["buyin_rake"] == columnar.MISSING).all()
+    assert hands_table["earnings"][0] == first.earnings
+    assert strings[hands_table["hero"][0]] == first.hero.name
+    assert strings[hands_table["table"][0]] == "Aksnes II"
+    assert tuple(GameType)[hands_table["game_type"][0]] == GameType.CASH
+    assert (hands_table["tournament_ident"] == columnar.MISSING).all()
+    for name, dtype in columnar.TABLES["hands"]:
+        assert hands_table[name].dtype == np.dtype(dtype)
+
+
+def test_players_table(hands, tables):
+    players, strings = tables["players"], tables["strings"]
+    first = [player for player in hands[0].players if not player.name.startswith("Empty Seat")]
+    rows = players["hand"] == 0
+    assert [strings[player_id] for player_id in players["player"][rows]] == [
+        player.name for player in first
+    ]
+    assert players["stack"][rows].tolist() == [player.stack for player in first]
+
+
+def test_actions_table(hands, tables):
+    actions, strings = tables["actions"], tables["strings"]
+    expected = []
+    for hand_row, hand in enumerate(hands):
+        for street_code, street_name in enumerate(columnar.STREETS):
+            street = getattr(hand, street_name)
+            for action in (street.actions if street is not None else None) or ():
+                amount = action.amount if action.amount is not None else columnar.MISSING
+                expected.append((hand_row, street_code, action.name, action.action, amount))
+    actual = [
+        (hand_row, street, strings[player], tuple(Action)[action], amount)
+        for hand_row, street, player, action, amount in zip(
+            actions["hand"].tolist(),
+            actions["street"].tolist(),
+            actions["player"].tolist(),
+            actions["action"].tolist(),
+            actions["amount"].tolist(),
+        )
+    ]
+    assert actual == expected
+
+
+def test_vectorized_group_by(hands, tables):
+    actions = tables["actions"]
+    wins = actions["action"] == tuple(Action).index(Action.WIN)
+    won = np.bincount(actions["hand"][wins], weights=actions["amount"][wins], minlength=len(hands))
+    assert won.sum() == sum(
+        action.amount
+        for hand in hands
+        for street in (hand.preflop, hand.flop, hand.turn, hand.river, hand.show_down)
+        if street is not None and street.actions is not None
+        for action in street.actions
+        if action.action == Action.WIN
+    )
+
+
+def test_decimal_cash_amounts_are_rejected(tmp_path):
+    hand = PokerStarsHandHistory(stars_hands.HAND16)
+    hand.parse()
+    with columnar.ColumnarWriter(tmp_path, format="npz") as writer:
+        with pytest.raises(ValueError, match="integer_amounts"):
+            writer.write(hand)
+        assert writer.hands == 0
+        assert all(not column for column in writer._columns["hands"].values())
+
+
+def test_tournament(tmp_path):
+    hand = PokerStarsHandHistory(stars_hands.HAND1, integer_amounts=True)
+    hand.parse()
+    columnar.export([hand], tmp_path, format="npz")
+    hands_table = columnar.load(tmp_path)["hands"]
+    assert hands_table["bb"].tolist() == [20]
+    assert hands_table["buyin"].tolist() == [319]
+    assert hands_table["buyin_rake"].tolist() == [31]
+    assert hands_table["pot_rake"].tolist() == [0]
+    assert hands_table["tournament_ident"].tolist() == [797469411]
+
+
+def test_string_pool():
+    pool = columnar.StringPool()
+    assert [pool.encode(name) for name in ("a", "b", "a", None)] == [0, 1, 0, -1]
+    assert len(pool) == 2
+    assert pool[1] == "b"
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        columnar.ColumnarWriter(tmp_path, format="csv")
+
+
+def test_parquet(hands, tmp_path):
+    pytest.importorskip("pyarrow")
+    columnar.export(hands, tmp_path, shard_size=10, format="parquet")
+    tables = columnar.load(tmp_path)
+    assert tables["hands"]["ident"].tolist() == [int(hand.ident) for hand in hands]
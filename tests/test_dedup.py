@@ -0,0 +1,147 @@
+from pathlib import Path
+import pytest
+from poker import dedup
+from poker.constants import PokerRoom
+from poker.room.pokerstars import PokerStarsHandHistory
+from poker.room.fulltiltpoker import FullTiltPokerHandHistory
+from tests.handhistory import stars_hands, ftp_hands
+
+
+AKSNES = (
+    Path(__file__).parent / "handhistory" / "data" / "PokerStars" /
+    "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+)
+
+
+def _stars_hands():
+    return list(PokerStarsHandHistory.iter_hands(AKSNES))
+
+
+def test_hand_key():
+    key = dedup.hand_key(PokerRoom.STARS, "105024000105")
+    assert 0 <= key < 2 ** 64
+    assert key == dedup.hand_key(PokerRoom.STARS, "105024000105")
+    assert key != dedup.hand_key(PokerRoom.FTP, "105024000105")
+
+
+def test_bloom_filter():
+    bloom = dedup.BloomFilter(1000)
+    keys = [dedup.hand_key(PokerRoom.STARS, str(ident)) for ident in range(2000)]
+    for key in keys[:1000]:
+        bloom.add(key)
+    assert all(key in bloom for key in keys[:1000])
+    false_positives = sum(key in bloom for key in keys[1000:])
+    assert false_positives < 50
+
+    copy = dedup.BloomFilter.from_bytes(bloom.to_bytes())
+    assert (copy.size, copy.hashes) == (bloom.size, bloom.hashes)
+    assert all(key in copy for key in keys[:1000])
+
+
+def test_hand_set_in_memory():
+    seen = dedup.HandSet()
+    assert seen.add(1) is True
+    assert seen.add(1) is False
+    assert 1 in seen and 2 not in seen
+    seen.save()
+    assert 1 in seen and len(seen) == 1
+
+
+def test_hand_set_is_persistent(tmp_path):
+    path = tmp_path / "seen.u64"
+    seen = dedup.HandSet(path)
+    for key in (5, 3, 2 ** 64 - 1, 0):
+        seen.add(key)
+    seen.save()
+    assert path.stat().st_size == 4 * 8
+
+    seen = dedup.HandSet(path)
+    assert list(seen._keys) == [0, 3, 5, 2 ** 64 - 1]
+    assert all(key in seen for key in (0, 3, 5, 2 ** 64 - 1))
+    assert 4 not in seen
+    assert seen.add(4) is True
+    seen.save()
+    assert len(dedup.HandSet(path)) == 5
+
+
+def test_stale_bloom_filter_is_rebuilt(tmp_path):
+    path = tmp_path / "seen.u64"
+    seen = dedup.HandSet(path)
+    seen.add(1)
+    seen.save()
+    # keys saved by an other process without the filter
+    path.write_bytes(path.read_bytes() + (7).to_bytes(8, "little"))
+    assert 7 in dedup.HandSet(path)
+    (tmp_path / "seen.u64.bloom").write_bytes(b"broken")
+    assert 7 in dedup.HandSet(path)
+
+
+def test_bloom_filter_capacity_is_restored(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedup, "_MIN_CAPACITY", 8)
+    path = tmp_path / "seen.u64"
+    seen = dedup.HandSet(path)
+    for key in range(6):
+        seen.add(key)
+    seen.save()
+    # the filter was sized for 8 keys, not for twice the 6 saved keys
+    reloaded = dedup.HandSet(path)
+    assert reloaded._capacity == 8
+    for key in range(6, 9):
+        reloaded.add(key)
+    reloaded.save()
+    assert dedup.HandSet(path)._capacity == 18
+    assert all(key in dedup.HandSet(path) for key in range(9))
+
+
+def test_unique_drops_duplicates_before_parse(tmp_path):
+    path = tmp_path / "seen.u64"
+    hands = _stars_hands()
+    stats = dedup.DedupStats()
+    first = list(dedup.unique(hands[:10], dedup.HandSet(path), stats))
+    assert stats == dedup.DedupStats(hands=10, duplicates=0, errors=0)
+    assert [hand.ident for hand in first] == [hand.ident for hand in hands[:10]]
+
+    # nothing was saved yet
+    seen = dedup.HandSet(path)
+    assert len(seen) == 0
+    list(dedup.unique(hands[:10], seen))
+    seen.save()
+
+    stats = dedup.DedupStats()
+    overlapping = _stars_hands()
+    new = list(dedup.unique(overlapping, dedup.HandSet(path), stats))
+    assert stats.duplicates == 10 and stats.hands == len(hands)
+    assert [hand.ident for hand in new] == [hand.ident for hand in overlapping[10:]]
+    assert all(hand.header_parsed and not hand.parsed for hand in overlapping)
+
+
+def test_unique_in_one_stream():
+    hands = [PokerStarsHandHistory(stars_hands.HAND1) for _ in range(3)]
+    stats = dedup.DedupStats()
+    assert len(list(dedup.unique(hands, dedup.HandSet(), stats))) == 1
+    assert stats.duplicates == 2
+
+
+def test_same_ident_in_different_rooms():
+    stars = PokerStarsHandHistory(stars_hands.HAND1)
+    ftp = FullTiltPokerHandHistory(ftp_hands.HAND1)
+    stars.parse_header()
+    ftp.parse_header()
+    ftp.ident = stars.ident
+    assert len(list(dedup.unique([stars, ftp], dedup.HandSet()))) == 2
+
+
+def test_broken_header_is_counted():
+    stats = dedup.DedupStats()
+    broken = PokerStarsHandHistory("PokerStars Hand #1: broken")
+    assert list(dedup.unique([broken], dedup.HandSet(), stats)) == []
+    assert stats.errors == 1
+
+
+@pytest.mark.parametrize("error_rate", [0.1, 0.001])
+def test_error_rate(error_rate):
+    seen = dedup.HandSet(error_rate=error_rate)
+    for key in range(100):
+        seen.add(key)
+    assert all(key in seen for key in range(100))
+    assert not any(key in seen for key in range(100, 1000))
@@ -0,0 +1,137 @@
+import pytest
+from poker.card import Card
+from poker.hand import Combo, Range
+from poker.equity import EquityCache, canonical_key
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, first, second, board):
+        self.calls += 1
+        return 0.5
+
+
+def test_suit_permuted_spots_share_key():
+    key = canonical_key(Combo("AhKh"), Range("QQ"), "2c7d9s")
+    assert canonical_key(Combo("AsKs"), Range("QQ"), "2h7c9d") == key
+    assert canonical_key("AdKd", "QQ", [Card("9h"), Card("2s"), Card("7c")]) == key
+
+
+def test_different_spots_have_different_keys():
+    key = canonical_key(Combo("AhKh"), Range("QQ"), "2c7d9s")
+    assert canonical_key(Combo("AhKh"), Range("QQ"), "2h7d9s") != key
+    assert canonical_key(Range("QQ"), Combo("AhKh"), "2c7d9s") != key
+    assert canonical_key(Combo("AhKd"), Range("QQ"), "2c7d9s") != key
+
+
+def test_preflop_key_canonicalizes_ranges():
+    assert canonical_key("AhKh", "22", ()) == canonical_key("AcKc", "22", ())
+    assert canonical_key("AhKh", "22", ()) != canonical_key("AhKc", "22", ())
+
+
+def test_memory_hits_are_counted():
+    calculate = _Counter()
+    cache = EquityCache(calculate)
+    assert cache(Combo("AhKh"), Range("QQ"), "2c7d9s") == 0.5
+    assert cache(Combo("AsKs"), Range("QQ"), "2h7c9d") == 0.5
+    assert calculate.calls == 1
+    assert cache.cache_info() == (1, 0, 1, 65536, 1)
+    assert cache.hit_rate == 0.5
+
+
+def test_least_recently_used_is_evicted():
+    calculate = _Counter()
+    cache = EquityCache(calculate, maxsize=1)
+    cache("AhKh", "QQ", "2c7d9s")
+    cache("AhKh", "JJ", "2c7d9s")
+    cache("AhKh", "QQ", "2c7d9s")
+    assert calculate.calls == 3
+    assert cache.cache_info().currsize == 1
+
+
+def test_results_persist_on_disk(tmp_path):
+    path = tmp_path / "equity.sqlite"
+    calculate = _Counter()
+    with EquityCache(calculate, path) as cache:
+        cache("AhKh", "QQ", "2c7d9s")
+
+    with EquityCache(calculate, path) as cache:
+        assert cache("AsKs", "QQ", "2h7c9d") == 0.5
+        assert cache.disk_hits == 1
+    assert calculate.calls == 1
+
+
+def test_invalid_board_card_raises():
+    with pytest.raises(ValueError):
+        canonical_key("AhKh", "QQ", "2c7x9s")
+
+
+def test_outs_against_known_combo():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    result = outs(Combo("AhKh"), "Qh7h2c", Combo("QsQd"))
+    # 2h gives villain a full house
+    expected = tuple(Card(f"{rank}h") for rank in "345689TJ")
+    assert result.cards == expected
+    assert result.next_card == pytest.approx(8 / 45)
+    assert result.next_card < result.by_river < 0.5
+
+
+def test_outs_on_the_turn():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    result = outs("AhKh", "Qh7h2c9s", Combo("QsQd"))
+    assert len(result.cards) == 7
+    assert result.by_river == result.next_card == pytest.approx(7 / 44)
+
+
+def test_no_outs_when_ahead():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    result = outs(Combo("QsQd"), "Qh7h2c", Combo("AhKh"))
+    assert result.cards == ()
+    assert result.next_card == 0
+    # the set stays the best when the flush doesn't come
+    drawing = outs(Combo("AhKh"), "Qh7h2c", Combo("QsQd"))
+    assert result.by_river == pytest.approx(1 - drawing.by_river)
+
+
+def test_staying_best_on_the_turn():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    result = outs(Combo("QsQd"), "Qh7h2c9s", Combo("AhKh"))
+    assert result.cards == ()
+    assert result.by_river == pytest.approx(1 - 7 / 44)
+
+
+def test_outs_against_range():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    result = outs(Combo("AhKh"), "Qh7h2c", Range("QQ 77"))
+    assert Card("3h") in result.cards
+    assert Card("Ac") not in result.cards
+
+
+def test_outs_with_unknown_villain():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    result = outs(Combo("AhKh"), "Qh7h2c")
+    # 9 flush cards, 3 Aces and 3 Kings
+    assert len(result.cards) == 15
+    assert Card("Qc") not in result.cards
+
+
+def test_outs_need_flop_or_turn():
+    pytest.importorskip("numpy")
+    from poker.equity import outs
+
+    with pytest.raises(ValueError):
+        outs(Combo("AhKh"), "Qh7h2c9s3d")
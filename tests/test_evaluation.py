@@ -0,0 +1,122 @@
+import pytest
+from poker.hand import Combo, Range
+from poker import _lookup
+
+np = pytest.importorskip("numpy")
+from poker.evaluation import MadeHand, Draw, evaluate, breakdown, range_weights  # noqa: E402
+
+
+def _score(cards):
+    return int(evaluate([_lookup.card_ids(cards)])[0])
+
+
+def _category(cards):
+    return list(MadeHand)[_score(cards) >> 26]
+
+
+@pytest.mark.parametrize(
+    ("cards", "expected"),
+    [
+        ("AhKhQhJhTh2c3d", MadeHand.STRAIGHT_FLUSH),
+        ("Ah2h3h4h5h9c9d", MadeHand.STRAIGHT_FLUSH),
+        ("7c7d7h7sKd2c3d", MadeHand.QUADS),
+        ("7c7d7hKsKd2c3d", MadeHand.FULL_HOUSE),
+        ("7c7d7hKsKdKc3d", MadeHand.FULL_HOUSE),
+        ("2h5h9hJhKh2c2d", MadeHand.FLUSH),
+        ("As2d3c4h5s9h9d", MadeHand.STRAIGHT),
+        ("9c9d9h2s5dKhJc", MadeHand.TRIPS),
+        ("9c9d5h5sKdKhJc", MadeHand.TWO_PAIR),
+        ("9c9d5h6sKd2hJc", MadeHand.PAIR),
+        ("9c8d5h6sKd2hJc", MadeHand.HIGH_CARD),
+        ("AhKd", MadeHand.HIGH_CARD),
+    ],
+)
+def test_categories(cards, expected):
+    assert _category(cards) == expected
+
+
+@pytest.mark.parametrize(
+    ("better", "worse"),
+    [
+        ("AhKhQhJhTh", "9h8h7h6h5h"),
+        ("6h5h4h3h2h", "Ah2h3h4h5h"),
+        ("7c7d7h7sAd", "7c7d7h7sKd"),
+        ("AcAdAhKsKd", "KcKdKhAsAd"),
+        ("AhJh9h5h3h", "AhJh9h5h2h"),
+        ("6s2d3c4h5s", "As2d3c4h5s"),
+        ("9c9dAhKsQd", "9c9dAhKsJd"),
+        ("KcKd5h5s2d", "KcKd4h4sAd"),
+        ("KcKd5h5sAd", "KcKd5h5sQd"),
+        ("AcKdQh9s7d", "AcKdQh9s6d"),
+    ],
+)
+def test_ordering(better, worse):
+    assert _score(better) > _score(worse)
+
+
+def test_same_hands_score_equal():
+    assert _score("AhKdQc9s7d") == _score("AcKhQd9h7s")
+    # best five cards only
+    assert _score("AhAdKcQs9d3c2h") == _score("AhAdKcQs9d4c2h")
+
+
+def test_breakdown_counts_every_live_combo():
+    result = breakdown(Range("XX"), "Ah7h2c")
+    counts = result.to_dict()
+    assert sum(counts[made_hand] for made_hand in MadeHand) == 1176
+    assert counts[MadeHand.TRIPS] == 9
+    assert counts[Draw.FLUSH_DRAW] == 55
+    assert counts[Draw.GUTSHOT] == 48
+    assert counts[Draw.OESD] == 0
+
+
+def test_breakdown_categories_per_combo():
+    result = breakdown(Range("AA KQs 98s"), "Ah7h2c")
+    assert result.category("AsAd") == MadeHand.TRIPS
+    assert result.category(Combo("KhQh")) == MadeHand.HIGH_CARD
+    assert result.category("JhTh") is None
+    assert result.made_hands.shape == (1326,)
+    # AhAx combos are blocked by the board
+    assert result.to_dict()[MadeHand.TRIPS] == 3
+
+
+def test_breakdown_draws():
+    result = breakdown("KhQh 98s", "Ah7h2c")
+    flush_draw = 1 << list(Draw).index(Draw.FLUSH_DRAW)
+    assert result.draws[_lookup.combo_id(Combo("KhQh"))] & flush_draw
+    counts = result.to_dict()
+    assert counts[Draw.FLUSH_DRAW] == 2
+    assert counts[Draw.OESD] == 0
+    # KhQh with the Ace also has a backdoor Broadway
+    assert counts[Draw.BACKDOOR_STRAIGHT_DRAW] == 5
+
+
+def test_open_ended_straight_draw():
+    counts = breakdown("98s", "Th7c2d").to_dict()
+    assert counts[Draw.OESD] == 4
+    # 9c8c, 9d8d and 9h8h have one suit on the board
+    assert counts[Draw.BACKDOOR_FLUSH_DRAW] == 3
+
+
+def test_no_draws_on_the_river():
+    counts = breakdown("KhQh", "Ah7h2c3d9s").to_dict()
+    assert all(counts[draw] == 0 for draw in Draw)
+
+
+def test_weighted_breakdown():
+    counts = breakdown({"AsAd": 0.5, "KhQh": 1.0}, "Ah7h2c").to_dict()
+    assert counts[MadeHand.TRIPS] == 0.5
+    assert counts[MadeHand.HIGH_CARD] == 1.0
+
+
+def test_range_weights():
+    weights = range_weights("AA")
+    assert weights.sum() == 6
+    assert weights[_lookup.combo_id(Combo("AsAd"))] == 1
+    assert range_weights({"KhQh": 0.5})[_lookup.combo_id(Combo("KhQh"))] == 0.5
+    assert range_weights(Combo("KhQh")).sum() == 1
+
+
+def test_invalid_board():
+    with pytest.raises(ValueError):
+        breakdown("AA", "Ah7h")
@@ -0,0 +1,84 @@
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+import pytz
+import pytest
+from click.testing import CliRunner
+from poker.constants import PokerRoom, Game, Limit
+from poker.commands import poker
+from poker.index import HandIndex
+from poker.room.pokerstars import PokerStarsHandHistory
+
+
+DATA_DIR = Path(__file__).parent / "handhistory" / "data"
+STARS_DIR = DATA_DIR / "PokerStars"
+AKSNES = STARS_DIR / "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+
+
+@pytest.fixture
+def hand_index(tmp_path):
+    with HandIndex(tmp_path / "index.sqlite") as hand_index:
+        hand_index.build([AKSNES])
+        yield hand_index
+
+
+def test_every_hand_is_indexed(hand_index):
+    assert len(hand_index) == 32
+
+
+def test_lookup_by_ident(hand_index):
+    entry = hand_index.get("212113219605")
+    assert entry.room == PokerRoom.STARS
+    assert entry.date == datetime(2020, 4, 16, 17, 54, 25, tzinfo=pytz.UTC)
+    assert entry.game == Game.HOLDEM
+    assert entry.limit == Limit.NL
+    assert (entry.sb, entry.bb) == (Decimal("0.01"), Decimal("0.02"))
+    assert entry.offset == 0
+    assert hand_index.get("212113219605", PokerRoom.FTP) is None
+    assert hand_index.get("1") is None
+
+
+def test_raw_text_is_read_from_offset(hand_index):
+    expected = list(PokerStarsHandHistory.iter_hands(AKSNES))
+    for entry, hand in zip(hand_index.find(), expected):
+        hand_history = entry.hand_history()
+        assert hand_history.raw == hand.raw
+        hand_history.parse_header()
+        assert hand_history.ident == entry.ident
+
+
+def test_find_by_date_and_stakes(hand_index):
+    start = datetime(2020, 4, 16, 18, 0)
+    entries = list(hand_index.find(start=start, sb="0.01", bb=Decimal("0.02")))
+    assert entries
+    assert all(entry.date >= pytz.UTC.localize(start) for entry in entries)
+    assert [entry.date for entry in entries] == sorted(entry.date for entry in entries)
+    assert list(hand_index.find(bb=5)) == []
+    assert len(list(hand_index.find(end=start))) + len(entries) == 32
+
+
+def test_unchanged_files_are_skipped(hand_index):
+    stats = hand_index.build([STARS_DIR])
+    assert stats.skipped == 1
+    assert stats.files == len(list(STARS_DIR.iterdir())) - 1
+    assert len(hand_index) == stats.hands + 32
+
+
+def test_changed_file_is_reindexed(tmp_path):
+    path = tmp_path / "hands.txt"
+    path.write_bytes(AKSNES.read_bytes())
+    with HandIndex(tmp_path / "index.sqlite") as hand_index:
+        hand_index.build([path])
+        path.write_bytes(AKSNES.read_bytes()[:1900])
+        stats = hand_index.build([tmp_path])
+        assert stats.files == 1
+        assert len(hand_index) == 1
+
+
+def test_index_build_command(tmp_path):
+    database = tmp_path / "index.sqlite"
+    result = CliRunner().invoke(poker, ["index", "build", str(database), str(AKSNES)])
+    assert result.exit_code == 0
+    assert "Indexed hands:      32" in result.output
+    with HandIndex(database) as hand_index:
+        assert len(hand_index) == 32
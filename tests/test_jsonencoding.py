@@ -1,12 +1,15 @@
+import io
 import re
+import json
 from decimal import Decimal
 
 import pytest
 
-from poker.card import Card
+from poker.card import Card, Rank
+from poker.constants import Game, GameType, Limit, Currency, MoneyType
 from poker.hand import Combo
 from poker.handhistory import _Player
-from poker.jsonencoding import JsonEncoder
+from poker.jsonencoding import JsonEncoder, write_ndjson, decode_hand, read_ndjson
 from poker.room.pokerstars import _Street, PokerStarsHandHistory
 from tests.handhistory import stars_hands
 
@@ -227,7 +230,7 @@ class TestFullPokerstarsHand:
 
     def test_flop_attribute_gutshot(self, json_encoder):
         json = json_encoder.encode(get_parsed_flop_hand13())
-        expected = "\"gutshot\": false"
+        expected = "\"gutshot\": true"
         assert expected in json
 
     def test_flop_attribute_paired(self, json_encoder):
@@ -237,7 +240,7 @@ class TestFullPokerstarsHand:
 
     def test_flop_attribute_straightdraw(self, json_encoder):
         json = json_encoder.encode(get_parsed_flop_hand13())
-        expected = "\"straightdraw\": false"
+        expected = "\"straightdraw\": true"
         assert expected in json
 
     def test_flop_attribute_monotone(self, json_encoder):
@@ -247,7 +250,7 @@ class TestFullPokerstarsHand:
 
     def test_flop_attribute_triplet(self, json_encoder):
         json = json_encoder.encode(get_parsed_flop_hand13())
-        expected = "\"triplet\": true"
+        expected = "\"triplet\": false"
         assert expected in json
 
     def test_turn_card(self, json_encoder):
@@ -289,4 +292,111 @@ class TestFullPokerstarsHand:
     def test_cash_out(self, json_encoder):
         json = json_encoder.encode(get_parsed_flop_hand14())
         print(json)
-        assert "\"earnings\": -2.34" in json
+        # all-in with the whole $2.50 stack, the raises are "to" the amount of the street
+        assert "\"earnings\": -2.03" in json
+
+
+class TestNdjson:
+
+    def test_one_hand_per_line(self, json_encoder, tmp_path):
+        hands = [get_parsed_hand(), get_parsed_flop_hand13(), get_parsed_flop_hand14()]
+        path = tmp_path / "hands.ndjson"
+        assert write_ndjson(hands, path) == 3
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines == [json_encoder.encode(hand) for hand in hands]
+        assert [json.loads(line)["id"] for line in lines] == [int(hand.ident) for hand in hands]
+
+    def test_file_object(self):
+        f = io.StringIO()
+        assert write_ndjson(iter([get_parsed_hand()]), f) == 1
+        assert f.getvalue().endswith("}\n")
+        assert write_ndjson([], f) == 0
+
+
+class TestDirectEncoding:
+
+    def test_shared_card_fragments_are_not_changed(self, json_encoder):
+        json_encoder.encode(get_parsed_hand())
+        assert json_encoder.encode(Card("Ad")) == "{\"rank\": \"A\", \"suit\": \"DIAMONDS\"}"
+
+    def test_containers(self, json_encoder):
+        data = {"combos": [Combo("AdKc")], "none": None}
+        expected = "{\"combos\": [{\"1\": {\"rank\": \"A\", \"suit\": \"DIAMONDS\"}, " \
+                   "\"2\": {\"rank\": \"K\", \"suit\": \"CLUBS\"}}], \"none\": null}"
+        assert json_encoder.encode(data) == expected
+
+    def test_unknown_object(self, json_encoder):
+        with pytest.raises(TypeError):
+            json_encoder.encode(object())
+        with pytest.raises(TypeError):
+            json_encoder.encode([Decimal("1")])
+
+
+class TestLoading:
+
+    def test_round_trip(self, json_encoder):
+        hand = get_parsed_hand()
+        loaded = decode_hand(json_encoder.encode(hand))
+        assert loaded.date == hand.date
+        assert (loaded.ident, loaded.table_name, loaded.hero, loaded.button) == (
+            "212700439098", "Heike II", "pokerhero", "sindyeichelbaum"
+        )
+        assert (loaded.game, loaded.game_type, loaded.limit) == (
+            Game.HOLDEM, GameType.CASH, Limit.NL
+        )
+        assert (loaded.currency, loaded.money_type) == (Currency.USD, MoneyType.REAL)
+        assert (loaded.bb, loaded.sb, loaded.max_players) == (0.02, 0.01, 9)
+        assert [(p.name, p.stack, p.seat, p.combo) for p in loaded.players] == [
+            (p.name, float(p.stack), p.seat, p.combo) for p in hand.players
+        ]
+        assert loaded.board == tuple(hand.board)
+        assert set(loaded.winners) == set(hand.winners)
+        assert loaded.earnings == float(hand.earnings)
+
+    def test_streets(self, json_encoder):
+        hand = get_parsed_flop_hand13()
+        loaded = decode_hand(json_encoder.encode(hand))
+        for street_name in ("preflop", "flop", "turn", "river", "show_down"):
+            street, loaded_street = getattr(hand, street_name), getattr(loaded, street_name)
+            assert [(a.name, a.action, a.amount) for a in loaded_street.actions] == [
+                (a.name, a.action, float(a.amount) if a.amount is not None else None)
+                for a in street.actions
+            ]
+            assert loaded_street.cards == (tuple(street.cards) if street.cards else None)
+        assert loaded.flop.cards[0].rank == Rank.EIGHT
+
+    def test_cards_and_combos_are_interned(self, json_encoder):
+        first = decode_hand(json_encoder.encode(get_parsed_hand()))
+        second = decode_hand(json_encoder.encode(get_parsed_hand()))
+        assert first.board[0] is second.board[0]
+        assert first.players[1].combo is second.players[1].combo
+
+    def test_projection(self, json_encoder):
+        loaded = decode_hand(json_encoder.encode(get_parsed_hand()), fields=["ident", "winners"])
+        assert loaded.ident == "212700439098"
+        assert set(loaded.winners) == {"BigSiddyB", "sindyeichelbaum "}
+        assert loaded.players is None and loaded.preflop is None and loaded.date is None
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError):
+            list(read_ndjson(io.StringIO(""), fields=["ident", "nope"]))
+
+    def test_tournament(self, json_encoder):
+        hand = PokerStarsHandHistory(stars_hands.HAND1)
+        hand.parse()
+        loaded = decode_hand(json_encoder.encode(hand))
+        assert (loaded.tournament_ident, loaded.tournament_level) == ("797469411", "I")
+        assert loaded.rake == float(hand.rake)
+
+    def test_read_ndjson(self, tmp_path):
+        hands = [get_parsed_hand(), get_parsed_flop_hand13(), get_parsed_flop_hand14()]
+        path = tmp_path / "hands.ndjson"
+        write_ndjson(hands, path)
+        with path.open("a", encoding="utf-8") as f:
+            f.write("\n")
+        loaded = list(read_ndjson(path, fields=["ident", "earnings"]))
+        assert [(hand.ident, hand.earnings) for hand in loaded] == [
+            (hand.ident, float(hand.earnings)) for hand in hands
+        ]
+        with path.open(encoding="utf-8") as f:
+            assert len(list(read_ndjson(f))) == 3
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from poker.live import watch, _complete_hands
+from poker.room.pokerstars import PokerStarsHandHistory
+from tests.handhistory import stars_hands
+
+
+HAND1 = stars_hands.HAND1.strip() + "\n\n\n"
+HAND2 = stars_hands.HAND2.strip() + "\n\n\n"
+HAND_START = PokerStarsHandHistory._HAND_START
+
+
+def test_incomplete_hand_is_not_consumed():
+    data = HAND1.encode() + HAND2.encode()[:100]
+    hands, consumed = _complete_hands(data, HAND_START)
+    assert [text for _, text in hands] == [stars_hands.HAND1.strip() + "\n"]
+    assert consumed == len(HAND1.encode())
+
+
+def test_next_hand_completes_previous():
+    data = (stars_hands.HAND1.strip() + "\n" + HAND2).encode()
+    hands, consumed = _complete_hands(data, HAND_START)
+    assert len(hands) == 2
+    assert hands[1][0] == len(stars_hands.HAND1.strip()) + 1
+    assert consumed == len(data)
+
+
+async def _next(queue):
+    return await asyncio.wait_for(queue.get(), timeout=5)
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_appended_hands_are_published(tmp_path):
+    path = tmp_path / "hands.txt"
+    checkpoint = tmp_path / "offsets.json"
+
+    async def scenario():
+        queue = asyncio.Queue(maxsize=10)
+        path.write_bytes(HAND1.encode() + HAND2.encode()[:200])
+        task = asyncio.create_task(watch(tmp_path, queue, checkpoint, interval=0.01))
+        first = await _next(queue)
+        assert first.ident == "105024000105"
+        assert first.parsed
+
+        await asyncio.sleep(0.05)
+        assert queue.empty()
+        with open(path, "ab") as f:
+            f.write(HAND2.encode()[200:])
+        second = await _next(queue)
+        assert second.ident == "105034215446"
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    _run(scenario())
+    assert json.loads(checkpoint.read_text()) == {str(path): path.stat().st_size}
+
+
+def test_restart_resumes_from_checkpoint(tmp_path):
+    path = tmp_path / "hands.txt"
+    checkpoint = tmp_path / "offsets.json"
+    path.write_text(HAND1)
+    checkpoint.write_text(json.dumps({str(path): len(HAND1.encode())}))
+
+    async def scenario():
+        queue = asyncio.Queue()
+        task = asyncio.create_task(
+            watch(tmp_path, queue, checkpoint, interval=0.01, header_only=True)
+        )
+        with open(path, "a") as f:
+            f.write(HAND2)
+        hand = await _next(queue)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return hand, queue.qsize()
+
+    hand, remaining = _run(scenario())
+    assert hand.ident == "105034215446"
+    assert hand.header_parsed and not hand.parsed
+    assert remaining == 0
+
+
+def test_other_files_are_ignored(tmp_path):
+    (tmp_path / "notes.txt").write_text("not a hand history\n\n")
+
+    async def scenario():
+        queue = asyncio.Queue()
+        task = asyncio.create_task(watch(tmp_path, queue, interval=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return queue.qsize()
+
+    assert _run(scenario()) == 0
@@ -0,0 +1,208 @@
+import pickle
+from pathlib import Path
+import pytest
+from poker.room.pokerstars import PokerStarsHandHistory
+from poker.room.fulltiltpoker import FullTiltPokerHandHistory
+from poker.stats import (
+    COUNTERS,
+    PlayerStats,
+    StatsAccumulator,
+    accumulate_many,
+    result_series,
+    result_series_by_player,
+)
+from tests.handhistory import stars_hands, ftp_hands
+
+
+AKSNES = (
+    Path(__file__).parent / "handhistory" / "data" / "PokerStars" /
+    "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+)
+
+
+def _parsed(hand_text):
+    hand = PokerStarsHandHistory(hand_text)
+    hand.parse()
+    return hand
+
+
+@pytest.fixture(scope="module")
+def aksnes_hands():
+    hands = []
+    for hand in PokerStarsHandHistory.iter_hands(AKSNES):
+        try:
+            hand.parse()
+        except Exception:
+            continue
+        hands.append(hand)
+    return hands
+
+
+def _counters(stats):
+    return {name: getattr(stats, name) for name in COUNTERS if getattr(stats, name)}
+
+
+def test_three_bet_and_showdown():
+    accumulator = StatsAccumulator()
+    accumulator.add(_parsed(stars_hands.HAND12))
+    assert accumulator.hands == 1
+    assert _counters(accumulator["BigSiddyB"]) == {
+        "hands": 1,
+        "voluntarily_put": 1,
+        "preflop_raised": 1,
+        "saw_flop": 1,
+        "went_to_showdown": 1,
+        "won_at_showdown": 1,
+    }
+    # re-raised the first raise
+    assert _counters(accumulator["sindyeichelbaum"]) == {
+        "hands": 1,
+        "voluntarily_put": 1,
+        "preflop_raised": 1,
+        "three_bets": 1,
+        "three_bet_chances": 1,
+        "saw_flop": 1,
+        "went_to_showdown": 1,
+        "won_at_showdown": 1,
+    }
+    # folded to the 3-bet, it's not a chance to 3-bet
+    assert _counters(accumulator["pokerhero"]) == {"hands": 1}
+    assert _counters(accumulator["oeggel"]) == {"hands": 1}
+
+
+def test_three_bet_chance_without_three_bet():
+    accumulator = StatsAccumulator()
+    accumulator.add(_parsed(stars_hands.HAND2))
+    assert accumulator["Hokolix"].three_bet_chances == 1
+    assert accumulator["Hokolix"].three_bet == 0
+    assert accumulator["costamar"].three_bet == 1
+    # called the 3-bet
+    assert accumulator["W2lkm2n"].three_bet_chances == 0
+    assert accumulator["W2lkm2n"].went_to_showdown == 1
+    assert accumulator["W2lkm2n"].won_at_showdown == 0
+
+
+def test_postflop_aggression():
+    accumulator = StatsAccumulator()
+    accumulator.add(_parsed(stars_hands.HAND14))
+    theo, nanoroma, tchile = (
+        accumulator["Theo53842"], accumulator["nanoroma"], accumulator["TchilePR"]
+    )
+    assert (theo.postflop_aggressive, theo.postflop_calls, theo.af) == (2, 0, None)
+    assert (nanoroma.postflop_aggressive, nanoroma.postflop_calls, nanoroma.af) == (1, 1, 1)
+    assert (tchile.saw_flop, tchile.went_to_showdown, tchile.wtsd) == (1, 0, 0)
+    assert (nanoroma.went_to_showdown, nanoroma.won_at_showdown) == (1, 1)
+    assert (theo.went_to_showdown, theo.wsd) == (1, 0)
+    assert accumulator["BigAngryFish"].saw_flop == 0
+
+
+def test_ratios():
+    stats = PlayerStats("a", 4, 2, 1, 1, 2, 3, 1, 2, 1, 1)
+    assert (stats.vpip, stats.pfr, stats.three_bet) == (0.5, 0.25, 0.5)
+    assert (stats.af, stats.wtsd, stats.wsd) == (3, 0.5, 1)
+    empty = PlayerStats("b", *[0] * len(COUNTERS))
+    assert empty.vpip is None and empty.af is None
+
+
+def test_accumulates_every_hand(aksnes_hands):
+    accumulator = StatsAccumulator()
+    accumulator.add_many(aksnes_hands)
+    assert accumulator.hands == len(aksnes_hands)
+    hands_played = {}
+    for hand in aksnes_hands:
+        for name in {action.name for action in hand.preflop.actions}:
+            hands_played[name] = hands_played.get(name, 0) + 1
+    assert {stats.name: stats.hands for stats in accumulator} == hands_played
+    assert len(accumulator) == len(hands_played)
+    for stats in accumulator:
+        assert stats.voluntarily_put >= stats.preflop_raised
+        assert stats.saw_flop >= stats.went_to_showdown >= stats.won_at_showdown
+        assert stats.three_bet_chances >= stats.three_bets
+
+
+def test_hero_only(aksnes_hands):
+    accumulator = StatsAccumulator(hero_only=True)
+    accumulator.add_many(aksnes_hands)
+    everyone = StatsAccumulator()
+    everyone.add_many(aksnes_hands)
+    hero = aksnes_hands[0].hero.name
+    assert accumulator.names == [hero]
+    assert accumulator[hero] == everyone[hero]
+
+
+def test_hands_without_preflop_actions_are_skipped():
+    hand = FullTiltPokerHandHistory(ftp_hands.HAND1)
+    hand.parse()
+    accumulator = StatsAccumulator()
+    accumulator.add(hand)
+    assert (accumulator.hands, accumulator.skipped, len(accumulator)) == (0, 1, 0)
+    assert "Player" not in accumulator
+
+
+def test_merge_is_the_same_as_serial(aksnes_hands):
+    serial = StatsAccumulator()
+    serial.add_many(aksnes_hands)
+    merged = StatsAccumulator()
+    for start in range(0, len(aksnes_hands), 7):
+        shard = StatsAccumulator()
+        shard.add_many(aksnes_hands[start:start + 7])
+        assert merged.merge(shard) is merged
+    assert merged.names == serial.names
+    assert list(merged) == list(serial)
+    assert (merged.hands, merged.skipped) == (serial.hands, serial.skipped)
+    assert merged == serial
+    assert StatsAccumulator().merge(serial) == serial
+
+
+def test_serialization(aksnes_hands):
+    accumulator = StatsAccumulator()
+    accumulator.add_many(aksnes_hands)
+    data = accumulator.to_bytes()
+    # header, names and the counters, no per player overhead
+    assert len(data) < 100 + sum(len(name) + 1 + 80 for name in accumulator.names)
+    loaded = StatsAccumulator.from_bytes(data)
+    assert list(loaded) == list(accumulator)
+    hero = aksnes_hands[0].hero.name
+    assert loaded[hero] == accumulator[hero]
+    assert pickle.loads(pickle.dumps(accumulator)) == accumulator
+
+    empty = StatsAccumulator(hero_only=True)
+    assert StatsAccumulator.from_bytes(empty.to_bytes()) == empty
+    with pytest.raises(ValueError):
+        StatsAccumulator.from_bytes(data[:-8])
+    with pytest.raises(ValueError):
+        StatsAccumulator.from_bytes(b"JUNK" + data[4:])
+
+
+def test_merge_hero_only_with_every_player():
+    with pytest.raises(ValueError):
+        StatsAccumulator().merge(StatsAccumulator(hero_only=True))
+
+
+def test_accumulate_many(aksnes_hands):
+    result = accumulate_many([AKSNES, AKSNES], workers=2, chunksize=16 * 1024)
+    serial = StatsAccumulator()
+    serial.add_many(aksnes_hands + aksnes_hands)
+    assert result == serial
+
+
+def test_result_series(aksnes_hands):
+    np = pytest.importorskip("numpy")
+    cumulative, bb_per_100 = result_series(aksnes_hands)
+    earnings = [float(hand.earnings) for hand in aksnes_hands]
+    assert np.allclose(cumulative, np.cumsum(earnings))
+    in_bb = [float(hand.earnings / hand.bb) for hand in aksnes_hands]
+    assert bb_per_100[-1] == pytest.approx(sum(in_bb) * 100 / len(in_bb))
+    assert len(result_series(aksnes_hands, "nobody")[0]) == 0
+
+
+def test_result_series_by_player(aksnes_hands):
+    np = pytest.importorskip("numpy")
+    by_player = result_series_by_player(aksnes_hands)
+    assert set(by_player) == {name for hand in aksnes_hands for name in hand.results}
+    for name in list(by_player)[:5]:
+        cumulative, bb_per_100 = by_player[name]
+        expected_cumulative, expected_bb_per_100 = result_series(aksnes_hands, name)
+        assert np.allclose(cumulative, expected_cumulative)
+        assert np.allclose(bb_per_100, expected_bb_per_100)
+    assert result_series_by_player([]) == {}
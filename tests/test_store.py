@@ -0,0 +1,180 @@
+import sqlite3
+from pathlib import Path
+import pytest
+from poker.room.pokerstars import PokerStarsHandHistory
+from poker.room.fulltiltpoker import FullTiltPokerHandHistory
+from poker.room.pkr import PKRHandHistory
+from poker.store.sqlite import HandStore, StoreStats
+from tests.handhistory import stars_hands, ftp_hands, pkr_hands
+
+
+AKSNES = (
+    Path(__file__).parent / "handhistory" / "data" / "PokerStars" /
+    "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+)
+
+
+def _parsed(hands):
+    result = []
+    for hand in hands:
+        try:
+            hand.parse()
+        except Exception:
+            continue
+        result.append(hand)
+    return result
+
+
+@pytest.fixture(scope="module")
+def hands():
+    return _parsed(PokerStarsHandHistory.iter_hands(AKSNES, integer_amounts=True))
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HandStore(tmp_path / "hands.sqlite", batch_size=10) as store:
+        yield store
+
+
+def _action_count(hands):
+    streets = ("preflop", "flop", "turn", "river", "show_down")
+    return sum(
+        len(getattr(hand, street).actions or ())
+        for hand in hands
+        for street in streets
+        if getattr(hand, street) is not None
+    )
+
+
+def test_every_hand_is_stored(store, hands):
+    assert store.add_many(hands) == StoreStats(inserted=len(hands), duplicates=0)
+    assert len(store) == len(hands)
+    actions = store.execute("SELECT count(*) FROM actions").fetchone()[0]
+    assert actions == _action_count(hands)
+
+
+def test_hand_row(store, hands):
+    store.add_many(hands)
+    hand = hands[0]
+    row = store.execute(
+        "SELECT h.room, h.date, h.sb, h.bb, h.total_pot, h.earnings, h.table_name, p.name "
+        "FROM hands h JOIN players p ON p.id = h.hero_id WHERE h.ident = ?",
+        (hand.ident,),
+    ).fetchone()
+    assert row == (
+        "STARS", hand.date.isoformat(), 1, 2, hand.total_pot, hand.earnings, "Aksnes II",
+        hand.hero.name,
+    )
+
+
+def test_rake_columns(store, hands):
+    store.add_many(hands)
+    rows = store.execute("SELECT pot_rake, buyin_rake FROM hands ORDER BY id").fetchall()
+    # cash hands have the rake of the pot, but no buyin fee
+    assert rows == [(hand.pot_rake, None) for hand in hands]
+
+
+def test_tournament_buyin_rake(store):
+    hand = PokerStarsHandHistory(stars_hands.HAND1, integer_amounts=True)
+    hand.parse()
+    store.add_many([hand])
+    assert store.execute("SELECT buyin, buyin_rake, pot_rake FROM hands").fetchone() == (319, 31, 0)
+
+
+def test_actions_in_order(store, hands):
+    store.add_many(hands)
+    hand = hands[0]
+    rows = store.execute(
+        "SELECT p.name, a.action, a.amount FROM actions a "
+        "JOIN hands h ON h.id = a.hand_id JOIN players p ON p.id = a.player_id "
+        "WHERE h.ident = ? AND a.street = 0 ORDER BY a.position",
+        (hand.ident,),
+    ).fetchall()
+    assert rows == [
+        (action.name, action.action.name, action.amount) for action in hand.preflop.actions
+    ]
+
+
+def test_players_are_normalized(store, hands):
+    store.add_many(hands)
+    names = [name for name, in store.execute("SELECT name FROM players")]
+    assert len(names) == len(set(names))
+    seated = {player.name for hand in hands for player in hand.players}
+    assert seated - set(names) == {name for name in seated if name.startswith("Empty Seat")}
+
+
+def test_reimport_is_idempotent(tmp_path, hands):
+    path = tmp_path / "hands.sqlite"
+    with HandStore(path) as store:
+        store.add_many(hands[:10])
+    with HandStore(path) as store:
+        stats = store.add_many(hands)
+        assert stats == StoreStats(inserted=len(hands) - 10, duplicates=10)
+        assert len(store) == len(hands)
+        assert store.add_many(hands + hands) == StoreStats(inserted=0, duplicates=2 * len(hands))
+
+
+def test_duplicates_in_one_batch(store, hands):
+    assert store.add_many([hands[0], hands[0]]) == StoreStats(inserted=1, duplicates=1)
+
+
+def test_indexes_are_created_on_close(tmp_path, hands):
+    path = tmp_path / "hands.sqlite"
+    store = HandStore(path)
+    store.add_many(hands)
+
+    def indexes():
+        query = "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        return {name for name, in store.execute(query)}
+
+    assert indexes() == set()
+    store.close()
+    store = HandStore(path)
+    assert "actions_player" in indexes()
+    store.close()
+
+
+def test_every_room(store):
+    stars = PokerStarsHandHistory(stars_hands.HAND1)
+    ftp = FullTiltPokerHandHistory(ftp_hands.HAND1)
+    pkr = PKRHandHistory(next(iter(pkr_hands.HANDS.values())))
+    for hand in (stars, ftp, pkr):
+        hand.parse()
+    assert store.add_many([stars, ftp, pkr]).inserted == 3
+    rows = store.execute("SELECT room, board, sb FROM hands ORDER BY id").fetchall()
+    assert rows == [
+        ("STARS", "2♠6♦6♥", 10),
+        ("FTP", "8♥4♥T♣", 10),
+        ("PKR", "7♦3♣J♦J♠5♥", 0.25),
+    ]
+
+
+def test_unknown_parser(store):
+    class Unknown(PokerStarsHandHistory):
+        pass
+
+    hand = Unknown(stars_hands.HAND1)
+    hand.parse()
+    with pytest.raises(ValueError):
+        store.add_many([hand])
+
+
+def test_failed_batch_is_rolled_back(store, hands):
+    broken = PokerStarsHandHistory(stars_hands.HAND16)
+    broken.parse()
+    # sqlite3 can't bind it, so the batch fails after the new players got their ids
+    broken.sb = object()
+
+    store.add_many(hands[:5])
+    with pytest.raises(sqlite3.Error):
+        store.add_many(hands[5:10] + [broken])
+    assert len(store) == 5
+    assert store.add_many(hands[5:10]).inserted == 5
+    assert store.execute("SELECT max(id) FROM hands").fetchone()[0] == 10
+    assert store.execute("SELECT max(id) = count(*) FROM players").fetchone()[0] == 1
+
+
+def test_wal_mode(store):
+    assert store.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    with pytest.raises(sqlite3.IntegrityError):
+        store.execute("INSERT INTO players (id, name) VALUES (1, 'a'), (2, 'a')")
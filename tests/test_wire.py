@@ -0,0 +1,159 @@
+from pathlib import Path
+from decimal import Decimal
+import pytest
+from poker import wire
+from poker.card import Card
+from poker.constants import Game, GameType, Limit, Currency, MoneyType, Action
+from poker.handhistory import _PlayerAction
+from poker.jsonencoding import JsonHand, JsonStreet
+from poker.room.pokerstars import PokerStarsHandHistory
+from poker.room.fulltiltpoker import FullTiltPokerHandHistory
+from tests.handhistory import stars_hands, ftp_hands
+
+
+AKSNES = (
+    Path(__file__).parent / "handhistory" / "data" / "PokerStars" /
+    "HH20200416 Aksnes II - $0,01-$0,02 - USD No Limit Hold'em.txt"
+)
+
+
+def _parsed(hand_text, room=PokerStarsHandHistory, integer_amounts=False):
+    hand = room(hand_text, integer_amounts)
+    hand.parse()
+    return hand
+
+
+@pytest.fixture(scope="module")
+def aksnes_hands():
+    hands = []
+    for hand in PokerStarsHandHistory.iter_hands(AKSNES):
+        try:
+            hand.parse()
+        except Exception:
+            continue
+        hands.append(hand)
+    return hands
+
+
+def _assert_same(decoded, hand):
+    assert isinstance(decoded, JsonHand)
+    assert decoded.ident == hand.ident
+    assert decoded.date == hand.date
+    assert decoded.table_name == hand.table_name
+    assert (decoded.sb, decoded.bb) == (hand.sb, hand.bb)
+    assert decoded.total_pot == hand.total_pot
+    assert decoded.rake == hand.rake
+    assert decoded.earnings == hand.earnings
+    assert decoded.hero == hand.hero.name
+    assert decoded.button == hand.button.name
+    assert decoded.players == tuple(
+        player for player in hand.players if player.name != f"Empty Seat {player.seat}"
+    )
+    assert decoded.board == hand.board
+    assert decoded.winners == tuple(hand.winners)
+    for street_name in ("preflop", "flop", "turn", "river", "show_down"):
+        street = getattr(hand, street_name)
+        if street is None:
+            assert getattr(decoded, street_name) is None
+        else:
+            assert getattr(decoded, street_name).actions == street.actions
+
+
+def test_round_trip():
+    hand = _parsed(stars_hands.HAND12)
+    decoded = wire.decode_hand(wire.encode_hand(hand))
+    _assert_same(decoded, hand)
+    assert decoded.game is Game.HOLDEM
+    assert decoded.game_type is GameType.CASH
+    assert decoded.limit is Limit.NL
+    assert decoded.currency is Currency.USD
+    assert decoded.money_type is MoneyType.REAL
+    assert decoded.max_players == hand.max_players
+    assert decoded.flop.cards == hand.flop.cards
+    assert decoded.river.cards == hand.river.cards
+
+
+def test_amounts_are_exact():
+    hand = _parsed(stars_hands.HAND14)
+    decoded = wire.decode_hand(wire.encode_hand(hand))
+    assert decoded.total_pot == Decimal("5.45")
+    assert decoded.show_down.actions[1] == _PlayerAction(
+        "Theo53842", Action.CASH_OUT, Decimal("0.47")
+    )
+
+
+def test_integer_amounts():
+    hand = _parsed(stars_hands.HAND12, integer_amounts=True)
+    decoded = wire.decode_hand(wire.encode_hand(hand))
+    _assert_same(decoded, hand)
+    assert type(decoded.bb) is int
+
+
+def test_tournament():
+    hand = _parsed(stars_hands.HAND2)
+    decoded = wire.decode_hand(wire.encode_hand(hand))
+    _assert_same(decoded, hand)
+    assert decoded.game_type is GameType.TOUR
+    assert decoded.tournament_ident == "797536898"
+    assert decoded.tournament_level == "XI"
+
+
+def test_turn_and_river_cards_only():
+    hand = _parsed(ftp_hands.HAND1, FullTiltPokerHandHistory)
+    hand.turn, hand.river = Card("2s"), Card("3s")
+    decoded = wire.decode_hand(wire.encode_hand(hand))
+    assert decoded.board == (*hand.flop.cards, Card("2s"), Card("3s"))
+    assert decoded.turn == Card("2s")
+    assert decoded.river == Card("3s")
+    assert decoded.show_down is False
+
+
+def test_batch(aksnes_hands):
+    data = wire.encode_batch(aksnes_hands)
+    decoded = wire.decode_batch(data)
+    assert len(decoded) == len(aksnes_hands)
+    for decoded_hand, hand in zip(decoded, aksnes_hands):
+        _assert_same(decoded_hand, hand)
+
+
+def test_size_of_typical_hands(aksnes_hands):
+    # the names are written only once per batch
+    assert len(wire.encode_batch(aksnes_hands)) < 150 * len(aksnes_hands)
+
+
+def test_empty_batch():
+    assert wire.decode_batch(wire.encode_batch([])) == []
+
+
+def test_street_without_actions():
+    hand = _parsed(stars_hands.HAND12)
+    hand.flop.actions = None
+    decoded = wire.decode_hand(wire.encode_hand(hand))
+    assert decoded.flop == JsonStreet(None, hand.flop.cards)
+
+
+def test_more_than_two_decimals():
+    hand = _parsed(stars_hands.HAND12)
+    hand.rake = Decimal("0.005")
+    with pytest.raises(ValueError):
+        wire.encode_hand(hand)
+
+
+def test_wrong_header():
+    data = wire.encode_hand(_parsed(stars_hands.HAND12))
+    with pytest.raises(ValueError):
+        wire.decode_batch(b"XXX" + data[3:])
+    with pytest.raises(ValueError):
+        wire.decode_batch(data[:3] + bytes([wire.VERSION + 1]) + data[4:])
+
+
+def test_decode_hand_of_batch(aksnes_hands):
+    with pytest.raises(ValueError):
+        wire.decode_hand(wire.encode_batch(aksnes_hands[:2]))
+
+
+def test_cards_are_interned():
+    first = wire.decode_hand(wire.encode_hand(_parsed(stars_hands.HAND12)))
+    second = wire.decode_hand(wire.encode_hand(_parsed(stars_hands.HAND12)))
+    assert first.board[0] is second.board[0]
+    assert isinstance(first.board[0], Card)